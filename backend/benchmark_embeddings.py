@@ -0,0 +1,180 @@
+"""
+CLI script for benchmarking embedding backends on our document set.
+
+Embeds the same chunks with each backend and reports document throughput,
+single-query latency, and retrieval recall@k against the PyTorch baseline
+(exact cosine search over each backend's own vectors).
+
+Usage examples:
+    # Benchmark on the chunks already in the local vector store
+    python benchmark_embeddings.py
+
+    # Benchmark on a folder of .txt/.md files or a .jsonl file with a "content" field
+    python benchmark_embeddings.py --input ./sample_data/docs --backends torch onnx-int8
+
+    # Limit inference threads and sample size
+    python benchmark_embeddings.py --threads 4 --max-chunks 2000 --queries 200
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.services.embedding_backends import EMBEDDING_BACKENDS, create_embeddings
+from src.utils import configure_logging, settings
+from src.utils.text_chunking import split_texts
+
+
+def load_chunks(input_path: str, max_chunks: int) -> List[str]:
+    """Load chunks from files, or from the local vector store when no input is given."""
+    if input_path:
+        path = Path(input_path)
+        texts: List[str] = []
+        files = sorted(path.rglob("*")) if path.is_dir() else [path]
+        for file in files:
+            if file.suffix in (".txt", ".md"):
+                texts.append(file.read_text(encoding="utf-8"))
+            elif file.suffix == ".jsonl":
+                with open(file, "r", encoding="utf-8") as f:
+                    texts.extend(json.loads(line).get("content", "") for line in f if line.strip())
+        chunks = [
+            chunk
+            for text_chunks in split_texts(texts, settings.rag_chunk_size, settings.rag_chunk_overlap)
+            for chunk in text_chunks
+        ]
+    else:
+        import chromadb
+        from chromadb.config import Settings as ChromaSettings
+
+        client = chromadb.PersistentClient(
+            path=settings.vector_store_path,
+            settings=ChromaSettings(anonymized_telemetry=False)
+        )
+        collection = client.get_or_create_collection(name="knowledge_base")
+        chunks = collection.get(limit=max_chunks, include=["documents"])["documents"] or []
+
+    return [chunk for chunk in chunks if chunk.strip()][:max_chunks]
+
+
+def make_queries(chunks: List[str], count: int, seed: int) -> List[str]:
+    """Use the opening sentence of randomly sampled chunks as queries."""
+    rng = random.Random(seed)
+    sample = rng.sample(chunks, min(count, len(chunks)))
+    return [chunk.split(". ")[0][:200] for chunk in sample]
+
+
+def top_k(doc_vectors: np.ndarray, query_vectors: np.ndarray, k: int) -> np.ndarray:
+    """Exact top-k neighbours by inner product (vectors are normalized)."""
+    scores = query_vectors @ doc_vectors.T
+    k = min(k, doc_vectors.shape[0])
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(scores, candidates, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def benchmark_backend(
+    backend: str,
+    chunks: List[str],
+    queries: List[str],
+    threads: int,
+    batch_size: int
+) -> Dict[str, object]:
+    """Embed chunks and queries with one backend and time it."""
+    start = time.perf_counter()
+    embeddings = create_embeddings(
+        model_name=settings.embedding_model,
+        backend=backend,
+        num_threads=threads,
+        onnx_int8_file=settings.embedding_onnx_int8_file
+    )
+    load_seconds = time.perf_counter() - start
+
+    # Warm up so first-inference costs are not counted
+    embeddings.embed_documents(chunks[:batch_size])
+
+    start = time.perf_counter()
+    doc_vectors: List[List[float]] = []
+    for i in range(0, len(chunks), batch_size):
+        doc_vectors.extend(embeddings.embed_documents(chunks[i:i + batch_size]))
+    embed_seconds = time.perf_counter() - start
+
+    latencies = []
+    query_vectors = []
+    for query in queries:
+        start = time.perf_counter()
+        query_vectors.append(embeddings.embed_query(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "backend": backend,
+        "load_s": load_seconds,
+        "docs_per_s": len(chunks) / embed_seconds if embed_seconds else 0.0,
+        "query_ms_p50": float(np.percentile(latencies, 50)),
+        "query_ms_p95": float(np.percentile(latencies, 95)),
+        "doc_vectors": np.asarray(doc_vectors, dtype=np.float32),
+        "query_vectors": np.asarray(query_vectors, dtype=np.float32),
+    }
+
+
+def main() -> int:
+    """Main entry point for the embedding benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    parser.add_argument("--input", default="", help="Folder of .txt/.md files or a .jsonl file (default: vector store)")
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--threads", type=int, default=settings.embedding_num_threads, help="Inference threads (0 = default)")
+    parser.add_argument("--batch-size", type=int, default=settings.rag_embedding_batch_size)
+    parser.add_argument("--max-chunks", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=settings.rag_top_k)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    configure_logging()
+
+    chunks = load_chunks(args.input, args.max_chunks)
+    if len(chunks) < 2:
+        print("Not enough documents to benchmark; index documents or pass --input")
+        return 1
+    queries = make_queries(chunks, args.queries, args.seed)
+    print(f"Benchmarking {len(chunks)} chunks, {len(queries)} queries, k={args.k}, model={settings.embedding_model}\n")
+
+    backends = args.backends if "torch" in args.backends else ["torch"] + args.backends
+    results = []
+    for backend in backends:
+        try:
+            results.append(benchmark_backend(backend, chunks, queries, args.threads, args.batch_size))
+        except Exception as e:
+            print(f"{backend}: failed ({e})")
+
+    baseline = next((r for r in results if r["backend"] == "torch"), None)
+    if baseline is None:
+        print("PyTorch baseline failed; cannot compute recall")
+        return 1
+    reference = top_k(baseline["doc_vectors"], baseline["query_vectors"], args.k)
+
+    print(f"{'backend':<10} {'load s':>8} {'docs/s':>10} {'q p50 ms':>9} {'q p95 ms':>9} {'speedup':>8} {f'recall@{args.k}':>10}")
+    for result in results:
+        neighbours = top_k(result["doc_vectors"], result["query_vectors"], args.k)
+        recall = np.mean([
+            len(set(found) & set(expected)) / len(expected)
+            for found, expected in zip(neighbours, reference)
+        ])
+        speedup = result["docs_per_s"] / baseline["docs_per_s"] if baseline["docs_per_s"] else 0.0
+        print(
+            f"{result['backend']:<10} {result['load_s']:>8.2f} {result['docs_per_s']:>10.1f} "
+            f"{result['query_ms_p50']:>9.2f} {result['query_ms_p95']:>9.2f} {speedup:>7.2f}x {recall:>10.3f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
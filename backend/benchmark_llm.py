@@ -0,0 +1,192 @@
+"""
+CLI script for load-testing the LLM pipeline offline with the local fake provider.
+
+Sends concurrent requests through LLMService (scheduler, coalescing, retries,
+streaming) against the ``local-fake`` provider, and reports throughput,
+latency percentiles and the pipeline's own overhead: observed latency minus
+the latency the fake model simulated. Runs are reproducible for a given seed.
+
+With --workflow each request runs the full agent workflow instead
+(AgentOrchestrator.process_query, or astream_query with --stream): query
+understanding, retrieval, response generation with fused suggestions and
+recommendations. RAG and Cosmos DB are disabled so the run stays offline;
+retrieval then returns no data and the run measures the agent workflow and
+LLM pipeline.
+
+Usage examples:
+    # 500 requests, 32 at a time, ~800 ms lognormal latency and 50 tokens/s streaming
+    python benchmark_llm.py --requests 500 --concurrency 32 --latency-ms 800 --jitter-ms 300 \\
+        --distribution lognormal --tokens-per-second 50 --stream
+
+    # Inject 5% rate limit errors and cap the provider at 600 requests per minute
+    python benchmark_llm.py --rate-limit-rate 0.05 --rate-limits local-fake:600:0
+
+    # Scripted replies
+    python benchmark_llm.py --responses ./fake_responses.json
+
+    # Full agent workflow, streamed, 100 ms per LLM call
+    python benchmark_llm.py --workflow --stream --requests 100 --latency-ms 100 --jitter-ms 0
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.utils import configure_logging, settings
+
+
+async def run_request(service, index: int, args: argparse.Namespace) -> Dict[str, float]:
+    """Send one request and time it."""
+    messages = [{"role": "user", "content": f"Question {index % args.distinct}: summarize volume"}]
+    start = time.perf_counter()
+    first_token = None
+    try:
+        if args.stream:
+            async for _ in service.astream_response(messages, agent=args.agent):
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+        else:
+            await service.generate_response(messages, agent=args.agent)
+        ok = True
+    except Exception:
+        ok = False
+    total = time.perf_counter() - start
+    return {"ok": ok, "total_ms": total * 1000, "first_token_ms": (first_token or total) * 1000}
+
+
+async def run_workflow_request(orchestrator, index: int, args: argparse.Namespace) -> Dict[str, float]:
+    """Run one query through the agent workflow and time it."""
+    query = f"Question {index % args.distinct}: summarize volume"
+    start = time.perf_counter()
+    first_token = None
+    if args.stream:
+        result: Dict[str, Any] = {}
+        async for event in orchestrator.astream_query(query, f"user-{index}", f"conversation-{index}"):
+            if event["event"] == "token" and first_token is None:
+                first_token = time.perf_counter() - start
+            elif event["event"] == "done":
+                result = event["data"]
+    else:
+        result = await orchestrator.process_query(query, f"user-{index}", f"conversation-{index}")
+    total = time.perf_counter() - start
+    return {
+        "ok": "error" not in result["metadata"],
+        "total_ms": total * 1000,
+        "first_token_ms": (first_token or total) * 1000,
+    }
+
+
+async def run(args: argparse.Namespace) -> Tuple[List[Dict[str, float]], float, List[Any], Dict[str, Any]]:
+    """Run the workload with bounded concurrency; returns results, wall time, fake models and service stats."""
+    from src.services import llm_models
+    from src.services.llm_service import get_llm_service
+
+    service = get_llm_service("local-fake")
+    if not args.cache:
+        service.response_cache = None
+    if args.workflow:
+        from src.agents.orchestrator import AgentOrchestrator
+
+        orchestrator = AgentOrchestrator()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def bounded(index: int) -> Dict[str, float]:
+        async with semaphore:
+            if args.workflow:
+                return await run_workflow_request(orchestrator, index, args)
+            return await run_request(service, index, args)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(bounded(i) for i in range(args.requests)))
+    wall_seconds = time.perf_counter() - start
+    # Agents may be routed to different model names; each has its own fake
+    models = [model for (provider, _), model in llm_models._chat_models.items() if provider == "local-fake"]
+    return results, wall_seconds, models, service.stats()
+
+
+def main() -> int:
+    """Main entry point for the LLM pipeline benchmark."""
+    parser = argparse.ArgumentParser(description="Load-test the LLM pipeline with the local fake provider")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--distinct", type=int, default=1000000, help="Distinct prompts (fewer exercises coalescing)")
+    parser.add_argument("--agent", default="ResponseGenerationAgent", help="Agent the calls are attributed to")
+    parser.add_argument("--workflow", action="store_true", help="Run the full agent workflow per request")
+    parser.add_argument("--stream", action="store_true", help="Stream responses")
+    parser.add_argument("--cache", action="store_true", help="Keep the response cache enabled")
+    parser.add_argument("--responses", default=settings.local_fake_responses_path, help="Scripted responses JSON")
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--jitter-ms", type=float, default=150.0)
+    parser.add_argument("--distribution", default="lognormal", choices=["fixed", "uniform", "normal", "lognormal"])
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limits", default="", help="Scheduler quotas, e.g. local-fake:600:0")
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    configure_logging()
+
+    settings.local_fake_responses_path = args.responses
+    settings.local_fake_latency_ms = args.latency_ms
+    settings.local_fake_latency_jitter_ms = args.jitter_ms
+    settings.local_fake_latency_distribution = args.distribution
+    settings.local_fake_tokens_per_second = args.tokens_per_second
+    settings.local_fake_error_rate = args.error_rate
+    settings.local_fake_rate_limit_rate = args.rate_limit_rate
+    settings.local_fake_seed = args.seed
+    settings.llm_rate_limits = args.rate_limits
+    settings.llm_fallback_providers = ""
+    if args.workflow:
+        # Every agent on the fake provider; no network services
+        settings.default_llm_provider = "local-fake"
+        settings.llm_agent_models = ""
+        settings.rag_enabled = False
+        settings.cosmos_endpoint = ""
+
+    results, wall_seconds, models, stats = asyncio.run(run(args))
+
+    ok = [r for r in results if r["ok"]]
+    print(
+        f"{args.requests} requests, concurrency {args.concurrency}, "
+        f"{'workflow, ' if args.workflow else ''}{'streaming' if args.stream else 'blocking'}, "
+        f"{args.distribution} {args.latency_ms}±{args.jitter_ms} ms\n"
+    )
+    print(f"wall time        {wall_seconds:>10.2f} s")
+    print(f"throughput       {len(ok) / wall_seconds if wall_seconds else 0.0:>10.1f} req/s")
+    print(f"errors           {len(results) - len(ok):>10d}")
+    print(f"provider calls   {sum(model.calls for model in models):>10d}")
+    if ok:
+        totals = np.array([r["total_ms"] for r in ok])
+        print(f"latency p50      {np.percentile(totals, 50):>10.1f} ms")
+        print(f"latency p95      {np.percentile(totals, 95):>10.1f} ms")
+        print(f"latency p99      {np.percentile(totals, 99):>10.1f} ms")
+        if args.stream:
+            first = np.array([r["first_token_ms"] for r in ok])
+            print(f"first token p50  {np.percentile(first, 50):>10.1f} ms")
+        # Simulated time per request: all of its provider calls in workflow mode
+        calls_per_request = sum(model.calls for model in models) / len(results)
+        simulated = np.array([ms for model in models for ms in model.simulated_ms] or [0.0])
+        simulated_per_request = simulated.mean() * (calls_per_request if args.workflow else 1)
+        print(f"simulated mean   {simulated_per_request:>10.1f} ms")
+        print(f"overhead mean    {totals.mean() - simulated_per_request:>10.1f} ms")
+
+    scheduler = stats.get("scheduler") or {}
+    coalescing = stats.get("coalescing") or {}
+    print(f"\ncoalesced calls  {coalescing.get('coalesced', 0):>10d}")
+    for name, priority in (scheduler.get("classes") or {}).items():
+        if priority["admitted"]:
+            print(f"queue {name:<10} p50 {priority['queue_ms_p50']:>8.1f} ms  p95 {priority['queue_ms_p95']:>8.1f} ms")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
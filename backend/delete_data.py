@@ -14,6 +14,9 @@ Usage examples:
     
     # Dry run: show what would be deleted without actually deleting
     python delete_data.py --container gold --pk-type "repay:settlement" --pk-filter "20251122" --pk-filter-criteria ">=" --dry-run
+    
+    # Expire instead of delete: stamp ttl=1 and let Cosmos DB remove the items in the background
+    python delete_data.py --container gold --pk-type "repay:settlement" --pk-filter "20251120" --pk-filter-criteria "<=" --expire
 """
 import argparse
 import asyncio
@@ -40,7 +43,8 @@ class DataDeleter(LoggerMixin):
         pk_type: str,
         pk_filter: str,
         pk_filter_criteria: str = None,
-        dry_run: bool = False
+        dry_run: bool = False,
+        expire: bool = False
     ) -> dict:
         """
         Delete items from Cosmos DB by partition key values.
@@ -51,6 +55,8 @@ class DataDeleter(LoggerMixin):
             pk_filter: Value for pkFilter partition key
             pk_filter_criteria: Optional comparison operator for pkFilter (>=, <=, >, <, ==, !=)
             dry_run: If True, only count items without deleting
+            expire: If True, stamp ttl=1 instead of deleting so Cosmos DB removes the
+                    items in the background with spare RUs (container TTL must be enabled)
             
         Returns:
             Dict with summary: {'deleted': int, 'failed': int, 'errors': List[str]}
@@ -120,12 +126,19 @@ class DataDeleter(LoggerMixin):
                 try:
                     # Use the actual item's partition key for deletion
                     item_pk_filter = item['pkFilter']
-                    container.delete_item(
-                        item=item['id'],
-                        partition_key=[pk_type, item_pk_filter]
-                    )
+                    if expire:
+                        container.patch_item(
+                            item=item['id'],
+                            partition_key=[pk_type, item_pk_filter],
+                            patch_operations=[{"op": "set", "path": "/ttl", "value": 1}]
+                        )
+                    else:
+                        container.delete_item(
+                            item=item['id'],
+                            partition_key=[pk_type, item_pk_filter]
+                        )
                     deleted_count += 1
-                    self.logger.debug(f"Deleted item: {item['id']}")
+                    self.logger.debug(f"{'Expired' if expire else 'Deleted'} item: {item['id']}")
                 except Exception as e:
                     failed_count += 1
                     error_msg = f"Failed to delete item {item['id']}: {str(e)}"
@@ -181,6 +194,12 @@ async def main():
         help='Show what would be deleted without actually deleting'
     )
     
+    parser.add_argument(
+        '--expire',
+        action='store_true',
+        help='Stamp ttl=1 instead of deleting; Cosmos DB removes the items in the background'
+    )
+    
     parser.add_argument(
         '--no-confirm',
         action='store_true',
@@ -222,7 +241,8 @@ async def main():
             pk_type=args.pk_type,
             pk_filter=args.pk_filter,
             pk_filter_criteria=args.pk_filter_criteria,
-            dry_run=args.dry_run
+            dry_run=args.dry_run,
+            expire=args.expire
         )
         
         if args.dry_run:
@@ -5,6 +5,7 @@ from typing import Any, Dict, List
 
 from src.agents.base_agent import AgentState, BaseAgent
 from src.services import get_cosmos_service, get_rag_service
+from src.services.answer_cache import ALL_PARTITIONS, gold_partitions
 
 
 class DataRetrievalAgent(BaseAgent):
@@ -58,14 +59,27 @@ class DataRetrievalAgent(BaseAgent):
             
             # Query financial data from Cosmos DB
             financial_data = await self._query_gold_data(query_analysis)
+            
+            # Fetch gold records referenced by RAG metadata in a single batched read
+            referenced_records = await self._fetch_referenced_gold_records(
+                retrieved_data["rag_sources"]
+            )
+            financial_data.extend(referenced_records)
             retrieved_data["financial_data"] = financial_data
             self.logger.info(f"Retrieved {len(financial_data)} financial records")
             
+            # Gold partitions the answer will depend on (for answer cache invalidation)
+            partitions = gold_partitions(financial_data)
+            if self.cosmos_service.gold_container:
+                # The gold query spans partitions, so a write to any of them can change it
+                partitions.add(ALL_PARTITIONS)
+            
             # Add metadata about retrieval
             retrieved_data["metadata"] = {
                 "rag_enabled": bool(retrieved_data["rag_context"]),
                 "financial_records_count": len(financial_data),
-                "sources_count": len(retrieved_data["rag_sources"])
+                "sources_count": len(retrieved_data["rag_sources"]),
+                "gold_partitions": sorted(partitions)
             }
             
         except Exception as e:
@@ -96,7 +110,7 @@ class DataRetrievalAgent(BaseAgent):
             query_type = query_analysis.get("query_type", "")
             
             # Example query - customize based on your schema
-            if not self.cosmos_service.financial_data_container:
+            if not self.cosmos_service.gold_container:
                 self.logger.warning("Cosmos DB not configured, returning empty results")
                 return []
             
@@ -108,7 +122,8 @@ class DataRetrievalAgent(BaseAgent):
             
             # Execute query
             results = await self.cosmos_service.query_gold_data(
-                query=cosmos_query
+                query=cosmos_query,
+                caller="agent"
             )
             
             return results
@@ -116,3 +131,38 @@ class DataRetrievalAgent(BaseAgent):
         except Exception as e:
             self.logger.error(f"Error querying financial data: {e}")
             return []
+    
+    async def _fetch_referenced_gold_records(
+        self,
+        rag_sources: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch gold records referenced by RAG source metadata.
+        
+        Sources whose metadata carries an ``id`` together with ``pkType`` and
+        ``pkFilter`` point at a specific gold document, so they can be read
+        directly instead of being queried.
+        
+        Args:
+            rag_sources: Sources returned by the RAG service
+            
+        Returns:
+            List of referenced gold records that were found
+        """
+        references = []
+        for source in rag_sources:
+            metadata = source.get("metadata") or {}
+            if all(metadata.get(field) is not None for field in ("id", "pkType", "pkFilter")):
+                reference = (metadata["id"], [metadata["pkType"], metadata["pkFilter"]])
+                if reference not in references:
+                    references.append(reference)
+        
+        if not references or not self.cosmos_service.gold_container:
+            return []
+        
+        try:
+            records = await self.cosmos_service.read_many("gold", references)
+            return [record for record in records if record is not None]
+        except Exception as e:
+            self.logger.error(f"Error fetching referenced gold records: {e}")
+            return []
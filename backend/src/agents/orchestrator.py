@@ -1,7 +1,9 @@
 """
 Orchestrator for coordinating multi-agent workflow using LangGraph.
 """
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import threading
 
 from langgraph.graph import END, StateGraph
 
@@ -10,7 +12,9 @@ from src.agents.data_retrieval_agent import DataRetrievalAgent
 from src.agents.query_understanding_agent import QueryUnderstandingAgent
 from src.agents.recommendation_agent import RecommendationAgent
 from src.agents.response_generation_agent import ResponseGenerationAgent
-from src.utils import LoggerMixin
+from src.services import get_answer_cache, get_cosmos_service, get_rag_service
+from src.services.answer_cache import key_terms, permission_scope
+from src.utils import LoggerMixin, settings
 
 
 class AgentOrchestrator(LoggerMixin):
@@ -19,9 +23,11 @@ class AgentOrchestrator(LoggerMixin):
     
     Workflow:
     1. Query Understanding Agent - Analyzes user query
-    2. Data Retrieval Agent - Fetches relevant data
-    3. Response Generation Agent - Creates response
-    4. Recommendation Agent - Suggests follow-up questions
+    2. Semantic answer cache - Returns a prior answer to a near-duplicate question
+    3. Data Retrieval Agent - Fetches relevant data
+    4. Response Generation Agent - Creates response
+    5. Recommendation Agent - Suggests follow-up questions (skipped when the
+       response already carried them in fused mode)
     """
     
     def __init__(self):
@@ -35,6 +41,10 @@ class AgentOrchestrator(LoggerMixin):
         self.response_generation_agent = ResponseGenerationAgent()
         self.recommendation_agent = RecommendationAgent()
         
+        self.rag_service = get_rag_service()
+        self.cosmos_service = get_cosmos_service()
+        self.answer_cache = get_answer_cache() if settings.answer_cache_enabled else None
+        
         # Build the workflow graph
         self.workflow = self._build_workflow()
     
@@ -50,16 +60,24 @@ class AgentOrchestrator(LoggerMixin):
         
         # Add nodes for each agent
         workflow.add_node("understand_query", self.query_understanding_agent)
+        workflow.add_node("lookup_answer_cache", self._lookup_cached_answer)
         workflow.add_node("retrieve_data", self.data_retrieval_agent)
         workflow.add_node("generate_response", self.response_generation_agent)
         workflow.add_node("generate_recommendations", self.recommendation_agent)
+        workflow.add_node("store_answer", self._store_answer)
         
-        # Define the flow
+        # Define the flow; a cache hit ends the run right after query understanding
         workflow.set_entry_point("understand_query")
-        workflow.add_edge("understand_query", "retrieve_data")
+        workflow.add_edge("understand_query", "lookup_answer_cache")
+        workflow.add_conditional_edges(
+            "lookup_answer_cache",
+            lambda state: "hit" if state.get("answer_cache", {}).get("hit") else "miss",
+            {"hit": END, "miss": "retrieve_data"}
+        )
         workflow.add_edge("retrieve_data", "generate_response")
         workflow.add_edge("generate_response", "generate_recommendations")
-        workflow.add_edge("generate_recommendations", END)
+        workflow.add_edge("generate_recommendations", "store_answer")
+        workflow.add_edge("store_answer", END)
         
         # Compile the graph
         compiled_workflow = workflow.compile()
@@ -67,12 +85,105 @@ class AgentOrchestrator(LoggerMixin):
         self.logger.info("Workflow graph built successfully")
         return compiled_workflow
     
+    async def _permission_scope(self, user_id: str) -> str:
+        """Answer cache scope for a user (private scope if the user cannot be loaded)."""
+        user = None
+        if self.cosmos_service.users_container:
+            try:
+                user = await self.cosmos_service.get_user(user_id)
+            except Exception as e:
+                self.logger.warning(f"Could not load user {user_id} for cache scoping: {e}")
+        return permission_scope(user, user_id)
+    
+    async def _lookup_cached_answer(self, state: AgentState) -> AgentState:
+        """
+        Answer from the semantic cache when a near-duplicate question was answered.
+        
+        Args:
+            state: State after query understanding
+            
+        Returns:
+            State with the cached response and suggestions on a hit
+        """
+        state["answer_cache"] = {"hit": False}
+        if self.answer_cache is None or self.rag_service.embeddings is None:
+            return state
+        
+        query = state.get("reformulated_query") or state["user_query"]
+        terms = key_terms(query, (state.get("query_analysis") or {}).get("entities", []))
+        try:
+            scope = await self._permission_scope(state["user_id"])
+            vector = await self.rag_service.search_executor.run(
+                self.rag_service.embeddings.embed_query, query
+            )
+            match = self.answer_cache.lookup(scope, vector, terms)
+        except Exception as e:
+            self.logger.warning(f"Answer cache lookup failed: {e}")
+            return state
+        
+        state["answer_cache"] = {
+            "hit": False, "scope": scope, "query": query, "vector": vector, "terms": terms
+        }
+        if match is None:
+            return state
+        
+        entry, similarity = match
+        state["response"] = entry.response
+        state["suggestions"] = list(entry.suggestions)
+        state["response_metadata"] = entry.metadata.get("response_metadata", {})
+        state["retrieved_data"] = {"rag_sources": entry.metadata.get("sources", [])}
+        state["answer_cache"].update({
+            "hit": True,
+            "similarity": round(similarity, 4),
+            "cached_query": entry.query
+        })
+        self.logger.info(f"Answered from semantic cache (similarity {similarity:.3f})")
+        return state
+    
+    async def _store_answer(self, state: AgentState) -> AgentState:
+        """
+        Store a freshly generated answer in the semantic cache.
+        
+        Answers whose retrieval or generation failed are not cached.
+        
+        Args:
+            state: Final workflow state
+            
+        Returns:
+            Unchanged state
+        """
+        cache_state = state.get("answer_cache") or {}
+        retrieved_data = state.get("retrieved_data") or {}
+        if (
+            self.answer_cache is None
+            or "vector" not in cache_state
+            or retrieved_data.get("error")
+            or not state.get("response_metadata")
+        ):
+            return state
+        
+        self.answer_cache.store(
+            scope=cache_state["scope"],
+            query=cache_state["query"],
+            vector=cache_state["vector"],
+            response=state.get("response", ""),
+            suggestions=state.get("suggestions", []),
+            metadata={
+                "response_metadata": state.get("response_metadata", {}),
+                "sources": retrieved_data.get("rag_sources", []),
+            },
+            partitions=retrieved_data.get("metadata", {}).get("gold_partitions", []),
+            terms=cache_state.get("terms", [])
+        )
+        return state
+    
     async def process_query(
         self,
         user_query: str,
         user_id: str,
         conversation_id: str,
-        conversation_history: Optional[List[Dict[str, str]]] = None
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None
     ) -> Dict[str, Any]:
         """
         Process a user query through the agent workflow.
@@ -82,14 +193,130 @@ class AgentOrchestrator(LoggerMixin):
             user_id: User identifier
             conversation_id: Conversation identifier
             conversation_history: Previous messages in conversation
+            on_token: Optional coroutine called with each response token as it
+                      is generated (not called when the answer comes from cache)
             
         Returns:
             Dict containing response and recommendations
         """
         self.logger.info(f"Processing query for user {user_id}")
         
-        # Initialize state
-        initial_state: AgentState = {
+        initial_state = self._initial_state(
+            user_query, user_id, conversation_id, conversation_history, on_token
+        )
+        
+        try:
+            # Run the workflow
+            self.logger.info("Invoking workflow...")
+            final_state = await self.workflow.ainvoke(initial_state)
+            return self._build_result(final_state)
+            
+        except Exception as e:
+            self.logger.error(f"Error in workflow execution: {e}", exc_info=True)
+            return self._error_result(str(e))
+    
+    async def astream_query(
+        self,
+        user_query: str,
+        user_id: str,
+        conversation_id: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a user query, yielding stage events as the workflow runs.
+        
+        Events (each a dict with 'event' and 'data'):
+        - analysis: query analysis and reformulated query
+        - sources: RAG sources and the number of financial records used
+        - token: a response text delta
+        - suggestions: follow-up suggestions
+        - done: the same result process_query returns (authoritative response)
+        
+        Args:
+            user_query: The user's question
+            user_id: User identifier
+            conversation_id: Conversation identifier
+            conversation_history: Previous messages in conversation
+            
+        Yields:
+            Stage events, ending with 'done'
+        """
+        self.logger.info(f"Streaming query for user {user_id}")
+        events: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        
+        async def on_token(delta: str) -> None:
+            await events.put({"event": "token", "data": {"delta": delta}})
+        
+        async def run() -> None:
+            initial_state = self._initial_state(
+                user_query, user_id, conversation_id, conversation_history, on_token
+            )
+            final_state = None
+            try:
+                async for mode, chunk in self.workflow.astream(
+                    initial_state, stream_mode=["updates", "values"]
+                ):
+                    if mode == "values":
+                        final_state = chunk
+                        continue
+                    for node, update in chunk.items():
+                        for event in self._stage_events(node, update or {}):
+                            await events.put(event)
+                result = self._build_result(final_state)
+            except Exception as e:
+                self.logger.error(f"Error in workflow execution: {e}", exc_info=True)
+                result = self._error_result(str(e))
+            await events.put({"event": "done", "data": result})
+        
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                event = await events.get()
+                yield event
+                if event["event"] == "done":
+                    break
+        finally:
+            # The client may disconnect before the workflow finishes
+            if not task.done():
+                task.cancel()
+    
+    def _stage_events(self, node: str, state: AgentState) -> List[Dict[str, Any]]:
+        """Stage events for a completed workflow node."""
+        if node == "understand_query":
+            return [{"event": "analysis", "data": {
+                "query_analysis": state.get("query_analysis", {}),
+                "reformulated_query": state.get("reformulated_query", ""),
+            }}]
+        if node == "retrieve_data":
+            retrieved_data = state.get("retrieved_data") or {}
+            return [{"event": "sources", "data": {
+                "sources": retrieved_data.get("rag_sources", []),
+                "financial_records_count": len(retrieved_data.get("financial_data", [])),
+            }}]
+        if node == "generate_recommendations":
+            return [{"event": "suggestions", "data": {"suggestions": state.get("suggestions", [])}}]
+        if node == "lookup_answer_cache" and (state.get("answer_cache") or {}).get("hit"):
+            # A cached answer arrives complete
+            return [
+                {"event": "sources", "data": {
+                    "sources": (state.get("retrieved_data") or {}).get("rag_sources", []),
+                    "cached": True,
+                }},
+                {"event": "token", "data": {"delta": state.get("response", "")}},
+                {"event": "suggestions", "data": {"suggestions": state.get("suggestions", [])}},
+            ]
+        return []
+    
+    def _initial_state(
+        self,
+        user_query: str,
+        user_id: str,
+        conversation_id: str,
+        conversation_history: Optional[List[Dict[str, str]]],
+        on_token: Optional[Callable[[str], Awaitable[None]]]
+    ) -> AgentState:
+        """Build the workflow input state."""
+        return {
             "user_query": user_query,
             "user_id": user_id,
             "conversation_id": conversation_id,
@@ -98,54 +325,57 @@ class AgentOrchestrator(LoggerMixin):
             "retrieved_data": {},
             "response": "",
             "suggestions": [],
+            "on_token": on_token,
         }
+    
+    def _build_result(self, final_state: Optional[AgentState]) -> Dict[str, Any]:
+        """Extract the response, suggestions and metadata from the final state."""
+        # Check if final_state is None or invalid
+        if final_state is None:
+            self.logger.error("Workflow returned None state")
+            return self._error_result("Workflow returned None")
         
-        try:
-            # Run the workflow
-            self.logger.info("Invoking workflow...")
-            final_state = await self.workflow.ainvoke(initial_state)
-            
-            # Check if final_state is None or invalid
-            if final_state is None:
-                self.logger.error("Workflow returned None state")
-                return {
-                    "response": "I apologize, but I encountered an error processing your query. Please try again.",
-                    "suggestions": [],
-                    "metadata": {"error": "Workflow returned None"}
-                }
-            
-            self.logger.info(f"Workflow completed. Final state keys: {list(final_state.keys())}")
-            
-            # Extract results
-            result = {
-                "response": final_state.get("response", ""),
-                "suggestions": final_state.get("suggestions", []),
-                "metadata": {
-                    "query_analysis": final_state.get("query_analysis", {}),
-                    "response_metadata": final_state.get("response_metadata", {}),
-                    "sources": final_state.get("retrieved_data", {}).get("rag_sources", []),
-                }
-            }
-            
-            self.logger.info("Query processing completed successfully")
-            return result
-            
-        except Exception as e:
-            self.logger.error(f"Error in workflow execution: {e}", exc_info=True)
-            return {
-                "response": "I apologize, but I encountered an error processing your query. Please try again.",
-                "suggestions": [],
-                "metadata": {"error": str(e)}
+        self.logger.info(f"Workflow completed. Final state keys: {list(final_state.keys())}")
+        
+        # Extract results
+        result = {
+            "response": final_state.get("response", ""),
+            "suggestions": final_state.get("suggestions", []),
+            "metadata": {
+                "query_analysis": final_state.get("query_analysis", {}),
+                "response_metadata": final_state.get("response_metadata", {}),
+                "sources": final_state.get("retrieved_data", {}).get("rag_sources", []),
+                "answer_cache": {
+                    key: value
+                    for key, value in final_state.get("answer_cache", {}).items()
+                    if key in ("hit", "similarity", "cached_query")
+                },
             }
+        }
+        
+        self.logger.info("Query processing completed successfully")
+        return result
+    
+    def _error_result(self, error: str) -> Dict[str, Any]:
+        """Result returned when the workflow fails."""
+        return {
+            "response": "I apologize, but I encountered an error processing your query. Please try again.",
+            "suggestions": [],
+            "metadata": {"error": error}
+        }
 
 
 # Global orchestrator instance
 _orchestrator: Optional[AgentOrchestrator] = None
+# Warm-up builds the orchestrator in a worker thread while requests may ask for it
+_orchestrator_lock = threading.Lock()
 
 
 def get_orchestrator() -> AgentOrchestrator:
     """Get or create orchestrator instance."""
     global _orchestrator
     if _orchestrator is None:
-        _orchestrator = AgentOrchestrator()
+        with _orchestrator_lock:
+            if _orchestrator is None:
+                _orchestrator = AgentOrchestrator()
     return _orchestrator
@@ -4,7 +4,9 @@ Query Understanding Agent - Analyzes and interprets user queries.
 from typing import Any, Dict, List
 
 from src.agents.base_agent import AgentState, BaseAgent
+from src.models import QueryAnalysis
 from src.services import get_llm_service, get_rag_service
+from src.utils import settings
 
 
 class QueryUnderstandingAgent(BaseAgent):
@@ -69,14 +71,23 @@ Respond in JSON format with these fields.
         })
         
         try:
-            # Get query analysis from LLM
-            response = await self.llm_service.generate_response(
-                messages=messages,
-                system_prompt=system_prompt
-            )
-            
-            # Parse response (in production, use structured output)
-            query_analysis = self._parse_query_analysis(response, user_query)
+            if settings.llm_fused_mode:
+                # Schema-validated analysis via the provider's structured output
+                analysis = await self.llm_service.generate_structured(
+                    messages=messages,
+                    schema=QueryAnalysis,
+                    system_prompt=system_prompt,
+                    agent=self.name
+                )
+                query_analysis = analysis.model_dump()
+            else:
+                # Get query analysis from LLM
+                response = await self.llm_service.generate_response(
+                    messages=messages,
+                    system_prompt=system_prompt,
+                    agent=self.name
+                )
+                query_analysis = self._parse_query_analysis(response, user_query)
             
             # Update state
             state["query_analysis"] = query_analysis
@@ -27,6 +27,9 @@ class RecommendationAgent(BaseAgent):
         """
         Generate query recommendations.
         
+        Suggestions already returned by the fused response call are kept
+        without another LLM call.
+        
         Args:
             state: Current agent state with query and response
             
@@ -38,6 +41,10 @@ class RecommendationAgent(BaseAgent):
         response = state.get("response", "")
         conversation_history = state.get("conversation_history", [])
         
+        if state.get("suggestions"):
+            self.logger.info("Using suggestions returned with the response")
+            return state
+        
         self.logger.info("Generating query recommendations")
         
         try:
@@ -80,7 +87,8 @@ Example: ["What were the sales trends for Q3?", "How does this compare to last y
             
             recommendation_response = await self.llm_service.generate_response(
                 messages=messages,
-                system_prompt=system_prompt
+                system_prompt=system_prompt,
+                agent=self.name
             )
             
             # Parse recommendations
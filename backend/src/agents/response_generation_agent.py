@@ -1,10 +1,102 @@
 """
 Response Generation Agent - Generates natural language responses.
 """
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
 
 from src.agents.base_agent import AgentState, BaseAgent
+from src.models import FollowUpSuggestions
 from src.services import get_llm_service
+from src.utils import LoggerMixin, settings
+
+# Separates the answer from the follow-up suggestions in fused mode
+SUGGESTIONS_MARKER = "<<<FOLLOW_UP>>>"
+
+FUSED_SUGGESTIONS_PROMPT = f"""
+After the answer, write {SUGGESTIONS_MARKER} on its own line, followed by a JSON object
+{{"suggestions": [...]}} with 3-5 relevant follow-up questions the user might ask next
+(drill deeper, compare dimensions, explore trends, related metrics). Write nothing after the JSON.
+"""
+
+
+class SuggestionTrailer(LoggerMixin):
+    """
+    Splits a streamed fused response into the answer and its suggestion trailer.
+    
+    Text that could be the start of the marker is held back until it is
+    known not to be, so the marker and the trailer never reach the client.
+    Trailing whitespace is held back too and dropped if the marker follows,
+    so the emitted text is exactly the answer that gets saved.
+    """
+    
+    def __init__(self, marker: str = SUGGESTIONS_MARKER):
+        """
+        Initialize the splitter.
+        
+        Args:
+            marker: Line separating the answer from the suggestions JSON
+        """
+        self.marker = marker
+        self._pending = ""
+        self._trailer: Optional[List[str]] = None
+    
+    def feed(self, delta: str) -> str:
+        """
+        Add a streamed delta.
+        
+        Args:
+            delta: Response text delta
+            
+        Returns:
+            Answer text that is safe to emit (may be empty)
+        """
+        if self._trailer is not None:
+            self._trailer.append(delta)
+            return ""
+        
+        self._pending += delta
+        index = self._pending.find(self.marker)
+        if index >= 0:
+            answer = self._pending[:index].rstrip()
+            self._trailer = [self._pending[index + len(self.marker):]]
+            self._pending = ""
+            return answer
+        
+        # Hold back a suffix that may turn into the marker, and the whitespace before it
+        split = len(self._pending)
+        for size in range(min(len(self.marker) - 1, len(self._pending)), 0, -1):
+            if self._pending.endswith(self.marker[:size]):
+                split -= size
+                break
+        while split > 0 and self._pending[split - 1].isspace():
+            split -= 1
+        answer = self._pending[:split]
+        self._pending = self._pending[split:]
+        return answer
+    
+    def finish(self) -> str:
+        """Release text still held back once the stream ends."""
+        answer, self._pending = self._pending, ""
+        return answer
+    
+    def suggestions(self) -> Optional[List[str]]:
+        """
+        Validated suggestions from the trailer.
+        
+        Returns:
+            Suggestions, or None if the trailer is missing or does not match the schema
+        """
+        if self._trailer is None:
+            return None
+        trailer = "".join(self._trailer).strip()
+        # Models sometimes fence the JSON
+        trailer = trailer.removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+        try:
+            return FollowUpSuggestions.model_validate_json(trailer).suggestions or None
+        except ValidationError as e:
+            self.logger.warning(f"Invalid suggestions in fused response: {e}")
+            return None
 
 
 class ResponseGenerationAgent(BaseAgent):
@@ -27,6 +119,9 @@ class ResponseGenerationAgent(BaseAgent):
         """
         Generate response based on retrieved data.
         
+        Response tokens are passed to the optional ``on_token`` coroutine in
+        the state as they are generated.
+        
         Args:
             state: Current agent state with retrieved_data
             
@@ -80,11 +175,38 @@ If the data is insufficient to answer the question, say so clearly and suggest w
                 "content": user_query
             })
             
-            # Generate response
-            response = await self.llm_service.generate_response(
+            # In fused mode the same call also returns the follow-up suggestions
+            trailer = SuggestionTrailer() if settings.llm_fused_mode else None
+            if trailer is not None:
+                system_prompt += FUSED_SUGGESTIONS_PROMPT
+            
+            # Stream the response so the first tokens reach the client immediately
+            on_token = state.get("on_token")
+            parts = []
+            async for delta in self.llm_service.astream_response(
                 messages=messages,
-                system_prompt=system_prompt
-            )
+                system_prompt=system_prompt,
+                agent=self.name
+            ):
+                if trailer is not None:
+                    delta = trailer.feed(delta)
+                    if not delta:
+                        continue
+                parts.append(delta)
+                if on_token is not None:
+                    await on_token(delta)
+            if trailer is not None:
+                tail = trailer.finish()
+                if tail:
+                    parts.append(tail)
+                    if on_token is not None:
+                        await on_token(tail)
+                suggestions = trailer.suggestions()
+                if suggestions:
+                    state["suggestions"] = suggestions
+                else:
+                    self.logger.info("No suggestions returned with the response, recommendations will run")
+            response = "".join(parts)
             
             state["response"] = response
             state["response_metadata"] = {
@@ -2,12 +2,15 @@
 Analytics API endpoints.
 """
 from typing import Optional
+import json
 
 from fastapi import APIRouter, HTTPException, Query, status
 from pydantic import BaseModel
 
-from src.services import get_cosmos_service, get_rag_service
-from src.utils import get_logger
+from src.services import QueryRejectedError, get_cosmos_service, get_rag_service
+from src.services.query_guard import AdmissionAction
+from src.utils import ExecutorOverloadedError, get_logger
+from src.utils.metadata_filter import normalize_where
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 logger = get_logger(__name__)
@@ -29,25 +32,40 @@ async def execute_query(request: QueryRequest):
         request: Query request with SQL/natural language query
         
     Returns:
-        Query results
+        Query results; "limited" is true when the admission guard capped the
+        rows, and "applied_query" / "admission_reason" show what ran and why
     """
     try:
         cosmos_service = get_cosmos_service()
         
         logger.info(f"Executing analytics query for user: {request.user_id}")
         
-        # Execute query
-        results = await cosmos_service.query_gold_data(
+        # Execute query (checked by the admission guard before it reaches Cosmos DB)
+        results, decision = await cosmos_service.query_gold_data_with_decision(
             request.query,
-            filters=request.filters
+            caller="api"
         )
         
         return {
             "query": request.query,
             "results": results,
-            "count": len(results)
+            "count": len(results),
+            "limited": decision is not None and decision.action == AdmissionAction.LIMIT,
+            "applied_query": decision.query if decision else request.query,
+            "admission_reason": decision.reason if decision else ""
         }
         
+    except QueryRejectedError as e:
+        logger.warning(f"Rejected analytics query for user {request.user_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "message": str(e),
+                "query_class": e.decision.query_class.value,
+                "estimated_ru": e.decision.estimated_ru,
+                "max_ru": e.decision.max_ru
+            }
+        )
     except Exception as e:
         logger.error(f"Error executing query: {e}")
         raise HTTPException(
@@ -60,7 +78,11 @@ async def execute_query(request: QueryRequest):
 async def semantic_search(
     query: str = Query(..., description="Search query"),
     user_id: str = Query(..., description="User ID"),
-    limit: int = Query(5, description="Number of results to return")
+    limit: int = Query(5, description="Number of results to return"),
+    filters: Optional[str] = Query(
+        None,
+        description='JSON metadata filter applied before ranking, e.g. {"source": "faq"}'
+    )
 ):
     """
     Perform semantic search over financial documents.
@@ -69,34 +91,50 @@ async def semantic_search(
         query: Search query
         user_id: User ID for logging
         limit: Number of results to return
+        filters: JSON-encoded Chroma-style metadata filter
         
     Returns:
         Search results with relevance scores
     """
+    try:
+        where = normalize_where(json.loads(filters)) if filters else None
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid filters: {str(e)}"
+        )
+    
     try:
         rag_service = get_rag_service()
         
         logger.info(f"Performing semantic search for user: {user_id}")
         
-        # Perform similarity search
-        results = rag_service.similarity_search(query, k=limit)
+        # Perform similarity search with the filter pushed down into the index
+        results = await rag_service.similarity_search(query, k=limit, filter=where)
         
         # Format results
         formatted_results = [
             {
-                "content": doc.page_content,
-                "metadata": doc.metadata,
-                "relevance_score": getattr(doc, "score", None)
+                "content": text,
+                "metadata": metadata,
+                "relevance_score": score
             }
-            for doc in results
+            for text, score, metadata in results
         ]
         
         return {
             "query": query,
+            "filters": where,
             "results": formatted_results,
             "count": len(formatted_results)
         }
         
+    except ExecutorOverloadedError as e:
+        logger.warning(f"Semantic search rejected under load: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Search is overloaded, please retry shortly"
+        )
     except Exception as e:
         logger.error(f"Error performing semantic search: {e}")
         raise HTTPException(
@@ -194,23 +232,20 @@ async def index_documents(
         
         logger.info(f"Indexing {len(documents)} documents for user: {user_id}")
         
-        # Format documents
-        from langchain_core.documents import Document
-        
-        docs = [
-            Document(
-                page_content=doc.get("content", ""),
-                metadata=doc.get("metadata", {})
-            )
+        texts = [doc.get("content", "") for doc in documents]
+        # A document "id" makes re-indexing it replace its previous chunks
+        metadatas = [
+            {**(doc.get("metadata") or {}), **({"source_id": str(doc["id"])} if doc.get("id") else {})}
             for doc in documents
         ]
         
-        # Add to vector store
-        rag_service.add_documents(docs)
+        # Add to vector store (batched, off the event loop)
+        ids = await rag_service.add_documents(texts, metadatas)
         
         return {
-            "message": f"Successfully indexed {len(docs)} documents",
-            "count": len(docs)
+            "message": f"Successfully indexed {len(texts)} documents",
+            "count": len(texts),
+            "chunks": len(ids)
         }
         
     except Exception as e:
@@ -2,15 +2,17 @@
 Chat API endpoints.
 """
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import json
 
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, ConfigDict
 
 from src.agents import get_orchestrator
 from src.models import Conversation, Message, MessageCreate, MessageResponse, MessageRole
-from src.services import get_cosmos_service, get_memory_service
-from src.utils import get_logger
+from src.services import get_cosmos_service, get_memory_service, get_retention_service
+from src.utils import get_logger, get_settings
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 logger = get_logger(__name__)
@@ -35,6 +37,67 @@ class ChatResponse(BaseModel):
     sources: list[dict]
 
 
+async def _prepare_conversation(
+    request: ChatRequest,
+    persist_new: bool = True
+) -> Tuple[Conversation, List[Dict[str, str]]]:
+    """
+    Load or start the conversation and append the user's message.
+    
+    Args:
+        request: Chat request
+        persist_new: Create a new conversation in the database right away
+            (otherwise the caller saves it once the turn completes)
+        
+    Returns:
+        Tuple of (conversation, history for the orchestrator without the current message)
+        
+    Raises:
+        HTTPException: If the requested conversation does not exist
+    """
+    cosmos_service = get_cosmos_service()
+    memory_service = get_memory_service()
+    
+    # Get or create conversation
+    if request.conversation_id:
+        conversation = await cosmos_service.get_conversation(
+            request.conversation_id,
+            request.user_id
+        )
+        if not conversation:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversation not found"
+            )
+    else:
+        # Create new conversation
+        conversation = Conversation(user_id=request.user_id)
+        if persist_new:
+            conversation = await cosmos_service.create_conversation(conversation)
+    
+    # Create user message
+    user_message = Message(
+        role=MessageRole.USER,
+        content=request.message
+    )
+    conversation.add_message(user_message)
+    
+    # Load conversation history into memory
+    memory_service.load_conversation_history(conversation)
+    
+    # Prepare conversation history for orchestrator
+    history = [
+        {"role": msg.role.value, "content": msg.content}
+        for msg in conversation.get_recent_messages(limit=10)
+    ]
+    return conversation, history[:-1]  # Exclude current message
+
+
+def _sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
 @router.post("/message", response_model=ChatResponse, status_code=status.HTTP_200_OK)
 async def send_message(request: ChatRequest) -> ChatResponse:
     """
@@ -53,44 +116,14 @@ async def send_message(request: ChatRequest) -> ChatResponse:
         memory_service = get_memory_service()
         orchestrator = get_orchestrator()
         
-        # Get or create conversation
-        if request.conversation_id:
-            conversation = await cosmos_service.get_conversation(
-                request.conversation_id,
-                request.user_id
-            )
-            if not conversation:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Conversation not found"
-                )
-        else:
-            # Create new conversation
-            conversation = Conversation(user_id=request.user_id)
-            conversation = await cosmos_service.create_conversation(conversation)
-        
-        # Create user message
-        user_message = Message(
-            role=MessageRole.USER,
-            content=request.message
-        )
-        conversation.add_message(user_message)
-        
-        # Load conversation history into memory
-        memory_service.load_conversation_history(conversation)
-        
-        # Prepare conversation history for orchestrator
-        history = [
-            {"role": msg.role.value, "content": msg.content}
-            for msg in conversation.get_recent_messages(limit=10)
-        ]
+        conversation, history = await _prepare_conversation(request)
         
         # Process query through agent orchestrator
         result = await orchestrator.process_query(
             user_query=request.message,
             user_id=request.user_id,
             conversation_id=conversation.id,
-            conversation_history=history[:-1]  # Exclude current message
+            conversation_history=history
         )
         
         # Create assistant message
@@ -129,6 +162,88 @@ async def send_message(request: ChatRequest) -> ChatResponse:
         )
 
 
+@router.post("/message/stream", status_code=status.HTTP_200_OK)
+async def stream_message(request: ChatRequest) -> StreamingResponse:
+    """
+    Send a message and stream the AI response as Server-Sent Events.
+    
+    Events, in order:
+    - conversation: the conversation ID
+    - analysis: query analysis once understanding is done
+    - sources: retrieved sources, before the answer is generated
+    - token: response text deltas as the model produces them
+    - suggestions: follow-up questions
+    - done: the saved assistant message (same fields as POST /message)
+    - error: emitted instead of done if the turn fails
+    
+    The conversation is saved once, after the response is complete.
+    
+    Args:
+        request: Chat request with message and conversation context
+        
+    Returns:
+        text/event-stream response
+    """
+    logger.info(f"Received streaming message from user: {request.user_id}")
+    
+    is_new = not request.conversation_id
+    conversation, history = await _prepare_conversation(request, persist_new=False)
+    
+    async def events() -> AsyncIterator[str]:
+        cosmos_service = get_cosmos_service()
+        memory_service = get_memory_service()
+        orchestrator = get_orchestrator()
+        
+        yield _sse("conversation", {"conversation_id": conversation.id})
+        try:
+            result: Dict[str, Any] = {}
+            async for event in orchestrator.astream_query(
+                user_query=request.message,
+                user_id=request.user_id,
+                conversation_id=conversation.id,
+                conversation_history=history
+            ):
+                if event["event"] == "done":
+                    result = event["data"]
+                else:
+                    yield _sse(event["event"], event["data"])
+            
+            # Create assistant message
+            assistant_message = Message(
+                role=MessageRole.ASSISTANT,
+                content=result["response"],
+                metadata=result.get("metadata", {})
+            )
+            conversation.add_message(assistant_message)
+            
+            # Save the whole turn in a single write
+            if is_new:
+                await cosmos_service.create_conversation(conversation)
+            else:
+                await cosmos_service.update_conversation(conversation)
+            memory_service.add_message_to_memory(conversation.id, assistant_message)
+            
+            metadata = result.get("metadata", {})
+            yield _sse("done", {
+                "message": assistant_message.model_dump(mode="json"),
+                "suggestions": result.get("suggestions", []),
+                "conversation_id": conversation.id,
+                "context_used": metadata.get("response_metadata", {}).get("context_used", False),
+                "sources": metadata.get("sources", []),
+            })
+            logger.info(f"Successfully streamed message for conversation: {conversation.id}")
+            
+        except Exception as e:
+            logger.error(f"Error streaming message: {e}")
+            yield _sse("error", {"detail": "An error occurred while processing your message"})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/history/{conversation_id}", status_code=status.HTTP_200_OK)
 async def get_conversation_history(
     conversation_id: str,
@@ -236,8 +351,11 @@ async def delete_conversation(conversation_id: str, user_id: str):
                 detail="Conversation not found"
             )
         
-        # Mark as deleted
-        conversation.status = "deleted"
+        # Mark as deleted; Cosmos DB expires it once the retention window passes
+        if get_settings().retention_enabled:
+            get_retention_service().stamp_deleted_conversation(conversation)
+        else:
+            conversation.status = "deleted"
         await cosmos_service.update_conversation(conversation)
         
         # Remove from memory
@@ -3,7 +3,14 @@ Health check and system status endpoints.
 """
 from fastapi import APIRouter, status
 
-from src.services import get_cosmos_service
+from src.services import (
+    get_answer_cache,
+    get_cosmos_service,
+    get_warmup_service,
+    peek_cosmos_service,
+    peek_llm_service,
+    peek_rag_service,
+)
 from src.utils import get_logger, get_settings
 
 router = APIRouter(prefix="/health", tags=["health"])
@@ -45,15 +52,21 @@ async def readiness_check():
         except Exception as e:
             logger.error(f"Cosmos DB health check failed: {e}")
         
+        # Models and clients must be preloaded before taking traffic
+        warmup = get_warmup_service().status() if settings.warmup_enabled else None
+        warm = warmup is None or warmup["status"] == "ready"
+        
         # Overall readiness
-        ready = cosmos_healthy
+        ready = cosmos_healthy and warm
         
         return {
             "status": "ready" if ready else "not_ready",
             "checks": {
                 "cosmos_db": "healthy" if cosmos_healthy else "unhealthy",
+                "warmup": warmup["status"] if warmup else "disabled",
                 "configuration": "healthy"
-            }
+            },
+            "warmup": warmup
         }
         
     except Exception as e:
@@ -82,7 +95,8 @@ async def system_info():
             "openai": settings.openai_api_key != "",
             "azure-openai": settings.azure_openai_api_key != "",
             "google": settings.google_api_key != "",
-            "anthropic": settings.anthropic_api_key != ""
+            "anthropic": settings.anthropic_api_key != "",
+            "local-fake": True
         },
         "default_llm_provider": settings.default_llm_provider,
         "services": {
@@ -91,3 +105,26 @@ async def system_info():
             "rag_enabled": True
         }
     }
+
+
+@router.get("/metrics", status_code=status.HTTP_200_OK)
+async def service_metrics():
+    """
+    Get runtime metrics for the RAG executors, caches and request coalescing.
+    
+    Services that are not created yet report None: building them here would
+    load models and open connections on the event loop.
+    
+    Returns:
+        Queue depth, latency percentiles, cache hit rates and coalesced calls
+    """
+    settings = get_settings()
+    rag_service = peek_rag_service()
+    llm_service = peek_llm_service()
+    cosmos_service = peek_cosmos_service()
+    return {
+        "rag": rag_service.stats() if rag_service is not None else None,
+        "llm": llm_service.stats() if llm_service is not None else None,
+        "answer_cache": get_answer_cache().stats() if settings.answer_cache_enabled else None,
+        "cosmos": {"coalescing": cosmos_service.gold_flight.stats()} if cosmos_service is not None else None,
+    }
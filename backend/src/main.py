@@ -2,13 +2,14 @@
 Main FastAPI application entry point.
 """
 from contextlib import asynccontextmanager
+import asyncio
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from src.api import api_router
-from src.services import get_cosmos_service
+from src.services import get_cosmos_service, get_retention_service, get_warmup_service
 from src.utils import configure_logging, get_logger, get_settings
 
 
@@ -25,6 +26,7 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Data Analytics Chat Tool API...")
     settings = get_settings()
+    warmup_task = None
     
     try:
         # Initialize Cosmos DB service
@@ -32,6 +34,15 @@ async def lifespan(app: FastAPI):
         logger.info(f"Connected to Cosmos DB: {settings.cosmos_database_name}")
         logger.info("Cosmos DB containers initialized")
         
+        # Enable TTL on existing containers so retention runs in the background
+        if settings.retention_enabled:
+            get_retention_service().configure_containers(cosmos_service)
+        
+        # Preload models and clients in the background; /health/ready reports
+        # not_ready until they are warm
+        if settings.warmup_enabled:
+            warmup_task = asyncio.create_task(get_warmup_service().warm_up())
+        
         logger.info("Application startup complete")
         
     except Exception as e:
@@ -42,6 +53,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down Data Analytics Chat Tool API...")
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
     try:
         # Cleanup resources
         cosmos_service = get_cosmos_service()
@@ -1,4 +1,5 @@
 """Data models for the application."""
+from src.models.analysis import FollowUpSuggestions, QueryAnalysis
 from src.models.conversation import Conversation, ConversationCreate, ConversationResponse
 from src.models.message import Message, MessageCreate, MessageResponse, MessageRole
 from src.models.user import User, UserCreate, UserPreferences, UserResponse
@@ -15,4 +16,6 @@ __all__ = [
     "UserCreate",
     "UserResponse",
     "UserPreferences",
+    "QueryAnalysis",
+    "FollowUpSuggestions",
 ]
@@ -0,0 +1,38 @@
+"""
+Schemas for structured LLM output.
+"""
+from typing import List
+
+from pydantic import BaseModel, Field, field_validator
+
+
+class QueryAnalysis(BaseModel):
+    """Analysis of a user query."""
+
+    intent: str = Field(
+        description="What the user wants to do, e.g. analyze, compare, summarize, find trends"
+    )
+    entities: List[str] = Field(
+        default_factory=list,
+        description="Key entities mentioned, e.g. products, time periods, metrics, departments"
+    )
+    query_type: str = Field(
+        description="One of: analytical, informational, comparison, trend_analysis"
+    )
+    reformulated_query: str = Field(
+        description="A clear, standalone version of the query that includes conversation context"
+    )
+
+
+class FollowUpSuggestions(BaseModel):
+    """Follow-up questions suggested with a response."""
+
+    suggestions: List[str] = Field(
+        description="3-5 relevant follow-up questions the user might ask next"
+    )
+
+    @field_validator("suggestions")
+    @classmethod
+    def clean_suggestions(cls, suggestions: List[str]) -> List[str]:
+        """Drop empty suggestions and keep at most five."""
+        return [s.strip() for s in suggestions if s and s.strip()][:5]
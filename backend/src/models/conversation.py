@@ -31,6 +31,9 @@ class Conversation(BaseModel):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     metadata: Dict[str, Any] = Field(default_factory=dict)
     
+    # Seconds until Cosmos DB expires the item (set when the conversation is deleted)
+    ttl: Optional[int] = None
+    
     # Partition key for Cosmos DB
     partition_key: Optional[str] = None
     
@@ -56,6 +59,8 @@ class Conversation(BaseModel):
         data = self.model_dump()
         data["id"] = self.id
         data["partitionKey"] = self.user_id  # Use user_id as partition key
+        if data.get("ttl") is None:
+            data.pop("ttl", None)  # Cosmos DB rejects a null ttl
         return data
 
 
@@ -1,16 +1,38 @@
 """Service layer modules."""
-from src.services.cosmos_service import CosmosDBService, get_cosmos_service
-from src.services.llm_service import LLMService, get_llm_service
+from src.services.answer_cache import SemanticAnswerCache, get_answer_cache
+from src.services.cosmos_service import CosmosDBService, get_cosmos_service, peek_cosmos_service
+from src.services.llm_scheduler import LLMScheduler, get_llm_scheduler
+from src.services.llm_service import LLMService, get_llm_service, peek_llm_service
 from src.services.memory_service import MemoryService, get_memory_service
-from src.services.rag_service import RAGService, get_rag_service
+from src.services.query_guard import QueryAdmissionGuard, QueryRejectedError, get_query_guard
+from src.services.rag_service import RAGService, get_rag_service, peek_rag_service
+from src.services.response_cache import ResponseCache, get_response_cache
+from src.services.retention_service import RetentionService, get_retention_service
+from src.services.warmup_service import WarmupService, get_warmup_service
 
 __all__ = [
+    "SemanticAnswerCache",
+    "get_answer_cache",
     "CosmosDBService",
     "get_cosmos_service",
+    "peek_cosmos_service",
+    "LLMScheduler",
+    "get_llm_scheduler",
     "LLMService",
     "get_llm_service",
+    "peek_llm_service",
     "MemoryService",
     "get_memory_service",
+    "QueryAdmissionGuard",
+    "QueryRejectedError",
+    "get_query_guard",
     "RAGService",
     "get_rag_service",
+    "peek_rag_service",
+    "ResponseCache",
+    "get_response_cache",
+    "RetentionService",
+    "get_retention_service",
+    "WarmupService",
+    "get_warmup_service",
 ]
@@ -0,0 +1,338 @@
+"""
+Semantic answer cache for near-duplicate questions (query-cache tier).
+
+Answers are stored under the embedding of the reformulated query. A later
+question whose reformulation embeds above the similarity threshold gets the
+stored response and suggestions back without running retrieval, response
+generation or recommendations.
+
+Entries are scoped so answers never cross permission boundaries or go stale:
+
+- scope: users only see answers produced for the same role, department and
+  permission set
+- freshness: entries expire after a TTL and never outlive the UTC day they
+  were produced on, so relative dates ("yesterday") stay correct
+- key terms: each entry records the entities of the query analysis and the
+  numbers and periods in the reformulated query ("Q1", "2024", "last
+  month"); a hit requires the same key terms, since questions that differ
+  only in the period or figure embed almost identically
+- dependencies: each entry records the gold partitions (pkType|pkFilter) its
+  data came from; writes to a partition drop every answer that read it, and
+  answers built from cross-partition queries depend on all partitions
+
+The cache lives in process memory; each worker keeps its own.
+"""
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import re
+import threading
+import time
+import uuid
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from src.utils import LoggerMixin, settings
+
+# Dependency on every gold partition (cross-partition queries)
+ALL_PARTITIONS = "*"
+
+
+def partition_key(pk_type: Any, pk_filter: Any) -> str:
+    """Dependency key for a gold partition."""
+    return f"{pk_type}|{pk_filter}"
+
+
+def gold_partitions(records: Iterable[Dict[str, Any]]) -> Set[str]:
+    """Dependency keys for the partitions a set of gold records came from."""
+    return {
+        partition_key(record["pkType"], record.get("pkFilter"))
+        for record in records
+        if record.get("pkType") is not None
+    }
+
+
+_MONTHS = (
+    "january|february|march|april|may|june|july|august|september|october|november|december"
+    "|jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec"
+)
+_WEEKDAYS = "monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+# Numbers, quarters/halves/fiscal years, month and day names and relative periods
+_KEY_TERM = re.compile(
+    r"\d+(?:[.,:/-]\d+)*%?"
+    r"|\b(?:q[1-4]|h[12]|fy\d+)\b"
+    rf"|\b(?:{_MONTHS}|{_WEEKDAYS})\b"
+    r"|\b(?:yesterday|today|tomorrow|ytd|qtd|mtd|wtd)\b"
+    r"|\b(?:last|this|next|previous|prior|current)\s+(?:day|week|month|quarter|year)\b",
+    re.IGNORECASE
+)
+
+
+def key_terms(query: str, entities: Iterable[Any] = ()) -> List[str]:
+    """
+    Terms that must match for two questions to share an answer.
+
+    Args:
+        query: Reformulated query
+        entities: Entities from the query analysis
+
+    Returns:
+        Sorted normalized entities plus the numbers and periods in the query
+    """
+    terms = {" ".join(str(entity).lower().split()) for entity in entities}
+    terms.update(" ".join(match.lower().split()) for match in _KEY_TERM.findall(query))
+    terms.discard("")
+    return sorted(terms)
+
+
+def permission_scope(user: Any, user_id: str) -> str:
+    """
+    Scope key for the data a user is allowed to see.
+
+    Users with the same role, department and permissions share answers.
+    Unknown users get a private scope.
+
+    Args:
+        user: User model (or None if it could not be loaded)
+        user_id: User identifier
+
+    Returns:
+        Scope key
+    """
+    if user is None:
+        return f"user:{user_id}"
+    permissions = sorted((user.metadata or {}).get("permissions", []))
+    return f"role={user.role}|department={user.department or ''}|permissions={','.join(permissions)}"
+
+
+class CachedAnswer(BaseModel):
+    """An answer stored in the semantic cache."""
+
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    scope: str
+    query: str
+    key_terms: List[str] = Field(default_factory=list)
+    response: str
+    suggestions: List[str] = Field(default_factory=list)
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+    partitions: List[str] = Field(default_factory=list)
+    day: str
+    expires_at: float
+
+
+def _utc_day() -> str:
+    """Current UTC date."""
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class SemanticAnswerCache(LoggerMixin):
+    """Answers keyed by query embedding, scoped by permissions and data freshness."""
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.92,
+        ttl_seconds: int = 900,
+        max_entries: int = 5000
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            similarity_threshold: Minimum cosine similarity for a hit
+            ttl_seconds: Lifetime of an answer
+            max_entries: Maximum answers kept (least recently used are evicted)
+        """
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._by_scope: Dict[str, Set[str]] = {}
+        self._by_partition: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove_locked(self, entry_id: str) -> None:
+        """Drop one entry and its index references (caller holds the lock)."""
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        self._vectors.pop(entry_id, None)
+        scope_ids = self._by_scope.get(entry.scope)
+        if scope_ids is not None:
+            scope_ids.discard(entry_id)
+            if not scope_ids:
+                del self._by_scope[entry.scope]
+        for partition in entry.partitions:
+            partition_ids = self._by_partition.get(partition)
+            if partition_ids is not None:
+                partition_ids.discard(entry_id)
+                if not partition_ids:
+                    del self._by_partition[partition]
+
+    def lookup(
+        self,
+        scope: str,
+        vector: Sequence[float],
+        terms: Sequence[str] = ()
+    ) -> Optional[Tuple[CachedAnswer, float]]:
+        """
+        Find the closest fresh answer in a scope with the same key terms.
+
+        Args:
+            scope: Permission scope of the caller
+            vector: Embedding of the reformulated query
+            terms: Key terms of the query (see key_terms)
+
+        Returns:
+            (answer, similarity) for the best match above the threshold, or None
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        now = time.time()
+        today = _utc_day()
+        terms = sorted(terms)
+
+        with self._lock:
+            candidates = []
+            for entry_id in list(self._by_scope.get(scope, ())):
+                entry = self._entries[entry_id]
+                if entry.expires_at <= now or entry.day != today:
+                    self._remove_locked(entry_id)
+                elif entry.key_terms == terms:
+                    candidates.append(entry_id)
+
+            if candidates:
+                matrix = np.stack([self._vectors[entry_id] for entry_id in candidates])
+                similarities = matrix @ query
+                best = int(np.argmax(similarities))
+                similarity = float(similarities[best])
+                if similarity >= self.similarity_threshold:
+                    entry_id = candidates[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return self._entries[entry_id], similarity
+
+            self.misses += 1
+            return None
+
+    def store(
+        self,
+        scope: str,
+        query: str,
+        vector: Sequence[float],
+        response: str,
+        suggestions: List[str],
+        metadata: Dict[str, Any],
+        partitions: Iterable[str],
+        terms: Sequence[str] = ()
+    ) -> CachedAnswer:
+        """
+        Store an answer.
+
+        Args:
+            scope: Permission scope the answer was produced for
+            query: Reformulated query
+            vector: Embedding of the reformulated query
+            response: Generated response
+            suggestions: Follow-up suggestions
+            metadata: Response metadata returned to clients
+            partitions: Gold partitions the answer depended on
+            terms: Key terms of the query (see key_terms)
+
+        Returns:
+            The stored entry
+        """
+        entry = CachedAnswer(
+            scope=scope,
+            query=query,
+            key_terms=sorted(terms),
+            response=response,
+            suggestions=suggestions,
+            metadata=metadata,
+            partitions=sorted(set(partitions)),
+            day=_utc_day(),
+            expires_at=time.time() + self.ttl_seconds
+        )
+        normalized = np.asarray(vector, dtype=np.float32)
+        normalized = normalized / max(float(np.linalg.norm(normalized)), 1e-12)
+
+        with self._lock:
+            self._entries[entry.id] = entry
+            self._vectors[entry.id] = normalized
+            self._by_scope.setdefault(scope, set()).add(entry.id)
+            for partition in entry.partitions:
+                self._by_partition.setdefault(partition, set()).add(entry.id)
+            while len(self._entries) > self.max_entries:
+                self._remove_locked(next(iter(self._entries)))
+        return entry
+
+    def invalidate_partitions(self, partitions: Iterable[str]) -> int:
+        """
+        Drop answers that depended on any of the given gold partitions.
+
+        Answers built from cross-partition queries are dropped on any write.
+
+        Args:
+            partitions: Dependency keys from partition_key
+
+        Returns:
+            Number of answers dropped
+        """
+        partitions = set(partitions)
+        if not partitions:
+            return 0
+        with self._lock:
+            affected: Set[str] = set(self._by_partition.get(ALL_PARTITIONS, ()))
+            if ALL_PARTITIONS in partitions:
+                affected.update(self._entries)
+            for partition in partitions:
+                affected.update(self._by_partition.get(partition, ()))
+            for entry_id in affected:
+                self._remove_locked(entry_id)
+            self.invalidated += len(affected)
+
+        if affected:
+            self.logger.info(
+                f"Invalidated {len(affected)} cached answers for {len(partitions)} gold partitions"
+            )
+        return len(affected)
+
+    def clear(self) -> None:
+        """Drop all answers."""
+        with self._lock:
+            for entry_id in list(self._entries):
+                self._remove_locked(entry_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit statistics."""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "invalidated": self.invalidated,
+        }
+
+
+# Global cache instance
+_answer_cache: Optional[SemanticAnswerCache] = None
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """Get or create the semantic answer cache."""
+    global _answer_cache
+    if _answer_cache is None:
+        _answer_cache = SemanticAnswerCache(
+            similarity_threshold=settings.answer_cache_similarity_threshold,
+            ttl_seconds=settings.answer_cache_ttl_seconds,
+            max_entries=settings.answer_cache_max_entries
+        )
+    return _answer_cache
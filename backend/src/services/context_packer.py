@@ -0,0 +1,195 @@
+"""
+Token-budgeted RAG context packing.
+
+Retrieved chunks are reordered by maximal marginal relevance (MMR) over
+their embeddings, near-duplicates are dropped, and the text that adjacent
+chunks share through chunk overlap is emitted once. Chunks are then packed
+until the exact token budget is reached, counted with the LLM's tokenizer.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.utils import LoggerMixin
+from src.utils.tokenizer import TokenCounter
+
+# (id, text, score, metadata)
+Candidate = Tuple[str, str, float, Dict[str, Any]]
+
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+
+def strip_overlap(previous: str, current: str, max_overlap: int) -> str:
+    """
+    Remove the prefix of `current` that repeats the end of `previous`.
+
+    Args:
+        previous: Text of the preceding chunk
+        current: Text of the following chunk
+        max_overlap: Longest overlap to look for, in characters
+
+    Returns:
+        `current` without the repeated prefix
+    """
+    for size in range(min(max_overlap, len(previous), len(current)), 0, -1):
+        if previous.endswith(current[:size]):
+            return current[size:].lstrip()
+    return current
+
+
+class ContextPacker(LoggerMixin):
+    """Selects and packs retrieved chunks into a token budget."""
+
+    def __init__(
+        self,
+        token_counter: TokenCounter,
+        mmr_lambda: float = 0.7,
+        dedup_threshold: float = 0.95,
+        max_overlap: int = 200
+    ):
+        """
+        Initialize the packer.
+
+        Args:
+            token_counter: Tokenizer matching the LLM the context is sent to
+            mmr_lambda: Relevance weight in MMR (1.0 ignores diversity)
+            dedup_threshold: Cosine similarity above which a chunk counts as a duplicate
+            max_overlap: Longest chunk overlap to strip, in characters
+        """
+        self.token_counter = token_counter
+        self.mmr_lambda = mmr_lambda
+        self.dedup_threshold = dedup_threshold
+        self.max_overlap = max_overlap
+
+    def order(
+        self,
+        candidates: Sequence[Candidate],
+        query_vector: Optional[Sequence[float]] = None,
+        vectors: Optional[Sequence[Optional[Sequence[float]]]] = None
+    ) -> List[int]:
+        """
+        Order candidates by MMR, dropping near-duplicates.
+
+        Without vectors, candidates keep their retrieval order and only
+        exact duplicate texts are dropped.
+
+        Args:
+            candidates: Retrieved chunks, best first
+            query_vector: Query embedding
+            vectors: Chunk embeddings aligned with candidates
+
+        Returns:
+            Indexes into candidates, in packing order
+        """
+        if query_vector is None or vectors is None or any(v is None for v in vectors):
+            seen = set()
+            ordered = []
+            for i, (_, text, _, _) in enumerate(candidates):
+                if text not in seen:
+                    seen.add(text)
+                    ordered.append(i)
+            return ordered
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+
+        relevance = matrix @ query
+        similarity = matrix @ matrix.T
+        remaining = list(range(len(candidates)))
+        selected: List[int] = []
+
+        while remaining:
+            if selected:
+                redundancy = similarity[np.ix_(remaining, selected)].max(axis=1)
+            else:
+                redundancy = np.zeros(len(remaining), dtype=np.float32)
+
+            # Near-duplicates of something already selected are dropped outright
+            keep = redundancy < self.dedup_threshold
+            remaining = [i for i, k in zip(remaining, keep) if k]
+            redundancy = redundancy[keep]
+            if not remaining:
+                break
+
+            mmr = self.mmr_lambda * relevance[remaining] - (1 - self.mmr_lambda) * redundancy
+            best = remaining[int(np.argmax(mmr))]
+            selected.append(best)
+            remaining.remove(best)
+
+        return selected
+
+    def pack(
+        self,
+        candidates: Sequence[Candidate],
+        max_tokens: int,
+        query_vector: Optional[Sequence[float]] = None,
+        vectors: Optional[Sequence[Optional[Sequence[float]]]] = None,
+        max_chunks: Optional[int] = None
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Pack candidates into a context string within a token budget.
+
+        Args:
+            candidates: Retrieved chunks, best first
+            max_tokens: Token budget for the whole context, separators included
+            query_vector: Query embedding for MMR
+            vectors: Chunk embeddings aligned with candidates
+            max_chunks: Maximum number of chunks to include
+
+        Returns:
+            Tuple of (context string, source descriptions)
+        """
+        separator_tokens = self.token_counter.count(CONTEXT_SEPARATOR)
+        included: Dict[Tuple[Any, Any], str] = {}
+        parts: List[str] = []
+        sources: List[Dict[str, Any]] = []
+        used = 0
+        dropped = 0
+
+        for i in self.order(candidates, query_vector, vectors):
+            if max_chunks is not None and len(parts) >= max_chunks:
+                break
+
+            _, text, score, metadata = candidates[i]
+            source_id = metadata.get("source_id")
+            chunk_index = metadata.get("chunk_index")
+
+            # Adjacent chunks repeat the overlap; keep it only once
+            previous = included.get((source_id, chunk_index - 1)) if (
+                source_id is not None and isinstance(chunk_index, int)
+            ) else None
+            packed = strip_overlap(previous, text, self.max_overlap) if previous else text
+            if not packed.strip():
+                dropped += 1
+                continue
+
+            cost = self.token_counter.count(packed) + (separator_tokens if parts else 0)
+            if used + cost > max_tokens:
+                # A shorter chunk further down may still fit
+                dropped += 1
+                continue
+
+            used += cost
+            parts.append(packed)
+            if source_id is not None:
+                included[(source_id, chunk_index)] = text
+            sources.append({
+                "text": text[:200] + "..." if len(text) > 200 else text,
+                "score": float(score),
+                "metadata": metadata
+            })
+
+        # Tokens can merge across part boundaries; verify the joined text
+        while parts and self.token_counter.count(CONTEXT_SEPARATOR.join(parts)) > max_tokens:
+            parts.pop()
+            sources.pop()
+            dropped += 1
+        used = self.token_counter.count(CONTEXT_SEPARATOR.join(parts))
+
+        self.logger.info(
+            f"Packed {len(parts)} chunks into {used}/{max_tokens} tokens "
+            f"({self.token_counter.name}), skipped {dropped}"
+        )
+        return CONTEXT_SEPARATOR.join(parts), sources
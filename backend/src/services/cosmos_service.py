@@ -1,14 +1,31 @@
 """
 Azure Cosmos DB service for managing database operations.
 """
-from typing import Any, Dict, List, Optional
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from azure.cosmos import CosmosClient, PartitionKey, exceptions
 from azure.cosmos.container import ContainerProxy
 from azure.cosmos.database import DatabaseProxy
 
 from src.models import Conversation, User
-from src.utils import LoggerMixin, settings, CosmosBulkOperations
+from src.services.answer_cache import ALL_PARTITIONS, get_answer_cache, gold_partitions, partition_key
+from src.services.query_guard import AdmissionDecision, QueryRejectedError, get_query_guard
+from src.services.retention_service import get_retention_service
+from src.utils import (
+    LoggerMixin,
+    settings,
+    CosmosBulkOperations,
+    QueryStats,
+    ReadConsistency,
+    SessionTokenStore,
+    SingleFlight,
+    SlowQueryLog,
+    consistency_options,
+    flight_key,
+)
 
 
 class CosmosDBService(LoggerMixin):
@@ -22,6 +39,23 @@ class CosmosDBService(LoggerMixin):
         self.users_container: Optional[ContainerProxy] = None
         self.gold_container: Optional[ContainerProxy] = None
         
+        # Gold partitions are immutable history; conversations need read-your-writes
+        self.gold_consistency = ReadConsistency(settings.cosmos_gold_consistency)
+        self.conversation_consistency = ReadConsistency(settings.cosmos_conversation_consistency)
+        self.session_tokens = SessionTokenStore(settings.cosmos_session_token_store_path or None)
+        # Identical concurrent gold queries (e.g. a dashboard fan-out) share one request
+        self.gold_flight = SingleFlight("cosmos-gold")
+        
+        self.slow_query_log: Optional[SlowQueryLog] = None
+        if settings.slow_query_log_enabled:
+            self.slow_query_log = SlowQueryLog(
+                path=settings.slow_query_log_path,
+                latency_threshold_ms=settings.slow_query_latency_threshold_ms,
+                ru_threshold=settings.slow_query_ru_threshold,
+                max_bytes=settings.slow_query_log_max_bytes,
+                backup_count=settings.slow_query_log_backup_count
+            )
+        
         if settings.cosmos_endpoint and settings.cosmos_key:
             self._initialize()
     
@@ -45,7 +79,8 @@ class CosmosDBService(LoggerMixin):
             self.conversations_container = self.database.create_container_if_not_exists(
                 id=settings.cosmos_container_conversations,
                 partition_key=PartitionKey(path="/partitionKey"),
-                offer_throughput=400
+                offer_throughput=400,
+                default_ttl=-1  # TTL on, items expire only when they carry their own ttl
             )
             
             self.users_container = self.database.create_container_if_not_exists(
@@ -58,7 +93,8 @@ class CosmosDBService(LoggerMixin):
             self.gold_container = self.database.create_container_if_not_exists(
                 id=settings.cosmos_container_gold,
                 partition_key=PartitionKey(path=["/pkType", "/pkFilter"], kind="MultiHash"),
-                offer_throughput=400
+                offer_throughput=400,
+                default_ttl=-1  # Per-pkType retention is stamped on items
             )
             
             self.logger.info("Cosmos DB initialization successful")
@@ -72,7 +108,10 @@ class CosmosDBService(LoggerMixin):
         """Create a new conversation."""
         try:
             conversation_dict = conversation.to_cosmos_dict()
-            self.conversations_container.create_item(body=conversation_dict)
+            self.conversations_container.create_item(
+                body=conversation_dict,
+                response_hook=self.session_tokens.capture("conversations", conversation.user_id)
+            )
             self.logger.info(f"Created conversation: {conversation.id}")
             return conversation
         except exceptions.CosmosHttpResponseError as e:
@@ -84,7 +123,8 @@ class CosmosDBService(LoggerMixin):
         try:
             item = self.conversations_container.read_item(
                 item=conversation_id,
-                partition_key=user_id
+                partition_key=user_id,
+                **self._session_read_options("conversations", user_id)
             )
             return Conversation(**item)
         except exceptions.CosmosResourceNotFoundError:
@@ -98,7 +138,10 @@ class CosmosDBService(LoggerMixin):
         """Update an existing conversation."""
         try:
             conversation_dict = conversation.to_cosmos_dict()
-            self.conversations_container.upsert_item(body=conversation_dict)
+            self.conversations_container.upsert_item(
+                body=conversation_dict,
+                response_hook=self.session_tokens.capture("conversations", conversation.user_id)
+            )
             self.logger.info(f"Updated conversation: {conversation.id}")
             return conversation
         except Exception as e:
@@ -126,7 +169,8 @@ class CosmosDBService(LoggerMixin):
                 query=query,
                 parameters=parameters,
                 partition_key=user_id,
-                max_item_count=limit
+                max_item_count=limit,
+                **self._session_read_options("conversations", user_id)
             ))
             
             return [Conversation(**item) for item in items]
@@ -139,7 +183,10 @@ class CosmosDBService(LoggerMixin):
         """Create a new user."""
         try:
             user_dict = user.to_cosmos_dict()
-            self.users_container.create_item(body=user_dict)
+            self.users_container.create_item(
+                body=user_dict,
+                response_hook=self.session_tokens.capture("users", user.id)
+            )
             self.logger.info(f"Created user: {user.id}")
             return user
         except exceptions.CosmosHttpResponseError as e:
@@ -153,7 +200,8 @@ class CosmosDBService(LoggerMixin):
             try:
                 item = self.users_container.read_item(
                     item=user_id,
-                    partition_key=user_id
+                    partition_key=user_id,
+                    **self._session_read_options("users", user_id)
                 )
                 return User(**item)
             except exceptions.CosmosResourceNotFoundError:
@@ -200,7 +248,10 @@ class CosmosDBService(LoggerMixin):
         """Update an existing user."""
         try:
             user_dict = user.to_cosmos_dict()
-            self.users_container.upsert_item(body=user_dict)
+            self.users_container.upsert_item(
+                body=user_dict,
+                response_hook=self.session_tokens.capture("users", user.id)
+            )
             self.logger.info(f"Updated user: {user.id}")
             return user
         except Exception as e:
@@ -211,25 +262,176 @@ class CosmosDBService(LoggerMixin):
     async def query_gold_data(
         self, 
         query: str, 
-        parameters: Optional[List[Dict[str, Any]]] = None
+        parameters: Optional[List[Dict[str, Any]]] = None,
+        caller: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Execute a query against gold data."""
+        """
+        Execute a query against gold data.
+        
+        Args:
+            query: SQL query text
+            parameters: Query parameters
+            caller: Caller identity for ad-hoc queries ('api', 'tool:<name>', 'agent').
+                    When set, the query passes the admission guard before it runs
+                    and may be rejected or limited with TOP.
+            
+        Returns:
+            List of matching gold documents
+            
+        Raises:
+            QueryRejectedError: If the admission guard rejects the query
+        """
+        items, _ = await self.query_gold_data_with_decision(query, parameters, caller)
+        return items
+    
+    async def query_gold_data_with_decision(
+        self, 
+        query: str, 
+        parameters: Optional[List[Dict[str, Any]]] = None,
+        caller: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[AdmissionDecision]]:
+        """
+        Execute a query against gold data and report how the admission guard changed it.
+        
+        Args:
+            query: SQL query text
+            parameters: Query parameters
+            caller: Caller identity for ad-hoc queries (see query_gold_data)
+            
+        Returns:
+            (matching gold documents, admission decision or None if the guard did not run);
+            the decision holds the query actually executed and why it was limited or routed
+            
+        Raises:
+            QueryRejectedError: If the admission guard rejects the query
+        """
+        decision: Optional[AdmissionDecision] = None
         try:
+            guard = get_query_guard() if caller and settings.query_guard_enabled else None
+            if guard is not None:
+                decision = guard.admit(query, parameters, caller=caller)
+                query = decision.query
+            
             self.logger.info(f"Executing Cosmos DB query: {query}")
             if parameters:
                 self.logger.info(f"Query parameters: {parameters}")
             
-            items = list(self.gold_container.query_items(
-                query=query,
-                parameters=parameters or [],
-                enable_cross_partition_query=True
-            ))
+            async def run() -> List[Dict[str, Any]]:
+                items, stats = await asyncio.to_thread(
+                    self._query_items,
+                    self.gold_container,
+                    "gold",
+                    query=query,
+                    parameters=parameters or [],
+                    enable_cross_partition_query=True,
+                    **consistency_options(self.gold_consistency)
+                )
+                if guard is not None:
+                    guard.observe(query, parameters, stats.request_charge)
+                return items
+            
+            # Callers that join an in-flight query get their own copy of the list
+            items = await self.gold_flight.do(flight_key(query, parameters or []), run, share=list)
+            
             self.logger.info(f"Gold data query returned {len(items)} items")
-            return items
+            return items, decision
+        except QueryRejectedError:
+            raise
         except Exception as e:
             self.logger.error(f"Failed to query gold data: {e}")
             raise
+    
+    async def refresh_partition_catalog(self) -> int:
+        """
+        Refresh the partition catalog used by the query admission guard.
+        
+        Counts documents per (pkType, pkFilter) with a single GROUP BY query and
+        saves the result to settings.partition_catalog_path. This is a full scan,
+        so run it from maintenance jobs rather than request paths.
+        
+        Returns:
+            Number of partitions in the refreshed catalog
+        """
+        rows, _ = self._query_items(
+            self.gold_container,
+            "gold",
+            query=(
+                "SELECT c.pkType, c.pkFilter, COUNT(1) AS cnt FROM c "
+                "GROUP BY c.pkType, c.pkFilter"
+            ),
+            parameters=[],
+            enable_cross_partition_query=True,
+            **consistency_options(self.gold_consistency)
+        )
+        catalog = get_query_guard().catalog
+        catalog.update(rows)
+        catalog.save()
+        self.logger.info(f"Refreshed partition catalog with {len(rows)} partitions")
+        return len(rows)
 
+    def _query_items(
+        self,
+        container: ContainerProxy,
+        container_name: str,
+        query: str,
+        parameters: List[Dict[str, Any]],
+        **kwargs: Any
+    ) -> Tuple[List[Dict[str, Any]], QueryStats]:
+        """
+        Run a query page by page, collecting the response headers of every page.
+        
+        The request charge is always accumulated (it feeds the admission guard).
+        With the slow-query log enabled, query metrics and index utilization are
+        requested as well and the thresholds are checked once the query completes.
+        """
+        stats = QueryStats()
+        started = time.perf_counter()
+        items: List[Dict[str, Any]] = []
+        
+        if self.slow_query_log is not None:
+            kwargs.setdefault("populate_query_metrics", True)
+            kwargs.setdefault("populate_index_metrics", True)
+        
+        # Headers arrive through the hook of each backend fetch; the client's
+        # last_response_headers is shared and unsafe once queries run in threads
+        kwargs["response_hook"] = lambda headers, _: stats.add_page(headers)
+        pages = container.query_items(query=query, parameters=parameters, **kwargs).by_page()
+        for page in pages:
+            items.extend(page)
+        
+        duration_ms = (time.perf_counter() - started) * 1000
+        if self.slow_query_log is not None and self.slow_query_log.record(
+            container=container_name,
+            query=query,
+            parameters=parameters,
+            duration_ms=duration_ms,
+            item_count=len(items),
+            stats=stats
+        ):
+            self.logger.warning(
+                f"Slow query on {container_name}: {duration_ms:.0f} ms, "
+                f"{stats.request_charge:.1f} RU, {len(items)} items"
+            )
+        return items, stats
+    
+    def _invalidate_cached_answers(self, partitions: Iterable[str]) -> None:
+        """Drop cached answers that depended on gold partitions that were written."""
+        if settings.answer_cache_enabled:
+            get_answer_cache().invalidate_partitions(partitions)
+    
+    # Consistency helpers
+    def _session_read_options(self, container_name: str, user_id: str) -> Dict[str, Any]:
+        """
+        Build read options for per-user data (conversations, users).
+        
+        Sends the user's latest session token so a read right after a write
+        sees that write, even when it is served by another worker.
+        """
+        session_token = None
+        if self.conversation_consistency in (ReadConsistency.SESSION, ReadConsistency.DEFAULT):
+            session_token = self.session_tokens.get(container_name, user_id)
+        return consistency_options(self.conversation_consistency, session_token)
+    
     # Bulk operations
     def _get_container(self, container_name: str) -> ContainerProxy:
         """Get container by name."""
@@ -243,6 +445,63 @@ class CosmosDBService(LoggerMixin):
             raise ValueError(f"Invalid container name: {container_name}. Valid options: {list(containers.keys())}")
         return container
     
+    async def read_many(
+        self,
+        container_name: str,
+        item_ids: List[Tuple[str, Any]],
+        max_concurrency: Optional[int] = None,
+        consistency: Optional[ReadConsistency] = None,
+        user_id: Optional[str] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Read many items whose id and partition key are already known.
+        
+        Replaces loops of sequential read_item calls: ids are grouped by partition
+        and the partitions are read concurrently.
+        
+        Args:
+            container_name: Name of the container ('conversations', 'users', 'gold')
+            item_ids: List of (item_id, partition_key) tuples for single partition key,
+                      or List of (item_id, [pk1, pk2, ...]) for hierarchical partition keys
+            max_concurrency: Maximum partitions read in parallel
+                             (default: settings.cosmos_read_many_concurrency)
+            consistency: Read consistency (default: eventual for gold, the conversation
+                         consistency for per-user containers)
+            user_id: Owner of the items; required for 'conversations' and 'users', whose
+                     reads send the user's session token like get_conversation/get_user
+            
+        Returns:
+            Items in the same order as item_ids, with None for items that were not found
+            
+        Raises:
+            ValueError: If a per-user container is read without user_id
+        """
+        try:
+            container = self._get_container(container_name)
+            
+            if container_name == "gold":
+                request_options = consistency_options(consistency or self.gold_consistency)
+            elif user_id is None:
+                raise ValueError(
+                    f"read_many on '{container_name}' needs user_id to keep read-your-writes"
+                )
+            elif consistency is None:
+                request_options = self._session_read_options(container_name, user_id)
+            else:
+                request_options = consistency_options(
+                    consistency, self.session_tokens.get(container_name, user_id)
+                )
+            
+            return await CosmosBulkOperations.bulk_read_items(
+                container,
+                item_ids,
+                max_concurrency=max_concurrency or settings.cosmos_read_many_concurrency,
+                request_options=request_options
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to read items from {container_name}: {e}")
+            raise
+    
     async def bulk_create_items(
         self, 
         container_name: str, 
@@ -264,6 +523,8 @@ class CosmosDBService(LoggerMixin):
             # Determine partition key path based on container
             if container_name == 'gold':
                 partition_key_path = 'pkType,pkFilter'  # Hierarchical partition key
+                if settings.retention_enabled:
+                    items = get_retention_service().stamp_gold_items(items)
             else:
                 partition_key_path = 'partitionKey'  # Single partition key
             
@@ -272,6 +533,8 @@ class CosmosDBService(LoggerMixin):
                 items,
                 partition_key_path=partition_key_path
             )
+            if container_name == 'gold':
+                self._invalidate_cached_answers(gold_partitions(items))
             self.logger.info(f"Bulk created {len(result)} items in {container_name} container")
             return result
         except Exception as e:
@@ -299,6 +562,8 @@ class CosmosDBService(LoggerMixin):
             # Determine partition key path based on container
             if container_name == 'gold':
                 partition_key_path = 'pkType,pkFilter'  # Hierarchical partition key
+                if settings.retention_enabled:
+                    items = get_retention_service().stamp_gold_items(items)
             else:
                 partition_key_path = 'partitionKey'  # Single partition key
             
@@ -307,6 +572,8 @@ class CosmosDBService(LoggerMixin):
                 items,
                 partition_key_path=partition_key_path
             )
+            if container_name == 'gold':
+                self._invalidate_cached_answers(gold_partitions(items))
             self.logger.info(f"Bulk upserted {len(result)} items in {container_name} container")
             return result
         except Exception as e:
@@ -335,6 +602,11 @@ class CosmosDBService(LoggerMixin):
             # Note: bulk_delete_items receives item_ids with partition key values already,
             # so it doesn't need the partition_key_path parameter
             deleted_count = await CosmosBulkOperations.bulk_delete_items(container, item_ids)
+            if container_name == 'gold':
+                self._invalidate_cached_answers(
+                    partition_key(*pk) if isinstance(pk, (list, tuple)) and len(pk) == 2 else ALL_PARTITIONS
+                    for _, pk in item_ids
+                )
             self.logger.info(f"Bulk deleted {deleted_count} items from {container_name} container")
             return deleted_count
         except Exception as e:
@@ -344,11 +616,20 @@ class CosmosDBService(LoggerMixin):
 
 # Global service instance
 _cosmos_service: Optional[CosmosDBService] = None
+# Warm-up builds the agents (and this service) in a worker thread
+_cosmos_service_lock = threading.Lock()
 
 
 def get_cosmos_service() -> CosmosDBService:
     """Get or create Cosmos DB service instance."""
     global _cosmos_service
     if _cosmos_service is None:
-        _cosmos_service = CosmosDBService()
+        with _cosmos_service_lock:
+            if _cosmos_service is None:
+                _cosmos_service = CosmosDBService()
+    return _cosmos_service
+
+
+def peek_cosmos_service() -> Optional[CosmosDBService]:
+    """Get the Cosmos DB service instance if it was already created (never creates it)."""
     return _cosmos_service
@@ -0,0 +1,101 @@
+"""
+Embedding backends for the RAG service.
+
+All backends run the same sentence-transformers model; they differ in the
+inference runtime:
+
+- ``torch``: PyTorch on CPU (default)
+- ``onnx``: ONNX Runtime with the fp32 export of the model
+- ``onnx-int8``: ONNX Runtime with a dynamically int8-quantized export
+
+The ONNX backends need ``optimum[onnxruntime]`` installed.
+"""
+from typing import Any, Dict, Literal
+
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+EmbeddingBackend = Literal["torch", "onnx", "onnx-int8"]
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def embedding_cache_namespace(model_name: str, backend: str) -> str:
+    """
+    Get the model identifier used in embedding cache keys.
+
+    Quantized vectors differ slightly from the PyTorch ones, so each backend
+    gets its own key space; torch keeps the bare model name.
+    """
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+
+def _onnx_model_kwargs(backend: str, num_threads: int, onnx_int8_file: str) -> Dict[str, Any]:
+    """Build the ONNX Runtime loading options for sentence-transformers."""
+    import onnxruntime as ort
+
+    session_options = ort.SessionOptions()
+    session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if num_threads > 0:
+        session_options.intra_op_num_threads = num_threads
+        session_options.inter_op_num_threads = 1
+
+    model_kwargs: Dict[str, Any] = {
+        "provider": "CPUExecutionProvider",
+        "session_options": session_options,
+    }
+    if backend == "onnx-int8":
+        model_kwargs["file_name"] = onnx_int8_file
+    return model_kwargs
+
+
+def create_embeddings(
+    model_name: str,
+    backend: str = "torch",
+    normalize: bool = True,
+    num_threads: int = 0,
+    onnx_int8_file: str = "onnx/model_qint8_avx512_vnni.onnx"
+) -> HuggingFaceEmbeddings:
+    """
+    Create the embedding model for a backend.
+
+    Args:
+        model_name: sentence-transformers model name or local path
+        backend: One of 'torch', 'onnx', 'onnx-int8'
+        normalize: Whether to L2-normalize vectors
+        num_threads: Intra-op threads for inference (0 keeps the runtime default)
+        onnx_int8_file: Quantized ONNX file inside the model repository
+
+    Returns:
+        LangChain embeddings backed by the selected runtime
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unsupported embedding backend: {backend} (expected one of {EMBEDDING_BACKENDS})"
+        )
+
+    model_kwargs: Dict[str, Any] = {"device": "cpu"}
+    if backend == "torch":
+        if num_threads > 0:
+            import torch
+
+            # Process-wide setting; PyTorch has no per-model thread pool
+            torch.set_num_threads(num_threads)
+    else:
+        model_kwargs["backend"] = "onnx"
+        model_kwargs["model_kwargs"] = _onnx_model_kwargs(backend, num_threads, onnx_int8_file)
+
+    logger.info(
+        f"Loading embedding model {model_name} with {backend} backend"
+        + (f" ({num_threads} threads)" if num_threads > 0 else "")
+    )
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs=model_kwargs,
+        encode_kwargs={"normalize_embeddings": normalize}
+    )
@@ -0,0 +1,227 @@
+"""
+Content-hash keyed embedding cache for the RAG service.
+
+Wraps a LangChain ``Embeddings`` model with two tiers:
+
+- an in-memory LRU of recently used vectors
+- a SQLite file holding float32 vectors across restarts, capped at
+  ``disk_max_entries`` (the oldest writes are evicted first)
+
+Keys are derived from the model name, the normalization flag, the kind of
+input (document or query) and a SHA-256 of the text, so re-indexing the same
+documents or repeating a query skips model inference entirely.
+"""
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.utils import LoggerMixin
+
+# SQLite limits the number of host parameters per statement
+_SQLITE_BATCH = 500
+# Eviction trims the disk tier to this fraction of its cap, so it runs once per many writes
+_EVICT_TO = 0.9
+
+
+class CachedEmbeddings(Embeddings, LoggerMixin):
+    """Embeddings wrapper with an in-memory LRU tier in front of a SQLite tier."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        normalize: bool,
+        path: Optional[str] = None,
+        memory_size: int = 10000,
+        disk_max_entries: int = 100000
+    ):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            embeddings: Underlying embedding model
+            model_name: Model identifier, part of every cache key
+            normalize: Whether vectors are normalized, part of every cache key
+            path: SQLite file for the disk tier (None keeps the cache in memory only)
+            memory_size: Maximum number of vectors kept in the LRU tier
+            disk_max_entries: Maximum number of vectors kept in the SQLite tier
+                (0: unlimited)
+        """
+        self.embeddings = embeddings
+        self.namespace = f"{model_name}|normalize={normalize}"
+        self.memory_size = memory_size
+        self.disk_max_entries = disk_max_entries
+        # Rows in the SQLite tier (approximate: other workers may share the file)
+        self._disk_entries = 0
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    "key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+                )
+                self._conn.commit()
+                self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            except sqlite3.Error as e:
+                self.logger.warning(f"Embedding disk cache unavailable, using memory only: {e}")
+                self._conn = None
+
+    def _key(self, text: str, kind: str) -> str:
+        """Build the cache key for a text."""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.namespace}|{kind}|{digest}"
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        """Put a vector in the LRU tier (caller holds the lock)."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Look keys up in memory, then on disk."""
+        found: Dict[str, List[float]] = {}
+        missing: List[str] = []
+
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                else:
+                    missing.append(key)
+
+            if missing and self._conn is not None:
+                try:
+                    for i in range(0, len(missing), _SQLITE_BATCH):
+                        batch = missing[i:i + _SQLITE_BATCH]
+                        placeholders = ",".join("?" * len(batch))
+                        rows = self._conn.execute(
+                            f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                            batch
+                        ).fetchall()
+                        for key, blob in rows:
+                            vector = np.frombuffer(blob, dtype=np.float32).tolist()
+                            found[key] = vector
+                            self._remember(key, vector)
+                            self.disk_hits += 1
+                except sqlite3.Error as e:
+                    self.logger.warning(f"Embedding disk cache read failed: {e}")
+
+        return found
+
+    def _store(self, entries: List[Tuple[str, List[float]]]) -> None:
+        """Write freshly computed vectors to both tiers."""
+        with self._lock:
+            for key, vector in entries:
+                self._remember(key, vector)
+
+            if self._conn is not None:
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                        [
+                            (key, np.asarray(vector, dtype=np.float32).tobytes())
+                            for key, vector in entries
+                        ]
+                    )
+                    self._disk_entries += len(entries)
+                    if self.disk_max_entries and self._disk_entries > self.disk_max_entries:
+                        self._evict_locked()
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    self.logger.warning(f"Embedding disk cache write failed: {e}")
+
+    def _evict_locked(self) -> None:
+        """Trim the SQLite tier below its cap, oldest writes first (caller holds the lock)."""
+        # Replaced keys get a new rowid, so rowid order is write order
+        self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if self._disk_entries <= self.disk_max_entries:
+            return
+        excess = self._disk_entries - int(self.disk_max_entries * _EVICT_TO)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY rowid LIMIT ?)",
+            (excess,)
+        )
+        self._disk_entries -= excess
+        self.logger.info(f"Evicted {excess} vectors from the embedding disk cache")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed documents, computing only the texts not already cached.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One vector per text, in input order
+        """
+        keys = [self._key(text, "document") for text in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+
+        # Deduplicate misses so identical chunks in one batch are embedded once
+        pending: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in pending:
+                pending[key] = text
+
+        self.hits += len(texts) - len(pending)
+        self.misses += len(pending)
+
+        if pending:
+            vectors = self.embeddings.embed_documents(list(pending.values()))
+            computed = list(zip(pending.keys(), vectors))
+            self._store(computed)
+            found.update(computed)
+
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query, reusing the cached vector when available.
+
+        Args:
+            text: Query text
+
+        Returns:
+            Query vector
+        """
+        key = self._key(text, "query")
+        found = self._lookup([key])
+        if key in found:
+            self.hits += 1
+            return found[key]
+
+        self.misses += 1
+        vector = self.embeddings.embed_query(text)
+        self._store([(key, vector)])
+        return vector
+
+    def stats(self) -> Dict[str, float]:
+        """Get cache hit statistics."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": self._disk_entries,
+        }
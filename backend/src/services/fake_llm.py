@@ -0,0 +1,368 @@
+"""
+Deterministic local stand-in for a remote LLM provider.
+
+The ``local-fake`` provider answers from scripted rules or a response
+template instead of calling an API, with configurable latency, token rate
+and error injection. With a fixed seed the same workload produces the same
+latencies and failures, so tests and benchmarks can measure the pipeline's
+own overhead and concurrency behavior offline and without spend.
+
+Scripted rules are loaded from a JSON file (settings.local_fake_responses_path)
+holding a list of objects:
+
+- ``match``: regex searched in the last user message
+- ``system``: optional regex the system prompt must also match (targets one agent)
+- ``response``: reply text
+
+The first matching rule wins; otherwise the template is used, with
+``{query}`` and ``{model}`` replaced by the user's query (the last user
+message without a leading "... query:" instruction) and the model name.
+The default template ends with a ``<<<FOLLOW_UP>>>`` suggestions trailer,
+as fused mode asks of real models. Structured output the rules do not
+cover is a placeholder built from the user's query.
+Tokens are whitespace-delimited words, both for streaming chunks and for
+the reported usage.
+"""
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Type, get_origin
+import asyncio
+import json
+import math
+import random
+import re
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel, PrivateAttr, ValidationError
+
+from src.utils import get_logger, settings
+
+logger = get_logger(__name__)
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+DEFAULT_TEMPLATE = (
+    "This is a simulated answer to: {query}\n<<<FOLLOW_UP>>>\n"
+    '{"suggestions": ["How does this compare with the previous period?", '
+    '"Which segments drove the change?", "What is the trend over the last 12 months?"]}'
+)
+
+_TOKEN_PATTERN = re.compile(r"\s*\S+\s*|\s+")
+# Instruction wrapped around the user's query, e.g. "Analyze this query: ..."
+_QUERY_LABEL = re.compile(r"^[^\n:]*\bquery:\s*", re.IGNORECASE)
+# First option listed in a field description ("One of: a, b" / "e.g. a, b")
+_FIRST_OPTION = re.compile(r"(?:\bone of:|\be\.g\.)\s*([^,;.]+)", re.IGNORECASE)
+
+
+class FakeLLMError(RuntimeError):
+    """Injected provider failure."""
+
+    status_code = 500
+
+
+class FakeRateLimitError(FakeLLMError):
+    """Injected 429 (handled like a provider rate limit)."""
+
+    status_code = 429
+
+
+def _split_tokens(text: str) -> List[str]:
+    """Split text into word tokens that join back to the original text."""
+    return _TOKEN_PATTERN.findall(text)
+
+
+def _message_text(message: BaseMessage) -> str:
+    """Text content of a message."""
+    return message.content if isinstance(message.content, str) else str(message.content)
+
+
+def _last_user_message(messages: List[BaseMessage]) -> str:
+    """Text of the last user message."""
+    return next((_message_text(m) for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+
+
+def _user_query(messages: List[BaseMessage]) -> str:
+    """The user's query: the last user message without a leading instruction label."""
+    return _QUERY_LABEL.sub("", _last_user_message(messages), count=1).strip()
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that replies locally with simulated latency and failures."""
+
+    model: str = "local-fake"
+    # (match, system, response) rules, see the module docstring
+    responses: List[Dict[str, str]] = []
+    template: str = DEFAULT_TEMPLATE
+    # Time to first token
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    latency_distribution: str = "fixed"
+    # Output rate (0: the whole reply arrives with the first token)
+    tokens_per_second: float = 0.0
+    # Probability that a call fails with a provider error / a rate limit error
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    seed: Optional[int] = None
+
+    _rng: random.Random = PrivateAttr()
+    _calls: int = PrivateAttr(default=0)
+    _simulated_ms: Deque[float] = PrivateAttr(default_factory=lambda: deque(maxlen=10000))
+
+    def model_post_init(self, context: Any) -> None:
+        """Seed the random source used for latencies and injected errors."""
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unsupported latency distribution: {self.latency_distribution}")
+        self._rng = random.Random(self.seed)
+        super().model_post_init(context)
+
+    @property
+    def _llm_type(self) -> str:
+        return "local-fake"
+
+    @property
+    def calls(self) -> int:
+        """Calls made (including failed ones)."""
+        return self._calls
+
+    @property
+    def simulated_ms(self) -> List[float]:
+        """Recent simulated call durations (latency plus generation time)."""
+        return list(self._simulated_ms)
+
+    def reply(self, messages: List[BaseMessage]) -> str:
+        """
+        Reply text for a conversation.
+
+        Args:
+            messages: Request messages
+
+        Returns:
+            The first matching scripted response, or the filled-in template
+        """
+        message = _last_user_message(messages)
+        system = "\n".join(_message_text(m) for m in messages if isinstance(m, SystemMessage))
+        for rule in self.responses:
+            if re.search(rule.get("match", ""), message) and re.search(rule.get("system", ""), system):
+                return rule["response"]
+        return self.template.replace("{query}", _user_query(messages)).replace("{model}", self.model)
+
+    def sample_latency(self) -> float:
+        """Sample a time to first token in seconds."""
+        mean, jitter = self.latency_ms, self.latency_jitter_ms
+        if self.latency_distribution == "uniform":
+            value = self._rng.uniform(mean - jitter, mean + jitter)
+        elif self.latency_distribution == "normal":
+            value = self._rng.gauss(mean, jitter)
+        elif self.latency_distribution == "lognormal" and mean > 0:
+            # Parameters giving the configured mean and standard deviation
+            sigma2 = math.log1p((jitter / mean) ** 2)
+            value = self._rng.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+        else:
+            value = mean
+        return max(0.0, value) / 1000
+
+    def _start_call(self, tokens: int) -> List[float]:
+        """
+        Count a call, inject failures and plan its timing.
+
+        Args:
+            tokens: Output tokens of the reply
+
+        Returns:
+            Delay before the first token, then the delay before each later token
+        """
+        self._calls += 1
+        draw = self._rng.random()
+        if draw < self.rate_limit_rate:
+            raise FakeRateLimitError(f"{self.model}: simulated rate limit")
+        if draw < self.rate_limit_rate + self.error_rate:
+            raise FakeLLMError(f"{self.model}: simulated provider error")
+        per_token = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        delays = [self.sample_latency()] + [per_token] * max(0, tokens - 1)
+        self._simulated_ms.append(sum(delays) * 1000)
+        return delays
+
+    def _result(self, messages: List[BaseMessage], text: str) -> AIMessage:
+        """Reply message with word-token usage."""
+        return AIMessage(content=text, usage_metadata=self._usage(messages, text))
+
+    def _usage(self, messages: List[BaseMessage], text: str) -> Dict[str, int]:
+        """Usage metadata counting word tokens."""
+        input_tokens = sum(len(_split_tokens(_message_text(m))) for m in messages)
+        output_tokens = len(_split_tokens(text))
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        text = self.reply(messages)
+        time.sleep(sum(self._start_call(len(_split_tokens(text)))))
+        return ChatResult(generations=[ChatGeneration(message=self._result(messages, text))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        text = self.reply(messages)
+        await asyncio.sleep(sum(self._start_call(len(_split_tokens(text)))))
+        return ChatResult(generations=[ChatGeneration(message=self._result(messages, text))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        text = self.reply(messages)
+        tokens = _split_tokens(text) or [""]
+        for token, delay in zip(tokens, self._start_call(len(tokens))):
+            time.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=self._usage(messages, text))
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        text = self.reply(messages)
+        tokens = _split_tokens(text) or [""]
+        for token, delay in zip(tokens, self._start_call(len(tokens))):
+            await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+        # Usage arrives with a final empty chunk, as with OpenAI's stream usage
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=self._usage(messages, text))
+        )
+
+    def with_structured_output(
+        self,
+        schema: Type[BaseModel],
+        *,
+        include_raw: bool = False,
+        **kwargs: Any
+    ) -> RunnableLambda:
+        """
+        Structured output: a scripted reply parsed as the schema, or a placeholder instance.
+
+        Args:
+            schema: Pydantic model to return
+            include_raw: Return {"raw", "parsed", "parsing_error"} instead of the parsed model
+
+        Returns:
+            Runnable taking the request messages
+        """
+        async def invoke(messages: List[BaseMessage]) -> Any:
+            text = self.reply(messages)
+            parsed: Optional[BaseModel] = None
+            error: Optional[Exception] = None
+            try:
+                parsed = schema.model_validate_json(text)
+            except ValidationError:
+                try:
+                    parsed = _placeholder(schema, _user_query(messages))
+                    text = parsed.model_dump_json()
+                except ValidationError as e:
+                    error = e
+            await asyncio.sleep(sum(self._start_call(len(_split_tokens(text)))))
+            if not include_raw:
+                if error is not None:
+                    raise error
+                return parsed
+            return {"raw": self._result(messages, text), "parsed": parsed, "parsing_error": error}
+
+        return RunnableLambda(invoke)
+
+
+def _placeholder(schema: Type[BaseModel], query: str) -> BaseModel:
+    """
+    Schema instance built from the user's query.
+
+    Required string fields take the first option their description lists
+    ("One of: analytical, ..." gives "analytical"), or the query itself;
+    required lists are empty.
+
+    Args:
+        schema: Pydantic model to instantiate
+        query: The user's query
+
+    Returns:
+        Placeholder instance
+    """
+    values: Dict[str, Any] = {}
+    for name, field in schema.model_fields.items():
+        if not field.is_required():
+            continue
+        if field.annotation is str:
+            option = _FIRST_OPTION.search(field.description or "")
+            values[name] = option.group(1).strip() if option else query
+        elif get_origin(field.annotation) is list:
+            values[name] = []
+    return schema.model_validate(values)
+
+
+def load_responses(path: str) -> List[Dict[str, str]]:
+    """
+    Load scripted response rules.
+
+    Args:
+        path: JSON file with a list of rules (empty: no rules)
+
+    Returns:
+        Rules in file order
+    """
+    if not path:
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    if not isinstance(rules, list) or not all(isinstance(r, dict) and "response" in r for r in rules):
+        raise ValueError(f"{path}: expected a list of objects with a 'response' field")
+    return rules
+
+
+def create_fake_chat_model(model: str) -> FakeChatModel:
+    """
+    Create a local fake model from settings.
+
+    Args:
+        model: Model name (reported in usage and available to the template)
+
+    Returns:
+        Configured fake model
+    """
+    fake = FakeChatModel(
+        model=model,
+        responses=load_responses(settings.local_fake_responses_path),
+        template=settings.local_fake_template,
+        latency_ms=settings.local_fake_latency_ms,
+        latency_jitter_ms=settings.local_fake_latency_jitter_ms,
+        latency_distribution=settings.local_fake_latency_distribution,
+        tokens_per_second=settings.local_fake_tokens_per_second,
+        error_rate=settings.local_fake_error_rate,
+        rate_limit_rate=settings.local_fake_rate_limit_rate,
+        seed=settings.local_fake_seed,
+    )
+    logger.info(
+        f"Local fake LLM {model}: {len(fake.responses)} scripted responses, "
+        f"{fake.latency_distribution} latency {fake.latency_ms}±{fake.latency_jitter_ms} ms"
+    )
+    return fake
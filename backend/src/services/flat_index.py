@@ -0,0 +1,523 @@
+"""
+Exact flat vector index backed by a memory-mapped NumPy matrix.
+
+An alternative to Chroma for knowledge bases of up to ~100k chunks:
+
+- normalized float32 embeddings live in a memory-mapped matrix (``vectors.f32``)
+- chunk texts and metadata are appended to a JSON-lines log (``records.log``);
+  texts stay on disk and are read by offset, only ids and metadata (needed
+  for filtering) are kept in memory
+- a write appends one line per chunk, so indexing in batches costs O(batch);
+  the log is compacted once superseded entries outnumber live ones
+- upserts write vectors before their records; deletes log first, then move
+  rows and log a ``moved`` acknowledgement, and a delete interrupted before
+  the acknowledgement has its row moves redone when the index is reopened
+- top-k is one matrix-vector product plus ``argpartition``, after a
+  vectorized metadata pre-filter
+
+Results are exact and deterministic (ties break on row order). The index
+exposes the subset of the Chroma collection API the RAG service uses
+(``upsert``, ``get``, ``delete``, ``count``), so the indexing pipeline and
+lexical index work with either store.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from src.utils import LoggerMixin
+from src.utils.metadata_filter import matches_where
+
+_INITIAL_CAPACITY = 1024
+# Compact the log when it holds more than this many entries per live chunk...
+_COMPACT_RATIO = 2
+# ...and at least this many entries in total
+_COMPACT_MIN_ENTRIES = 10000
+
+
+class FlatVectorIndex(LoggerMixin):
+    """Exact inner-product index over normalized vectors."""
+
+    def __init__(self, path: str):
+        """
+        Open or create the index.
+
+        Args:
+            path: Directory holding vectors.f32, index.json and records.log
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.path / "vectors.f32"
+        self._header_path = self.path / "index.json"
+        self._log_path = self.path / "records.log"
+        self._lock = threading.RLock()
+
+        self.dim: Optional[int] = None
+        self._capacity = 0
+        self._vectors: Optional[np.memmap] = None
+        self._ids: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        # Byte offset of each row's current record in the log
+        self._offsets: List[int] = []
+        self._rows: Dict[str, int] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+        self._log_entries = 0
+
+        legacy_path = self.path / "records.json"
+        if self._header_path.exists():
+            with open(self._header_path, "r", encoding="utf-8") as f:
+                header = json.load(f)
+            self._open_vectors(header["dim"], header["capacity"])
+            self._replay()
+            self.logger.info(f"Opened flat index with {len(self._ids)} vectors")
+        elif legacy_path.exists():
+            self._migrate(legacy_path)
+
+    def count(self) -> int:
+        """Number of stored vectors."""
+        return len(self._ids)
+
+    def _open_vectors(self, dim: int, capacity: int) -> None:
+        """Map the vector file."""
+        self.dim = dim
+        self._capacity = capacity
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, dim)
+        )
+
+    def _save_header(self) -> None:
+        """Atomically write the dimension and capacity (changes only when the matrix grows)."""
+        tmp_path = self._header_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "capacity": self._capacity}, f)
+        os.replace(tmp_path, self._header_path)
+
+    def _ensure_capacity(self, rows: int, dim: int) -> None:
+        """Grow the memory-mapped matrix to hold at least `rows` rows."""
+        if self.dim is None:
+            self.dim = dim
+        elif dim != self.dim:
+            raise ValueError(f"Embedding dimension {dim} does not match index dimension {self.dim}")
+
+        if rows <= self._capacity:
+            return
+
+        capacity = max(_INITIAL_CAPACITY, self._capacity)
+        while capacity < rows:
+            capacity *= 2
+
+        if self._vectors is not None:
+            self._vectors.flush()
+            del self._vectors
+        # Extending the file keeps existing rows; new space reads as zeros
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._open_vectors(self.dim, capacity)
+        self._save_header()
+
+    # Record log
+
+    def _replay(self) -> None:
+        """Rebuild ids, metadata and text offsets from the log."""
+        if not self._log_path.exists():
+            return
+        offset = 0
+        # Row moves of a delete not yet acknowledged by a "moved" entry
+        pending: List[Tuple[int, int]] = []
+        with open(self._log_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                pending = self._apply(entry, offset)
+                offset += len(line)
+                self._log_entries += 1
+        if offset < self._log_path.stat().st_size:
+            # A write interrupted mid-line; drop the torn tail
+            self.logger.warning(f"Truncating incomplete record at offset {offset} in {self._log_path}")
+            with open(self._log_path, "r+b") as f:
+                f.truncate(offset)
+        if pending:
+            # The last delete may have stopped before moving its vectors. Nothing was
+            # written after it, so the source rows are intact and repeating the moves is safe
+            self.logger.warning(f"Completing interrupted delete of {len(pending)} rows in {self.path}")
+            for source, target in pending:
+                self._vectors[target] = self._vectors[source]
+            self._vectors.flush()
+            self._append([{"op": "moved"}])
+
+    def _apply(self, entry: Dict[str, Any], offset: int) -> List[Tuple[int, int]]:
+        """
+        Apply one log entry to the in-memory state.
+
+        Vectors are not touched: upserts write them before logging, and
+        deletes move them after logging (see _replay).
+
+        Returns:
+            (source, target) row moves of a delete entry, otherwise empty
+        """
+        moves: List[Tuple[int, int]] = []
+        if entry["op"] == "put":
+            row = self._rows.get(entry["id"])
+            if row is None:
+                self._rows[entry["id"]] = len(self._ids)
+                self._ids.append(entry["id"])
+                self._metadatas.append(entry["metadata"])
+                self._offsets.append(offset)
+            else:
+                self._metadatas[row] = entry["metadata"]
+                self._offsets[row] = offset
+        elif entry["op"] == "del":
+            for chunk_id in entry["ids"]:
+                move = self._remove_row(self._rows[chunk_id], move_vector=False)
+                if move is not None:
+                    moves.append(move)
+        return moves
+
+    def _append(self, entries: List[Dict[str, Any]]) -> List[int]:
+        """
+        Append entries to the log.
+
+        Returns:
+            Byte offset of each entry
+        """
+        offsets = []
+        lines = []
+        with open(self._log_path, "ab") as f:
+            offset = f.seek(0, os.SEEK_END)
+            for entry in entries:
+                line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+                offsets.append(offset)
+                offset += len(line)
+                lines.append(line)
+            f.write(b"".join(lines))
+        self._log_entries += len(entries)
+        return offsets
+
+    def _read_documents(self, rows: List[int]) -> List[str]:
+        """Read chunk texts from the log."""
+        if not rows:
+            return []
+        documents = []
+        with open(self._log_path, "rb") as f:
+            for row in rows:
+                f.seek(self._offsets[row])
+                documents.append(json.loads(f.readline())["document"])
+        return documents
+
+    def compact(self) -> None:
+        """Rewrite the log with only the current record of each chunk."""
+        with self._lock:
+            tmp_path = self._log_path.with_suffix(".tmp")
+            offsets = []
+            offset = 0
+            with open(self._log_path, "rb") as source, open(tmp_path, "wb") as target:
+                for row in range(len(self._ids)):
+                    source.seek(self._offsets[row])
+                    line = source.readline()
+                    target.write(line)
+                    offsets.append(offset)
+                    offset += len(line)
+            os.replace(tmp_path, self._log_path)
+            self._offsets = offsets
+            self._log_entries = len(offsets)
+            self.logger.info(f"Compacted flat index log to {len(offsets)} records")
+
+    def _maybe_compact(self) -> None:
+        """Compact once superseded entries dominate the log."""
+        if self._log_entries > max(_COMPACT_MIN_ENTRIES, _COMPACT_RATIO * len(self._ids)):
+            self.compact()
+
+    def _migrate(self, legacy_path: Path) -> None:
+        """Convert an index saved as a single records.json file to the log format."""
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        self._open_vectors(records["dim"], records["capacity"])
+        entries = [
+            {"op": "put", "id": chunk_id, "document": document, "metadata": metadata}
+            for chunk_id, document, metadata in zip(
+                records["ids"], records["documents"], records["metadatas"]
+            )
+        ]
+        for entry, offset in zip(entries, self._append(entries)):
+            self._apply(entry, offset)
+        self._save_header()
+        legacy_path.unlink()
+        self.logger.info(f"Migrated flat index with {len(self._ids)} vectors to the record log")
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: Optional[List[Optional[Dict[str, Any]]]] = None
+    ) -> None:
+        """
+        Insert or replace vectors.
+
+        Args:
+            ids: Chunk IDs
+            embeddings: Vectors (normalized on write)
+            documents: Chunk texts
+            metadatas: Chunk metadata
+        """
+        if not ids:
+            return
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            # New ids take rows at the end in first-seen order, as _apply assigns them
+            rows = dict(self._rows)
+            for chunk_id in ids:
+                rows.setdefault(chunk_id, len(rows))
+            self._ensure_capacity(len(rows), matrix.shape[1])
+
+            entries = []
+            for i, chunk_id in enumerate(ids):
+                self._vectors[rows[chunk_id]] = matrix[i]
+                entries.append({
+                    "op": "put",
+                    "id": chunk_id,
+                    "document": documents[i],
+                    "metadata": (metadatas[i] if metadatas else None) or {},
+                })
+            # Vectors reach disk before the records that refer to them
+            self._vectors.flush()
+            for entry, offset in zip(entries, self._append(entries)):
+                self._apply(entry, offset)
+
+            self._columns.clear()
+            self._maybe_compact()
+
+    def _rows_matching(self, where: Optional[Dict[str, Any]]) -> List[int]:
+        """Row numbers whose metadata matches a filter."""
+        mask = self._mask(where)
+        return list(range(len(self._ids))) if mask is None else np.flatnonzero(mask).tolist()
+
+    def _remove_row(self, row: int, move_vector: bool = True) -> Optional[Tuple[int, int]]:
+        """
+        Remove a row by moving the last row into its slot.
+
+        Returns:
+            (source, target) rows of the move, or None if the last row was removed
+        """
+        last = len(self._ids) - 1
+        removed_id = self._ids[row]
+        move = None
+        if row != last:
+            move = (last, row)
+            if move_vector:
+                self._vectors[row] = self._vectors[last]
+            self._ids[row] = self._ids[last]
+            self._metadatas[row] = self._metadatas[last]
+            self._offsets[row] = self._offsets[last]
+            self._rows[self._ids[row]] = row
+        self._ids.pop()
+        self._metadatas.pop()
+        self._offsets.pop()
+        del self._rows[removed_id]
+        return move
+
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Delete vectors by id and/or metadata filter.
+
+        Rows are compacted by moving the last row into each freed slot.
+
+        Args:
+            ids: Chunk IDs to delete
+            where: Chroma-style metadata filter
+        """
+        with self._lock:
+            rows = {self._rows[chunk_id] for chunk_id in ids or [] if chunk_id in self._rows}
+            if where:
+                matching = set(self._rows_matching(where))
+                rows = rows & matching if ids else matching
+            if not rows:
+                return
+
+            # Highest rows first so moved rows are never ones still to delete;
+            # replaying the ids in this order reproduces the same moves
+            removed = [self._ids[row] for row in sorted(rows, reverse=True)]
+            # Log before moving vectors, so a crash in between is redone on open
+            self._append([{"op": "del", "ids": removed}])
+            for chunk_id in removed:
+                self._remove_row(self._rows[chunk_id])
+            self._vectors.flush()
+            self._append([{"op": "moved"}])
+
+            self._columns.clear()
+            self._maybe_compact()
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        include: Optional[List[str]] = None
+    ) -> Dict[str, List[Any]]:
+        """
+        Get stored chunks, like Chroma's collection.get.
+
+        Args:
+            ids: Chunk IDs to fetch (missing ids are skipped)
+            where: Chroma-style metadata filter
+            limit: Maximum chunks to return
+            offset: Chunks to skip
+            include: Add "embeddings" to also return the stored vectors;
+                documents and metadatas are always returned
+
+        Returns:
+            Dict with ids, documents and metadatas lists (and embeddings)
+        """
+        with self._lock:
+            if ids is not None:
+                rows = [self._rows[chunk_id] for chunk_id in ids if chunk_id in self._rows]
+                if where:
+                    rows = [row for row in rows if matches_where(self._metadatas[row], where)]
+            else:
+                rows = self._rows_matching(where)
+            end = None if limit is None else offset + limit
+            rows = rows[offset:end]
+            result = {
+                "ids": [self._ids[row] for row in rows],
+                "documents": self._read_documents(rows),
+                "metadatas": [self._metadatas[row] for row in rows],
+            }
+            if include and "embeddings" in include:
+                result["embeddings"] = [self._vectors[row].tolist() for row in rows]
+            return result
+
+    def _column(self, key: str) -> np.ndarray:
+        """Metadata values for one key as an object array (cached until the next write)."""
+        column = self._columns.get(key)
+        if column is None:
+            column = np.empty(len(self._metadatas), dtype=object)
+            column[:] = [metadata.get(key) for metadata in self._metadatas]
+            self._columns[key] = column
+        return column
+
+    def _numeric_column(self, key: str) -> np.ndarray:
+        """Metadata values for one key as float64 (NaN where not numeric)."""
+        cache_key = f"{key}\x00numeric"
+        column = self._columns.get(cache_key)
+        if column is None:
+            column = np.array([
+                float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
+                for value in self._column(key)
+            ], dtype=np.float64)
+            self._columns[cache_key] = column
+        return column
+
+    def _condition_mask(self, key: str, operator: str, operand: Any) -> np.ndarray:
+        """Vectorized mask for one field comparison."""
+        if operator in ("$eq", "$ne"):
+            mask = np.asarray(self._column(key) == operand, dtype=bool)
+            return ~mask if operator == "$ne" else mask
+        if operator in ("$in", "$nin"):
+            values = set(operand)
+            column = self._column(key)
+            mask = np.fromiter((value in values for value in column), dtype=bool, count=len(column))
+            return ~mask if operator == "$nin" else mask
+        if operator in ("$gt", "$gte", "$lt", "$lte") and isinstance(operand, (int, float)):
+            column = self._numeric_column(key)
+            with np.errstate(invalid="ignore"):
+                if operator == "$gt":
+                    return column > operand
+                if operator == "$gte":
+                    return column >= operand
+                if operator == "$lt":
+                    return column < operand
+                return column <= operand
+        # Anything else (string ranges, unknown operators) is evaluated per row
+        return np.array(
+            [matches_where(metadata, {key: {operator: operand}}) for metadata in self._metadatas],
+            dtype=bool
+        )
+
+    def _mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Vectorized row mask for a where filter (None when unfiltered)."""
+        if not where:
+            return None
+
+        mask = np.ones(len(self._ids), dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    clause_mask = self._mask(clause)
+                    if clause_mask is not None:
+                        mask &= clause_mask
+            elif key == "$or":
+                any_mask = np.zeros(len(self._ids), dtype=bool)
+                for clause in condition:
+                    clause_mask = self._mask(clause)
+                    any_mask |= True if clause_mask is None else clause_mask
+                mask &= any_mask
+            elif isinstance(condition, dict):
+                for operator, operand in condition.items():
+                    mask &= self._condition_mask(key, operator, operand)
+            else:
+                mask &= self._condition_mask(key, "$eq", condition)
+        return mask
+
+    def query(
+        self,
+        vector: List[float],
+        k: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, str, float, Dict[str, Any]]]:
+        """
+        Exact top-k search by cosine similarity.
+
+        Args:
+            vector: Query vector
+            k: Number of results
+            where: Optional Chroma-style metadata pre-filter
+
+        Returns:
+            List of (id, text, score, metadata), best first
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        with self._lock:
+            count = len(self._ids)
+            if count == 0 or k <= 0:
+                return []
+
+            scores = self._vectors[:count] @ query
+            mask = self._mask(where)
+            if mask is not None:
+                candidates = np.flatnonzero(mask)
+                if candidates.size == 0:
+                    return []
+                scores = scores[candidates]
+            else:
+                candidates = None
+
+            top = min(k, scores.shape[0])
+            best = np.argpartition(-scores, top - 1)[:top]
+            # Sort by score, then by row for deterministic ties
+            best = best[np.lexsort((best, -scores[best]))]
+            rows = best if candidates is None else candidates[best]
+
+            documents = self._read_documents(rows.tolist())
+            return [
+                (self._ids[row], document, float(scores[i]), self._metadatas[row])
+                for i, row, document in zip(best, rows, documents)
+            ]
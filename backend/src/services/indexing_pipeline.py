@@ -0,0 +1,276 @@
+"""
+Batched indexing pipeline for the RAG vector store.
+
+Keeps CPU-bound work off the event loop:
+
+- chunking runs in a process pool for large batches (in a thread otherwise)
+- embedding runs in fixed-size batches on a dedicated thread pool
+- vectors are written to Chroma in bulk, overlapping with the next embedding batch
+
+Chunk ids are content-addressed (source id, chunk index, text hash), so
+re-indexing a document only embeds and writes its changed chunks and
+removes the chunks that no longer exist.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import multiprocessing
+
+from langchain_core.embeddings import Embeddings
+from pydantic import BaseModel
+
+from src.utils import BoundedExecutor, LoggerMixin, settings
+from src.services.lexical_index import BM25Index
+from src.utils.text_chunking import chunk_id, source_id_for, split_texts, text_hash
+
+# Ids per source lookup, below SQLite's host parameter limit
+_LOOKUP_BATCH = 500
+
+
+class IndexingProgress(BaseModel):
+    """Progress of one indexing run."""
+
+    documents: int
+    chunks: int = 0
+    unchanged: int = 0
+    embedded: int = 0
+    written: int = 0
+    deleted: int = 0
+
+    @property
+    def done(self) -> bool:
+        """Whether every new or changed chunk has been written."""
+        return self.written >= self.chunks - self.unchanged
+
+
+ProgressCallback = Callable[[IndexingProgress], None]
+
+
+class IndexingPipeline(LoggerMixin):
+    """Chunk, embed and write documents to a Chroma collection in batches."""
+
+    def __init__(self, embeddings: Embeddings, collection: Any):
+        """
+        Initialize the indexing pipeline.
+
+        Args:
+            embeddings: Embedding model used for documents
+            collection: Chroma collection the vectors are written to
+        """
+        self.embeddings = embeddings
+        self.collection = collection
+        self.chunk_size = settings.rag_chunk_size
+        self.chunk_overlap = settings.rag_chunk_overlap
+        self.chunking_workers = settings.rag_chunking_workers
+        self.process_min_chars = settings.rag_chunking_process_min_chars
+        self.embedding_batch_size = max(1, settings.rag_embedding_batch_size)
+        self.write_batch_size = max(self.embedding_batch_size, settings.rag_index_write_batch_size)
+
+        # Kept in sync with every write when hybrid retrieval is enabled
+        self.lexical_index: Optional[BM25Index] = None
+        self.embedding_executor = BoundedExecutor("rag-embed", settings.rag_embedding_workers)
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """Create the chunking process pool on first use."""
+        if self._process_pool is None:
+            # spawn avoids forking a process that already runs executor threads
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.chunking_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._process_pool
+
+    async def chunk(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+        """
+        Split texts into chunks off the event loop.
+
+        Each chunk's metadata gets source_id, chunk_index and content_hash.
+
+        Args:
+            texts: Texts to split
+            metadatas: Optional metadata for each text
+
+        Returns:
+            Tuple of (chunk ids, chunks, chunk metadatas)
+        """
+        total_chars = sum(len(text) for text in texts)
+
+        if self.chunking_workers > 0 and len(texts) > 1 and total_chars >= self.process_min_chars:
+            loop = asyncio.get_running_loop()
+            pool = self._get_process_pool()
+            step = -(-len(texts) // self.chunking_workers)
+            parts = await asyncio.gather(*[
+                loop.run_in_executor(
+                    pool, split_texts, texts[i:i + step], self.chunk_size, self.chunk_overlap
+                )
+                for i in range(0, len(texts), step)
+            ])
+            split = [chunks for part in parts for chunks in part]
+        else:
+            split = await asyncio.to_thread(
+                split_texts, texts, self.chunk_size, self.chunk_overlap
+            )
+
+        ids: List[str] = []
+        chunks: List[str] = []
+        chunk_metadatas: List[Dict[str, Any]] = []
+        for i, text_chunks in enumerate(split):
+            base_metadata = metadatas[i] if metadatas else {}
+            source_id = source_id_for(texts[i], base_metadata)
+            for j, chunk in enumerate(text_chunks):
+                content_hash = text_hash(chunk)
+                ids.append(chunk_id(source_id, j, content_hash))
+                chunks.append(chunk)
+                chunk_metadatas.append({
+                    **base_metadata,
+                    "source_id": source_id,
+                    "chunk_index": j,
+                    "content_hash": content_hash,
+                })
+
+        return ids, chunks, chunk_metadatas
+
+    def _existing_ids(self, source_ids: List[str]) -> List[str]:
+        """Ids of chunks already stored for the given sources."""
+        existing: List[str] = []
+        for i in range(0, len(source_ids), _LOOKUP_BATCH):
+            batch = source_ids[i:i + _LOOKUP_BATCH]
+            found = self.collection.get(where={"source_id": {"$in": batch}}, include=[])
+            existing.extend(found.get("ids") or [])
+        return existing
+
+    def delete(self, ids: List[str]) -> None:
+        """
+        Delete chunks from the collection and the lexical index.
+
+        Args:
+            ids: Chunk IDs to delete
+        """
+        if not ids:
+            return
+        self.collection.delete(ids=ids)
+        if self.lexical_index is not None:
+            self.lexical_index.remove(ids)
+
+    def _write(
+        self,
+        ids: List[str],
+        chunks: List[str],
+        metadatas: List[Dict[str, Any]],
+        vectors: List[List[float]]
+    ) -> None:
+        """Write one batch of embedded chunks to the collection."""
+        self.collection.upsert(
+            ids=ids,
+            embeddings=vectors,
+            documents=chunks,
+            metadatas=metadatas
+        )
+        if self.lexical_index is not None:
+            self.lexical_index.add(ids, chunks, metadatas)
+
+    async def index(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> List[str]:
+        """
+        Chunk, embed and write texts to the collection.
+
+        Chunks already stored under the same id are skipped, and stored chunks
+        of the same sources that are no longer produced are deleted.
+
+        Args:
+            texts: Texts to index
+            metadatas: Optional metadata for each text
+            on_progress: Optional callback invoked after each embedding and write batch
+
+        Returns:
+            List of chunk IDs for all texts, including unchanged chunks
+        """
+        all_ids, all_chunks, all_metadatas = await self.chunk(texts, metadatas)
+
+        source_ids = sorted({metadata["source_id"] for metadata in all_metadatas})
+        existing = set(await asyncio.to_thread(self._existing_ids, source_ids))
+        stale = sorted(existing.difference(all_ids))
+
+        # Only new or changed chunks are embedded; duplicates within the batch once
+        positions = {}
+        for i, chunk_id_ in enumerate(all_ids):
+            if chunk_id_ not in existing and chunk_id_ not in positions:
+                positions[chunk_id_] = i
+        ids = list(positions)
+        chunks = [all_chunks[i] for i in positions.values()]
+        chunk_metadatas = [all_metadatas[i] for i in positions.values()]
+
+        progress = IndexingProgress(
+            documents=len(texts),
+            chunks=len(all_ids),
+            unchanged=len(all_ids) - len(ids)
+        )
+        self.logger.info(
+            f"Indexing {len(texts)} documents as {len(all_ids)} chunks "
+            f"({len(ids)} new or changed, {len(stale)} stale)"
+        )
+
+        def report() -> None:
+            if on_progress is not None:
+                on_progress(progress.model_copy())
+
+        async def write(start: int, end: int, vectors: List[List[float]]) -> None:
+            await asyncio.to_thread(
+                self._write, ids[start:end], chunks[start:end], chunk_metadatas[start:end], vectors
+            )
+            progress.written += end - start
+            self.logger.info(f"Indexed {progress.written}/{len(ids)} chunks")
+            report()
+
+        pending_write: Optional[asyncio.Task] = None
+        buffer_start = 0
+        buffer: List[List[float]] = []
+
+        try:
+            for start in range(0, len(chunks), self.embedding_batch_size):
+                batch = chunks[start:start + self.embedding_batch_size]
+                buffer.extend(
+                    await self.embedding_executor.run(self.embeddings.embed_documents, batch)
+                )
+                progress.embedded += len(batch)
+                report()
+
+                end = start + len(batch)
+                if end - buffer_start >= self.write_batch_size or end == len(chunks):
+                    # One write in flight at a time; it overlaps the next embedding batch
+                    if pending_write is not None:
+                        await pending_write
+                    pending_write = asyncio.create_task(write(buffer_start, end, buffer))
+                    buffer_start, buffer = end, []
+
+            if pending_write is not None:
+                await pending_write
+        except BaseException:
+            if pending_write is not None and not pending_write.done():
+                pending_write.cancel()
+            raise
+
+        # Removed after the new chunks are written, so a source is never missing
+        if stale:
+            await asyncio.to_thread(self.delete, stale)
+            progress.deleted = len(stale)
+        if stale or not ids:
+            report()
+
+        return all_ids
+
+    def shutdown(self) -> None:
+        """Shut down the pipeline executors."""
+        self.embedding_executor.shutdown()
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False)
+            self._process_pool = None
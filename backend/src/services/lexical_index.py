@@ -0,0 +1,215 @@
+"""
+In-process BM25 inverted index kept alongside the vector store.
+
+Dense retrieval ranks exact identifiers (MIDs, BINs like ``E001``, merchant
+names, pkType strings) poorly; this index scores chunks by term matches so
+those hits can be fused with the vector results by reciprocal rank.
+"""
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import heapq
+import math
+import re
+import threading
+
+from src.utils import LoggerMixin
+from src.utils.metadata_filter import matches_where
+
+# Identifiers keep their inner separators: repay:settlement, E001, 4111-1111, v1.2
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[:_\-./][a-z0-9]+)*")
+_SPLIT_PATTERN = re.compile(r"[:_\-./]")
+
+# Function words carry no topical signal; a query that shares only these with a
+# chunk must not count as a lexical match
+STOPWORDS = frozenset("""
+a about above after again all am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had
+has have having he her here hers him his how i if in into is it its itself just me more most
+my no nor not now of off on once only or other our ours out over own same she should so some
+such than that the their theirs them then there these they this those through to too under
+until up very was we were what when where which while who whom why will with would you your
+yours show tell give list please
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenize text for lexical matching.
+
+    Compound identifiers are indexed both whole and by their parts, so
+    'repay:settlement' matches queries for 'settlement' as well. Stopwords
+    are dropped.
+    """
+    tokens: List[str] = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token not in STOPWORDS:
+            tokens.append(token)
+        parts = _SPLIT_PATTERN.split(token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part and part not in STOPWORDS)
+    return tokens
+
+
+class BM25Index(LoggerMixin):
+    """Okapi BM25 inverted index over chunk ids."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize an empty index.
+
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._terms: Dict[str, List[str]] = {}
+        self._metadatas: Dict[str, Dict[str, Any]] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of indexed chunks."""
+        return len(self._lengths)
+
+    @classmethod
+    def from_collection(cls, collection: Any, page_size: int = 1000) -> "BM25Index":
+        """
+        Build the index from every chunk in a Chroma collection.
+
+        Args:
+            collection: Chroma collection
+            page_size: Chunks fetched per request
+
+        Returns:
+            Populated index
+        """
+        index = cls()
+        offset = 0
+        while True:
+            page = collection.get(
+                limit=page_size, offset=offset, include=["documents", "metadatas"]
+            )
+            ids = page.get("ids") or []
+            if not ids:
+                break
+            index.add(ids, page.get("documents") or [], page.get("metadatas") or [])
+            offset += len(ids)
+        index.logger.info(f"Built lexical index over {len(index)} chunks")
+        return index
+
+    def _remove_locked(self, chunk_id: str) -> None:
+        """Remove one chunk (caller holds the lock)."""
+        length = self._lengths.pop(chunk_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        self._metadatas.pop(chunk_id, None)
+        for term in self._terms.pop(chunk_id, []):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(chunk_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def add(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: Optional[List[Optional[Dict[str, Any]]]] = None
+    ) -> None:
+        """
+        Add or replace chunks.
+
+        Args:
+            ids: Chunk IDs
+            texts: Chunk texts
+            metadatas: Chunk metadata, used for filtering
+        """
+        tokenized = [Counter(tokenize(text or "")) for text in texts]
+        with self._lock:
+            for i, (chunk_id, counts) in enumerate(zip(ids, tokenized)):
+                if chunk_id in self._lengths:
+                    self._remove_locked(chunk_id)
+                length = sum(counts.values())
+                self._lengths[chunk_id] = length
+                self._total_length += length
+                self._metadatas[chunk_id] = (metadatas[i] if metadatas else None) or {}
+                self._terms[chunk_id] = list(counts)
+                for term, tf in counts.items():
+                    self._postings.setdefault(term, {})[chunk_id] = tf
+
+    def remove(self, ids: Iterable[str]) -> None:
+        """
+        Remove chunks from the index.
+
+        Args:
+            ids: Chunk IDs to remove
+        """
+        with self._lock:
+            for chunk_id in set(ids):
+                self._remove_locked(chunk_id)
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Score chunks against a query.
+
+        Args:
+            query: Query text
+            k: Number of results
+            where: Optional Chroma-style metadata filter
+
+        Returns:
+            List of (chunk_id, score), best first
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._lengths)
+            if not terms or count == 0:
+                return []
+            average_length = self._total_length / count
+
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+                for chunk_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / average_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            if where:
+                scores = {
+                    chunk_id: score for chunk_id, score in scores.items()
+                    if matches_where(self._metadatas.get(chunk_id, {}), where)
+                }
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuse ranked id lists by reciprocal rank.
+
+    Args:
+        rankings: Ranked lists of ids, best first
+        k: Rank constant; larger values flatten the contribution of top ranks
+
+    Returns:
+        List of (id, fused score), best first
+    """
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            fused[item_id] = fused.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,202 @@
+"""
+Hedged LLM requests and provider failover.
+
+A request starts on the primary provider. If it has not completed once
+the primary's latency reaches a configured percentile of its recent
+history, the same request is fired at the next provider and the first
+answer wins; the slower attempt is cancelled. When every attempt in
+flight has failed, the next provider is tried (failover), so one
+degraded or failing provider no longer sets the tail latency.
+
+Latencies are tracked per provider and kind ("response" for complete
+generations, "first_token" for streams, which are hedged until their
+first delta).
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+import asyncio
+import time
+
+from src.utils import LatencyHistogram, LoggerMixin
+
+T = TypeVar("T")
+
+
+def parse_providers(spec: str) -> List[str]:
+    """Parse a comma-separated provider list."""
+    return [provider.strip() for provider in spec.split(",") if provider.strip()]
+
+
+class HedgingPolicy(LoggerMixin):
+    """Races a request across providers by latency percentile and on errors."""
+
+    def __init__(
+        self,
+        primary: str,
+        fallbacks: Optional[List[str]] = None,
+        hedge_enabled: bool = False,
+        hedge_percentile: float = 95.0,
+        min_samples: int = 20,
+        default_delay_ms: float = 3000.0,
+        min_delay_ms: float = 250.0,
+        window: int = 1000
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            primary: Provider every request starts on
+            fallbacks: Providers to hedge or fail over to, in order
+            hedge_enabled: Fire hedges on slow attempts (failover on errors is always on)
+            hedge_percentile: Latency percentile of a provider after which to hedge
+            min_samples: Samples needed before the percentile is trusted
+            default_delay_ms: Hedge delay while a provider has too few samples
+            min_delay_ms: Lower bound for the hedge delay
+            window: Recent samples kept per histogram
+        """
+        self.providers = [primary] + [p for p in (fallbacks or []) if p != primary]
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.default_delay_ms = default_delay_ms
+        self.min_delay_ms = min_delay_ms
+        self.window = window
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.errors: Dict[str, int] = {provider: 0 for provider in self.providers}
+        self.hedges = 0
+        self.failovers = 0
+        self.fallback_wins = 0
+
+    def histogram(self, provider: str, kind: str) -> LatencyHistogram:
+        """Latency histogram of a provider for one kind of call."""
+        key = (provider, kind)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = LatencyHistogram(window=self.window)
+            self._histograms[key] = histogram
+        return histogram
+
+    def hedge_delay(self, provider: str, kind: str) -> float:
+        """
+        Seconds to wait on a provider before hedging.
+
+        Args:
+            provider: Provider of the attempt in flight
+            kind: "response" or "first_token"
+
+        Returns:
+            The provider's latency percentile (or the default delay while it
+            has too few samples), never below min_delay_ms
+        """
+        histogram = self.histogram(provider, kind)
+        delay_ms = self.default_delay_ms
+        if len(histogram) >= self.min_samples:
+            delay_ms = histogram.percentile(self.hedge_percentile) or delay_ms
+        return max(delay_ms, self.min_delay_ms) / 1000
+
+    async def race(
+        self,
+        start: Callable[[str], Awaitable[T]],
+        kind: str,
+        discard: Optional[Callable[[T], Awaitable[None]]] = None
+    ) -> T:
+        """
+        Run a request on the primary, hedging and failing over as configured.
+
+        Args:
+            start: Starts the request on a provider
+            kind: Latency kind the attempts are measured as
+            discard: Releases the result of an attempt that finished but lost
+
+        Returns:
+            Result of the first attempt that succeeds
+
+        Raises:
+            Exception: The last error when every provider failed
+        """
+        if len(self.providers) == 1:
+            return await self._attempt(start, self.providers[0], kind)
+
+        remaining = list(self.providers)
+        attempts: Dict["asyncio.Task[T]", str] = {}
+        latest: Optional[Tuple[str, float]] = None
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            nonlocal latest
+            provider = remaining.pop(0)
+            attempts[asyncio.ensure_future(self._attempt(start, provider, kind))] = provider
+            latest = (provider, time.perf_counter())
+
+        launch()
+        try:
+            while attempts:
+                timeout = None
+                if self.hedge_enabled and remaining and latest is not None:
+                    provider, started = latest
+                    elapsed = time.perf_counter() - started
+                    timeout = max(0.0, self.hedge_delay(provider, kind) - elapsed)
+
+                done, _ = await asyncio.wait(
+                    attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self.hedges += 1
+                    self.logger.info(f"{latest[0]} is slow, hedging {kind} request to {remaining[0]}")
+                    launch()
+                    continue
+
+                winners = []
+                for task in done:
+                    provider = attempts.pop(task)
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        self.logger.warning(f"{provider} {kind} request failed: {last_error}")
+                    else:
+                        winners.append((task, provider))
+
+                if winners:
+                    task, provider = winners[0]
+                    for other, _ in winners[1:]:
+                        if discard is not None:
+                            await discard(other.result())
+                    if provider != self.providers[0]:
+                        self.fallback_wins += 1
+                    return task.result()
+
+                if not attempts and remaining:
+                    self.failovers += 1
+                    self.logger.info(f"Failing over {kind} request to {remaining[0]}")
+                    launch()
+
+            raise last_error
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    async def _attempt(self, start: Callable[[str], Awaitable[T]], provider: str, kind: str) -> T:
+        """Run one attempt, recording its latency or error."""
+        started = time.perf_counter()
+        try:
+            result = await start(provider)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.errors[provider] = self.errors.get(provider, 0) + 1
+            raise
+        self.histogram(provider, kind).add((time.perf_counter() - started) * 1000)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-provider latency histograms, hedge and failover counts."""
+        providers: Dict[str, Dict[str, Any]] = {
+            provider: {"errors": self.errors.get(provider, 0)} for provider in self.providers
+        }
+        for (provider, kind), histogram in self._histograms.items():
+            providers.setdefault(provider, {})[kind] = histogram.stats()
+        return {
+            "providers": providers,
+            "hedge_enabled": self.hedge_enabled,
+            "hedges": self.hedges,
+            "failovers": self.failovers,
+            "fallback_wins": self.fallback_wins,
+        }
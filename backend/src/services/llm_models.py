@@ -0,0 +1,165 @@
+"""
+LLM model routing and pooled provider clients.
+
+Each agent can run on its own model: lightweight steps such as query
+classification and follow-up suggestions use a small fast model, while
+the final answer keeps the large default. Clients are created once per
+(provider, model) and shared by every service and agent that uses them.
+
+Routes come from settings.llm_agent_models as comma-separated
+``Agent=target`` entries, where target is one of:
+
+- ``fast``: the fast model of whichever provider runs the call
+- ``provider:model`` or ``provider:fast``: applies when the call runs on that provider
+- ``model``: applies on the default provider
+"""
+from typing import Any, Dict, Optional, Tuple
+import threading
+
+from langchain_openai import ChatOpenAI, AzureChatOpenAI
+from langchain_anthropic import ChatAnthropic
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from src.services.fake_llm import create_fake_chat_model
+from src.utils import get_logger, settings
+
+logger = get_logger(__name__)
+
+# Route target meaning "the provider's fast model"
+FAST_TIER = "fast"
+# Route key for targets that apply on every provider
+ANY_PROVIDER = "*"
+
+PROVIDERS = ("openai", "azure-openai", "google", "anthropic", "local-fake")
+
+
+def parse_agent_models(spec: str, default_provider: str) -> Dict[str, Dict[str, str]]:
+    """
+    Parse per-agent model routes.
+
+    Args:
+        spec: Comma-separated ``Agent=target`` entries
+        default_provider: Provider a bare model name applies to
+
+    Returns:
+        Mapping of agent to {provider (or ANY_PROVIDER): model or FAST_TIER}
+    """
+    routes: Dict[str, Dict[str, str]] = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        agent, _, target = (part.strip() for part in entry.partition("="))
+        provider, separator, model = target.partition(":")
+        if separator and provider in PROVIDERS:
+            routes.setdefault(agent, {})[provider] = model.strip()
+        elif target == FAST_TIER:
+            routes.setdefault(agent, {})[ANY_PROVIDER] = FAST_TIER
+        else:
+            routes.setdefault(agent, {})[default_provider] = target
+    return routes
+
+
+def default_model(provider: str) -> str:
+    """Default model (or Azure deployment) of a provider."""
+    if provider == "openai":
+        return settings.openai_model
+    if provider == "azure-openai":
+        return settings.azure_openai_deployment_name
+    if provider == "google":
+        return settings.google_model
+    if provider == "anthropic":
+        return settings.anthropic_model
+    if provider == "local-fake":
+        return settings.local_fake_model
+    raise ValueError(f"Unsupported LLM provider: {provider}")
+
+
+def fast_model(provider: str) -> str:
+    """Small fast model of a provider (the default model if none is configured)."""
+    fast = {
+        "openai": settings.openai_fast_model,
+        "azure-openai": settings.azure_openai_fast_deployment_name,
+        "google": settings.google_fast_model,
+        "anthropic": settings.anthropic_fast_model,
+    }.get(provider)
+    return fast or default_model(provider)
+
+
+def model_temperature(provider: str) -> Optional[float]:
+    """Temperature the provider's clients are configured with."""
+    if provider == "openai":
+        return settings.openai_temperature
+    if provider == "azure-openai":
+        return settings.azure_openai_temperature
+    return None
+
+
+def _create_chat_model(provider: str, model: str) -> Any:
+    """Create the client for a provider and model."""
+    if provider == "openai":
+        return ChatOpenAI(
+            model=model,
+            temperature=settings.openai_temperature,
+            max_tokens=settings.openai_max_tokens,
+            api_key=settings.openai_api_key,
+        )
+    if provider == "azure-openai":
+        return AzureChatOpenAI(
+            azure_endpoint=settings.azure_openai_endpoint,
+            azure_deployment=model,
+            api_version=settings.azure_openai_api_version,
+            api_key=settings.azure_openai_api_key,
+            temperature=settings.azure_openai_temperature,
+            max_tokens=settings.azure_openai_max_tokens,
+        )
+    if provider == "google":
+        return ChatGoogleGenerativeAI(
+            model=model,
+            google_api_key=settings.google_api_key,
+        )
+    if provider == "anthropic":
+        return ChatAnthropic(
+            model=model,
+            anthropic_api_key=settings.anthropic_api_key,
+        )
+    if provider == "local-fake":
+        return create_fake_chat_model(model)
+    raise ValueError(f"Unsupported LLM provider: {provider}")
+
+
+# Pooled clients, one per (provider, model)
+_chat_models: Dict[Tuple[str, str], Any] = {}
+# Clients are preloaded in a worker thread while requests may ask for them
+_chat_models_lock = threading.Lock()
+
+
+def get_chat_model(provider: str, model: str) -> Any:
+    """
+    Get or create the pooled client for a provider and model.
+
+    Args:
+        provider: LLM provider
+        model: Model or deployment name
+
+    Returns:
+        LangChain chat model
+    """
+    key = (provider, model)
+    client = _chat_models.get(key)
+    if client is None:
+        with _chat_models_lock:
+            client = _chat_models.get(key)
+            if client is None:
+                client = _create_chat_model(provider, model)
+                _chat_models[key] = client
+                logger.info(f"Initialized {provider} LLM model {model}")
+    return client
+
+
+def pooled_models() -> Dict[str, int]:
+    """Pooled clients per provider."""
+    counts: Dict[str, int] = {}
+    for provider, _ in _chat_models:
+        counts[provider] = counts.get(provider, 0) + 1
+    return counts
@@ -0,0 +1,357 @@
+"""
+Provider-aware rate limiting and priority scheduling for LLM calls.
+
+Each provider gets one scheduler with token buckets for requests per minute
+and (estimated) tokens per minute, plus a cap on concurrent calls. Calls
+wait in a priority queue until both buckets and a concurrency slot allow
+them through, so under load user-facing response generation goes first,
+query understanding next and recommendations last, instead of all of them
+running into the provider's 429s together.
+
+Token costs are estimated up front (prompt tokens plus the output limit)
+and reconciled with the actual usage once the call completes.
+"""
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import time
+
+from src.utils import LoggerMixin, settings
+from src.utils.bounded_executor import percentile
+
+# Priority classes, most urgent first
+PRIORITY_RESPONSE = 0
+PRIORITY_UNDERSTANDING = 1
+PRIORITY_RECOMMENDATIONS = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_RESPONSE: "response",
+    PRIORITY_UNDERSTANDING: "understanding",
+    PRIORITY_RECOMMENDATIONS: "recommendations",
+}
+
+AGENT_PRIORITIES = {
+    "ResponseGenerationAgent": PRIORITY_RESPONSE,
+    "QueryUnderstandingAgent": PRIORITY_UNDERSTANDING,
+    "RecommendationAgent": PRIORITY_RECOMMENDATIONS,
+}
+
+
+def agent_priority(agent: Optional[str]) -> int:
+    """Priority class of an agent (unknown callers rank with query understanding)."""
+    return AGENT_PRIORITIES.get(agent or "", PRIORITY_UNDERSTANDING)
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Parse per-provider quotas.
+
+    Args:
+        spec: Comma-separated ``provider:requests_per_minute:tokens_per_minute``
+              entries (0 leaves that dimension unlimited)
+
+    Returns:
+        Mapping of provider to (requests per minute, tokens per minute)
+    """
+    limits: Dict[str, Tuple[int, int]] = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        provider, rpm, tpm = (part.strip() for part in entry.split(":"))
+        limits[provider] = (int(rpm or 0), int(tpm or 0))
+    return limits
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether a provider error is a 429 / quota exhaustion."""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    name = type(error).__name__
+    return "RateLimit" in name or name == "ResourceExhausted"
+
+
+def retry_after_seconds(error: BaseException, default: float = 1.0) -> float:
+    """Retry-After of a rate limit error, if the provider sent one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("retry-after", default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(
+        self,
+        per_minute: float,
+        burst_seconds: float = 10.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize a full bucket.
+
+        Args:
+            per_minute: Refill rate per minute
+            burst_seconds: Seconds of quota that may be spent at once (capacity)
+            clock: Monotonic clock in seconds
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.clock = clock
+        self.level = self.capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Seconds until `amount` can be taken.
+
+        Amounts above the capacity only need a full bucket; the excess is
+        paid off as debt.
+        """
+        self._refill()
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        """Take from the bucket (the level may go negative)."""
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        """Return unused amount to the bucket."""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class Grant:
+    """Admission of one call through the scheduler."""
+
+    def __init__(self, scheduler: "LLMScheduler", tokens: int, queue_ms: float):
+        self.scheduler = scheduler
+        self.tokens = tokens
+        self.queue_ms = queue_ms
+
+    def reconcile(self, actual_tokens: Optional[int]) -> None:
+        """
+        Correct the token bucket with the tokens the call actually used.
+
+        Args:
+            actual_tokens: Total tokens reported or counted (None keeps the estimate)
+        """
+        if actual_tokens is None or self.scheduler.tokens is None:
+            return
+        difference = actual_tokens - self.tokens
+        if difference > 0:
+            self.scheduler.tokens.take(difference)
+        elif difference < 0:
+            self.scheduler.tokens.give(-difference)
+        self.tokens = actual_tokens
+
+
+class LLMScheduler(LoggerMixin):
+    """Priority queue in front of one provider's request and token quotas."""
+
+    def __init__(
+        self,
+        provider: str,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        max_concurrency: int = 16,
+        burst_seconds: float = 10.0,
+        window: int = 1000
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            provider: Provider name reported in stats
+            requests_per_minute: Request quota (0 for unlimited)
+            tokens_per_minute: Token quota (0 for unlimited)
+            max_concurrency: Maximum calls in flight (0 for unlimited)
+            burst_seconds: Seconds of quota that may be spent at once
+            window: Number of recent admissions kept per class for percentiles
+        """
+        self.provider = provider
+        self.requests = TokenBucket(requests_per_minute, burst_seconds) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds) if tokens_per_minute > 0 else None
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.rate_limited = 0
+        self._paused_until = 0.0
+        self._waiters: List[Tuple[int, int, int, "asyncio.Future[None]"]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._queue_ms: Dict[int, Deque[float]] = {
+            priority: deque(maxlen=window) for priority in PRIORITY_NAMES
+        }
+        self._admitted: Dict[int, int] = {priority: 0 for priority in PRIORITY_NAMES}
+
+    def _wait_time(self, tokens: int) -> float:
+        """Seconds until a call of this size may start (0 when it can start now)."""
+        if self.max_concurrency > 0 and self.in_flight >= self.max_concurrency:
+            # A release will dispatch; no timer needed
+            return float("inf")
+        wait = max(0.0, self._paused_until - time.monotonic())
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens))
+        return wait
+
+    def _start(self, tokens: int) -> None:
+        """Charge the buckets and take a concurrency slot."""
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+        self.in_flight += 1
+
+    def _dispatch(self) -> None:
+        """Admit queued calls in priority order while the quotas allow."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            wait = self._wait_time(tokens)
+            if wait > 0:
+                if wait != float("inf"):
+                    self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self._start(tokens)
+            future.set_result(None)
+
+    async def _acquire(self, priority: int, tokens: int) -> float:
+        """Wait for admission; returns the time spent queued in ms."""
+        started = time.perf_counter()
+        if not self._waiters and self._wait_time(tokens) == 0:
+            self._start(tokens)
+        else:
+            future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._sequence), tokens, future))
+            self._dispatch()
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Admitted just before the caller went away
+                    self._release(tokens, used=False)
+                else:
+                    self._dispatch()
+                raise
+
+        queue_ms = (time.perf_counter() - started) * 1000
+        self._queue_ms[priority].append(queue_ms)
+        self._admitted[priority] += 1
+        return queue_ms
+
+    def _release(self, tokens: int, used: bool = True) -> None:
+        """Free a concurrency slot (refunding the quota of calls that never ran)."""
+        self.in_flight -= 1
+        if not used:
+            if self.requests is not None:
+                self.requests.give(1)
+            if self.tokens is not None:
+                self.tokens.give(tokens)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: int, tokens: int) -> AsyncIterator[Grant]:
+        """
+        Hold an admission for the duration of one provider call.
+
+        Args:
+            priority: Priority class (lower runs first)
+            tokens: Estimated total tokens of the call
+
+        Yields:
+            Grant used to reconcile the actual token usage
+        """
+        priority = priority if priority in PRIORITY_NAMES else PRIORITY_UNDERSTANDING
+        queue_ms = await self._acquire(priority, tokens)
+        if queue_ms >= 1000:
+            self.logger.info(
+                f"{PRIORITY_NAMES[priority]} call to {self.provider} queued {queue_ms:.0f} ms"
+            )
+        grant = Grant(self, tokens, queue_ms)
+        try:
+            yield grant
+        finally:
+            self._release(grant.tokens)
+
+    def penalize(self, seconds: float) -> None:
+        """
+        Hold back all admissions after the provider rejected a call with a 429.
+
+        Args:
+            seconds: Pause requested by the provider (Retry-After)
+        """
+        self.rate_limited += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self.logger.warning(f"{self.provider} rate limited, pausing admissions for {seconds:.1f}s")
+
+    @property
+    def queued(self) -> int:
+        """Number of calls waiting for admission."""
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    def stats(self) -> Dict[str, Any]:
+        """Get quota and queue-time statistics per priority class."""
+        classes = {}
+        for priority, name in PRIORITY_NAMES.items():
+            queue_ms = list(self._queue_ms[priority])
+            classes[name] = {
+                "admitted": self._admitted[priority],
+                "queue_ms_p50": round(percentile(queue_ms, 50), 2),
+                "queue_ms_p95": round(percentile(queue_ms, 95), 2),
+            }
+        return {
+            "provider": self.provider,
+            "requests_per_minute": self.requests_per_minute or None,
+            "tokens_per_minute": self.tokens_per_minute or None,
+            "max_concurrency": self.max_concurrency or None,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rate_limited": self.rate_limited,
+            "classes": classes,
+        }
+
+
+# Global schedulers, one per provider
+_schedulers: Dict[str, LLMScheduler] = {}
+
+
+def get_llm_scheduler(provider: str) -> LLMScheduler:
+    """Get or create the scheduler for a provider."""
+    scheduler = _schedulers.get(provider)
+    if scheduler is None:
+        requests_per_minute, tokens_per_minute = parse_rate_limits(
+            settings.llm_rate_limits
+        ).get(provider, (0, 0))
+        scheduler = LLMScheduler(
+            provider,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            max_concurrency=settings.llm_max_concurrency,
+            burst_seconds=settings.llm_rate_limit_burst_seconds
+        )
+        _schedulers[provider] = scheduler
+    return scheduler
@@ -1,15 +1,79 @@
 """
 LLM service for managing language model interactions.
-Supports multiple providers: OpenAI, Azure OpenAI, Google Gemini, Anthropic Claude.
+Supports multiple providers: OpenAI, Azure OpenAI, Google Gemini, Anthropic Claude,
+and a local fake provider for offline tests and benchmarks.
 """
-from typing import Any, Dict, List, Literal, Optional
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
+import asyncio
+import threading
+import time
 
-from langchain_openai import ChatOpenAI, AzureChatOpenAI
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
-from langchain_anthropic import ChatAnthropic
-from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import BaseModel
 
-from src.utils import LoggerMixin, settings
+from src.services.llm_hedging import HedgingPolicy, parse_providers
+from src.services.llm_models import (
+    ANY_PROVIDER,
+    FAST_TIER,
+    default_model,
+    fast_model,
+    get_chat_model,
+    model_temperature,
+    parse_agent_models,
+    pooled_models,
+)
+from src.services.llm_scheduler import (
+    Grant,
+    LLMScheduler,
+    agent_priority,
+    get_llm_scheduler,
+    is_rate_limit_error,
+    retry_after_seconds,
+)
+from src.services.response_cache import ResponseCache, get_response_cache
+from src.utils import LoggerMixin, SingleFlight, get_token_counter, settings
+from src.utils.bounded_executor import percentile
+
+
+def _chunk_text(chunk: Any) -> str:
+    """Text of a streamed message chunk (content may be a list of blocks)."""
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block if isinstance(block, str) else block.get("text", "")
+            for block in content
+            if isinstance(block, (str, dict))
+        )
+    return ""
+
+
+def _usage_tokens(message: Any) -> Optional[int]:
+    """Total tokens reported in a message's usage metadata, if any."""
+    usage = getattr(message, "usage_metadata", None)
+    return usage.get("total_tokens") if usage else None
+
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+# Output budget assumed for providers without a configured max_tokens
+_DEFAULT_OUTPUT_TOKENS = 1024
 
 
 class LLMService(LoggerMixin):
@@ -20,93 +84,521 @@ class LLMService(LoggerMixin):
         Initialize LLM service.
         
         Args:
-            provider: LLM provider to use (openai, azure-openai, google, anthropic)
+            provider: LLM provider to use (openai, azure-openai, google, anthropic, local-fake)
         """
         self.provider = provider or settings.default_llm_provider
-        self._model = None
-    
-    def _get_model(self) -> Any:
-        """Get the appropriate LLM model based on provider."""
-        if self._model is not None:
-            return self._model
-        
-        if self.provider == "openai":
-            self._model = ChatOpenAI(
-                model=settings.openai_model,
-                temperature=settings.openai_temperature,
-                max_tokens=settings.openai_max_tokens,
-                api_key=settings.openai_api_key,
-            )
-        elif self.provider == "azure-openai":
-            self._model = AzureChatOpenAI(
-                azure_endpoint=settings.azure_openai_endpoint,
-                azure_deployment=settings.azure_openai_deployment_name,
-                api_version=settings.azure_openai_api_version,
-                api_key=settings.azure_openai_api_key,
-                temperature=settings.azure_openai_temperature,
-                max_tokens=settings.azure_openai_max_tokens,
-            )
-        elif self.provider == "google":
-            self._model = ChatGoogleGenerativeAI(
-                model=settings.google_model,
-                google_api_key=settings.google_api_key,
-            )
-        elif self.provider == "anthropic":
-            self._model = ChatAnthropic(
-                model=settings.anthropic_model,
-                anthropic_api_key=settings.anthropic_api_key,
-            )
-        else:
-            raise ValueError(f"Unsupported LLM provider: {self.provider}")
+        # Per-agent model routing (e.g. small fast models for lightweight steps)
+        self.routes = parse_agent_models(settings.llm_agent_models, settings.default_llm_provider)
+        self.response_cache: Optional[ResponseCache] = (
+            get_response_cache() if settings.llm_cache_enabled else None
+        )
+        # Concurrent identical requests share one provider call
+        self.flight = SingleFlight("llm")
+        # Per-provider quotas and priority admission (shared by all services of a provider)
+        self.scheduler: Optional[LLMScheduler] = (
+            get_llm_scheduler(self.provider) if settings.llm_scheduler_enabled else None
+        )
+        # Hedging and failover to the fallback providers, with per-provider latencies
+        self.hedging = HedgingPolicy(
+            self.provider,
+            fallbacks=parse_providers(settings.llm_fallback_providers),
+            hedge_enabled=settings.llm_hedge_enabled,
+            hedge_percentile=settings.llm_hedge_percentile,
+            min_samples=settings.llm_hedge_min_samples,
+            default_delay_ms=settings.llm_hedge_default_delay_ms,
+            min_delay_ms=settings.llm_hedge_min_delay_ms
+        )
+        # Recent streaming latencies (time to first token, total)
+        self._first_token_ms: Deque[float] = deque(maxlen=1000)
+        self._stream_ms: Deque[float] = deque(maxlen=1000)
+    
+    def _model_name(self, provider: str, agent: Optional[str] = None) -> str:
+        """
+        Model an agent's calls use on a provider.
         
-        self.logger.info(f"Initialized {self.provider} LLM model")
-        return self._model
+        Args:
+            provider: Provider the call runs on
+            agent: Calling agent (None uses the provider's default model)
+            
+        Returns:
+            Model or deployment name
+        """
+        route = self.routes.get(agent or "", {})
+        target = route.get(provider) or route.get(ANY_PROVIDER)
+        if target == FAST_TIER:
+            return fast_model(provider)
+        return target or default_model(provider)
+    
+    def _model_identity(
+        self,
+        provider: Optional[str] = None,
+        agent: Optional[str] = None
+    ) -> Tuple[str, Optional[float]]:
+        """Model name and temperature an agent's calls use on a provider."""
+        provider = provider or self.provider
+        return self._model_name(provider, agent), model_temperature(provider)
+    
+    def _get_model(self, provider: Optional[str] = None, model: Optional[str] = None) -> Any:
+        """
+        Get the pooled client of a provider and model.
+        
+        Args:
+            provider: Provider (default: the primary provider)
+            model: Model or deployment name (default: the provider's default model)
+        """
+        provider = provider or self.provider
+        return get_chat_model(provider, model or default_model(provider))
+    
+    def preload(self) -> None:
+        """Create the provider clients (default and per-agent models) ahead of the first request."""
+        models = {default_model(self.provider)}
+        models.update(self._model_name(self.provider, agent) for agent in self.routes)
+        for model in sorted(models):
+            self._get_model(self.provider, model)
     
     async def generate_response(
         self,
         messages: List[Dict[str, str]],
         system_prompt: Optional[str] = None,
+        agent: Optional[str] = None,
         **kwargs: Any
     ) -> str:
         """
         Generate a response from the LLM.
         
+        Agents that opted in to response caching get byte-identical requests
+        answered from the cache without calling the provider. Identical
+        requests made while one is already in flight share its result.
+        Provider calls are admitted by the provider's scheduler in the
+        agent's priority class and retried after rate limit errors. Slow
+        or failing calls are hedged or failed over to the fallback providers.
+        
         Args:
             messages: List of message dictionaries with 'role' and 'content'
             system_prompt: Optional system prompt to prepend
+            agent: Name of the calling agent (selects caching, its TTL and the priority)
             **kwargs: Additional arguments to pass to the model
             
         Returns:
             Generated response text
         """
-        try:
-            model = self._get_model()
+        return await self._complete(
+            messages,
+            system_prompt,
+            agent,
+            kwargs,
+            lambda provider, lc_messages, prompt_tokens: self._generate_on(
+                provider, lc_messages, prompt_tokens, agent, kwargs
+            )
+        )
+    
+    async def generate_structured(
+        self,
+        messages: List[Dict[str, str]],
+        schema: Type[SchemaT],
+        system_prompt: Optional[str] = None,
+        agent: Optional[str] = None,
+        **kwargs: Any
+    ) -> SchemaT:
+        """
+        Generate a schema-validated response with the provider's structured output.
+        
+        Caching, coalescing, scheduling, hedging and failover apply as for
+        generate_response. Output that does not validate against the schema
+        counts as a failed call (and fails over when fallbacks are configured).
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            schema: Pydantic model the response must match
+            system_prompt: Optional system prompt to prepend
+            agent: Name of the calling agent (selects caching, its TTL and the priority)
+            **kwargs: Additional arguments to pass to the model
             
-            # Convert messages to LangChain format
-            lc_messages: List[BaseMessage] = []
+        Returns:
+            Validated schema instance
+        """
+        text = await self._complete(
+            messages,
+            system_prompt,
+            agent,
+            kwargs,
+            lambda provider, lc_messages, prompt_tokens: self._generate_structured_on(
+                provider, lc_messages, prompt_tokens, schema, agent, kwargs
+            ),
+            key_extra={"structured_output": schema.__name__}
+        )
+        return schema.model_validate_json(text)
+    
+    async def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str],
+        agent: Optional[str],
+        kwargs: Dict[str, Any],
+        call: Callable[[str, List[BaseMessage], int], Awaitable[str]],
+        key_extra: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Run a non-streaming call through the cache, coalescing and hedging.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            system_prompt: Optional system prompt to prepend
+            agent: Name of the calling agent
+            kwargs: Additional arguments to pass to the model
+            call: Runs the request on a provider (provider, messages, prompt tokens)
+            key_extra: Extra values distinguishing this kind of call in cache keys
             
-            if system_prompt:
-                lc_messages.append(SystemMessage(content=system_prompt))
+        Returns:
+            Response text
+        """
+        key_args = {**kwargs, **(key_extra or {})}
+        cache_key = self._cache_key(messages, system_prompt, agent, key_args)
+        if cache_key is not None:
+            cached = self.response_cache.get(cache_key, agent)
+            if cached is not None:
+                self.logger.info(f"Served {agent} response from cache")
+                return cached
+        
+        try:
+            lc_messages = self._to_lc_messages(messages, system_prompt)
+            prompt_tokens = self._prompt_tokens(lc_messages)
             
-            for msg in messages:
-                if msg["role"] == "user":
-                    lc_messages.append(HumanMessage(content=msg["content"]))
-                elif msg["role"] == "assistant":
-                    lc_messages.append(AIMessage(content=msg["content"]))
-                elif msg["role"] == "system":
-                    lc_messages.append(SystemMessage(content=msg["content"]))
+            async def generate() -> str:
+                return await self.hedging.race(
+                    lambda provider: call(provider, lc_messages, prompt_tokens),
+                    "response"
+                )
             
-            # Generate response
-            response = await model.agenerate([lc_messages], **kwargs)
-            response_text = response.generations[0][0].text
+            # Generate response (joining an identical in-flight request if there is one)
+            model_name, temperature = self._model_identity(self.provider, agent)
+            response_text = await self.flight.do(
+                ResponseCache.make_key(
+                    self.provider, model_name, temperature, system_prompt, messages, key_args
+                ),
+                generate
+            )
             
-            self.logger.info(f"Generated response using {self.provider}")
+            if cache_key is not None:
+                await asyncio.to_thread(self.response_cache.put, cache_key, response_text, agent)
             return response_text
             
         except Exception as e:
             self.logger.error(f"Failed to generate response: {e}")
             raise
     
+    async def astream_response(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+        agent: Optional[str] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response from the LLM as text deltas.
+        
+        Deltas are yielded as soon as the provider emits them. A cached
+        response (for agents that opted in) is yielded as a single delta.
+        The stream holds a scheduler admission until it ends; a rate limit
+        error is retried only if no delta was yielded yet. Streams are hedged
+        and failed over until their first delta.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            system_prompt: Optional system prompt to prepend
+            agent: Name of the calling agent (selects caching, its TTL and the priority)
+            **kwargs: Additional arguments to pass to the model
+            
+        Yields:
+            Response text deltas
+        """
+        cache_key = self._cache_key(messages, system_prompt, agent, kwargs)
+        if cache_key is not None:
+            cached = self.response_cache.get(cache_key, agent)
+            if cached is not None:
+                self.logger.info(f"Served {agent} response from cache")
+                yield cached
+                return
+        
+        started = time.perf_counter()
+        first_token_ms: Optional[float] = None
+        parts: List[str] = []
+        try:
+            lc_messages = self._to_lc_messages(messages, system_prompt)
+            prompt_tokens = self._prompt_tokens(lc_messages)
+            
+            async def open_stream(provider: str) -> Tuple[str, AsyncIterator[str], Optional[str]]:
+                # A stream counts as answered once its first delta arrives
+                stream = self._stream_on(provider, lc_messages, prompt_tokens, agent, kwargs)
+                try:
+                    return provider, stream, await stream.__anext__()
+                except StopAsyncIteration:
+                    return provider, stream, None
+                except BaseException:
+                    await stream.aclose()
+                    raise
+            
+            async def discard(opened: Tuple[str, AsyncIterator[str], Optional[str]]) -> None:
+                await opened[1].aclose()
+            
+            provider, stream, first = await self.hedging.race(open_stream, "first_token", discard=discard)
+            try:
+                if first is not None:
+                    first_token_ms = (time.perf_counter() - started) * 1000
+                    self._first_token_ms.append(first_token_ms)
+                    parts.append(first)
+                    yield first
+                    async for delta in stream:
+                        parts.append(delta)
+                        yield delta
+            finally:
+                await stream.aclose()
+        
+        except Exception as e:
+            self.logger.error(f"Failed to stream response: {e}")
+            raise
+        
+        total_ms = (time.perf_counter() - started) * 1000
+        self._stream_ms.append(total_ms)
+        self.logger.info(
+            f"Streamed response using {provider}: first token after "
+            f"{first_token_ms or total_ms:.0f} ms, total {total_ms:.0f} ms"
+        )
+        if cache_key is not None:
+            await asyncio.to_thread(self.response_cache.put, cache_key, "".join(parts), agent)
+    
+    async def _generate_on(
+        self,
+        provider: str,
+        lc_messages: List[BaseMessage],
+        prompt_tokens: int,
+        agent: Optional[str],
+        kwargs: Dict[str, Any]
+    ) -> str:
+        """Generate a response on one provider."""
+        model_name = self._model_name(provider, agent)
+        model = self._get_model(provider, model_name)
+        
+        async def call(grant: Optional[Grant]) -> str:
+            response = await model.agenerate([lc_messages], **kwargs)
+            generation = response.generations[0][0]
+            if grant is not None:
+                grant.reconcile(
+                    _usage_tokens(getattr(generation, "message", None))
+                    or prompt_tokens + self._count_tokens(generation.text)
+                )
+            return generation.text
+        
+        text = await self._with_retries(provider, agent, prompt_tokens, kwargs, call)
+        self.logger.info(f"Generated response using {provider}/{model_name}")
+        return text
+    
+    async def _generate_structured_on(
+        self,
+        provider: str,
+        lc_messages: List[BaseMessage],
+        prompt_tokens: int,
+        schema: Type[BaseModel],
+        agent: Optional[str],
+        kwargs: Dict[str, Any]
+    ) -> str:
+        """Generate a structured response on one provider; returns the validated JSON."""
+        model_name = self._model_name(provider, agent)
+        model = self._get_model(provider, model_name).with_structured_output(schema, include_raw=True)
+        
+        async def call(grant: Optional[Grant]) -> str:
+            output = await model.ainvoke(lc_messages, **kwargs)
+            parsed = output.get("parsed")
+            if output.get("parsing_error") is not None or parsed is None:
+                raise ValueError(
+                    f"{provider} output did not match {schema.__name__}: {output.get('parsing_error')}"
+                )
+            if not isinstance(parsed, schema):
+                parsed = schema.model_validate(parsed)
+            text = parsed.model_dump_json()
+            if grant is not None:
+                grant.reconcile(
+                    _usage_tokens(output.get("raw")) or prompt_tokens + self._count_tokens(text)
+                )
+            return text
+        
+        text = await self._with_retries(provider, agent, prompt_tokens, kwargs, call)
+        self.logger.info(f"Generated {schema.__name__} using {provider}/{model_name}")
+        return text
+    
+    async def _with_retries(
+        self,
+        provider: str,
+        agent: Optional[str],
+        prompt_tokens: int,
+        kwargs: Dict[str, Any],
+        call: Callable[[Optional[Grant]], Awaitable[str]]
+    ) -> str:
+        """Run a call under a scheduler admission, retrying after rate limit errors."""
+        attempt = 0
+        while True:
+            try:
+                async with self._admission(provider, agent, prompt_tokens, kwargs) as grant:
+                    return await call(grant)
+            except Exception as e:
+                if not self._retry_after_rate_limit(provider, e, attempt):
+                    raise
+                attempt += 1
+    
+    async def _stream_on(
+        self,
+        provider: str,
+        lc_messages: List[BaseMessage],
+        prompt_tokens: int,
+        agent: Optional[str],
+        kwargs: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        """Stream a response from one provider, retrying rate limit errors before the first delta."""
+        model = self._get_model(provider, self._model_name(provider, agent))
+        parts: List[str] = []
+        attempt = 0
+        while True:
+            try:
+                async with self._admission(provider, agent, prompt_tokens, kwargs) as grant:
+                    usage = 0
+                    async for chunk in model.astream(lc_messages, **kwargs):
+                        usage += _usage_tokens(chunk) or 0
+                        delta = _chunk_text(chunk)
+                        if delta:
+                            parts.append(delta)
+                            yield delta
+                    if grant is not None:
+                        grant.reconcile(
+                            usage or prompt_tokens + self._count_tokens("".join(parts))
+                        )
+                return
+            except Exception as e:
+                if parts or not self._retry_after_rate_limit(provider, e, attempt):
+                    raise
+                attempt += 1
+    
+    def _count_tokens(self, text: str) -> int:
+        """Token count of a text with the provider's tokenizer."""
+        return get_token_counter(self.provider).count(text)
+    
+    def _prompt_tokens(self, lc_messages: List[BaseMessage]) -> int:
+        """Estimated prompt tokens of a request (content plus per-message overhead)."""
+        return sum(self._count_tokens(_chunk_text(message)) + 4 for message in lc_messages)
+    
+    def _max_output_tokens(self, provider: str, kwargs: Dict[str, Any]) -> int:
+        """Output token limit of a request."""
+        if kwargs.get("max_tokens"):
+            return int(kwargs["max_tokens"])
+        if provider == "openai":
+            return settings.openai_max_tokens
+        if provider == "azure-openai":
+            return settings.azure_openai_max_tokens
+        return _DEFAULT_OUTPUT_TOKENS
+    
+    def _scheduler_for(self, provider: str) -> Optional[LLMScheduler]:
+        """Scheduler of a provider (None when scheduling is disabled)."""
+        if provider == self.provider:
+            return self.scheduler
+        return get_llm_scheduler(provider) if settings.llm_scheduler_enabled else None
+    
+    @asynccontextmanager
+    async def _admission(
+        self,
+        provider: str,
+        agent: Optional[str],
+        prompt_tokens: int,
+        kwargs: Dict[str, Any]
+    ) -> AsyncIterator[Optional[Grant]]:
+        """Hold a scheduler admission for one provider call (None without a scheduler)."""
+        scheduler = self._scheduler_for(provider)
+        if scheduler is None:
+            yield None
+            return
+        estimate = prompt_tokens + self._max_output_tokens(provider, kwargs)
+        async with scheduler.slot(agent_priority(agent), estimate) as grant:
+            yield grant
+    
+    def _retry_after_rate_limit(self, provider: str, error: Exception, attempt: int) -> bool:
+        """
+        Decide whether to retry a failed call.
+        
+        Rate limit errors pause the provider's scheduler for the Retry-After
+        period; the call is then retried (it queues again behind the pause)
+        up to settings.llm_rate_limit_retries times.
+        """
+        scheduler = self._scheduler_for(provider)
+        if scheduler is None or not is_rate_limit_error(error):
+            return False
+        scheduler.penalize(retry_after_seconds(error))
+        return attempt < settings.llm_rate_limit_retries
+    
+    def _cache_key(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str],
+        agent: Optional[str],
+        kwargs: Dict[str, Any]
+    ) -> Optional[str]:
+        """Response cache key, or None when the agent has not opted in."""
+        if self.response_cache is None or not self.response_cache.enabled_for(agent):
+            return None
+        model_name, temperature = self._model_identity(self.provider, agent)
+        return ResponseCache.make_key(
+            self.provider, model_name, temperature, system_prompt, messages, kwargs
+        )
+    
+    def _to_lc_messages(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str]
+    ) -> List[BaseMessage]:
+        """Convert message dictionaries to LangChain messages."""
+        lc_messages: List[BaseMessage] = []
+        
+        if system_prompt:
+            lc_messages.append(SystemMessage(content=system_prompt))
+        
+        for msg in messages:
+            if msg["role"] == "user":
+                lc_messages.append(HumanMessage(content=msg["content"]))
+            elif msg["role"] == "assistant":
+                lc_messages.append(AIMessage(content=msg["content"]))
+            elif msg["role"] == "system":
+                lc_messages.append(SystemMessage(content=msg["content"]))
+        
+        return lc_messages
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get response cache, coalescing, scheduling, hedging and streaming latency statistics.
+        
+        Returns:
+            Provider, models per agent, per-agent cache hit rates, coalesced calls, queue times
+            per priority class, per-provider latency histograms and
+            time-to-first-token percentiles
+        """
+        first_token_ms = list(self._first_token_ms)
+        stream_ms = list(self._stream_ms)
+        return {
+            "provider": self.provider,
+            "models": {
+                "default": default_model(self.provider),
+                **{agent: self._model_name(self.provider, agent) for agent in self.routes},
+            },
+            "pooled_clients": pooled_models(),
+            "response_cache": self.response_cache.stats() if self.response_cache else None,
+            "coalescing": self.flight.stats(),
+            "scheduler": self.scheduler.stats() if self.scheduler else None,
+            "hedging": self.hedging.stats(),
+            "streaming": {
+                "streams": len(stream_ms),
+                "first_token_ms_p50": round(percentile(first_token_ms, 50), 2),
+                "first_token_ms_p95": round(percentile(first_token_ms, 95), 2),
+                "total_ms_p50": round(percentile(stream_ms, 50), 2),
+                "total_ms_p95": round(percentile(stream_ms, 95), 2),
+            },
+        }
+    
     async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for texts.
@@ -122,13 +614,25 @@ class LLMService(LoggerMixin):
         raise NotImplementedError("Embeddings generation not yet implemented")
 
 
-# Global service instance
-_llm_service: Optional[LLMService] = None
+# Global service instances, one per provider
+_llm_services: Dict[str, LLMService] = {}
+# Warm-up builds the agents (and these services) in a worker thread
+_llm_services_lock = threading.Lock()
 
 
 def get_llm_service(provider: Optional[str] = None) -> LLMService:
-    """Get or create LLM service instance."""
-    global _llm_service
-    if _llm_service is None or (provider and provider != _llm_service.provider):
-        _llm_service = LLMService(provider=provider)
-    return _llm_service
+    """Get or create the LLM service of a provider (default: settings.default_llm_provider)."""
+    provider = provider or settings.default_llm_provider
+    service = _llm_services.get(provider)
+    if service is None:
+        with _llm_services_lock:
+            service = _llm_services.get(provider)
+            if service is None:
+                service = LLMService(provider=provider)
+                _llm_services[provider] = service
+    return service
+
+
+def peek_llm_service(provider: Optional[str] = None) -> Optional[LLMService]:
+    """Get the LLM service of a provider if it was already created (never creates it)."""
+    return _llm_services.get(provider or settings.default_llm_provider)
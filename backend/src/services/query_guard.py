@@ -0,0 +1,380 @@
+"""
+Query cost estimator and admission guard for ad-hoc gold queries.
+
+Every ad-hoc query (analytics API, MCP tools, agents) is analyzed before it
+reaches Cosmos DB. Its cost is estimated from the partition catalog and from
+the request charges observed for the same query shape, then the caller's
+limits decide whether to run it as-is, add a TOP clause, route it to a
+pre-aggregated path, or reject it.
+"""
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import threading
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from src.utils import LoggerMixin, settings
+from src.utils.query_analyzer import QueryAnalysis, QueryClass, analyze_query, apply_top
+from src.utils.slow_query_log import normalize_query
+
+
+class QueryRejectedError(ValueError):
+    """Raised when a query exceeds the caller's admission limits."""
+
+    def __init__(self, message: str, decision: "AdmissionDecision"):
+        super().__init__(message)
+        self.decision = decision
+
+
+class AdmissionAction(str, Enum):
+    """What the guard decided to do with a query."""
+    ADMIT = "admit"
+    LIMIT = "limit"
+    ROUTE = "route"
+    REJECT = "reject"
+
+
+class AdmissionDecision(BaseModel):
+    """Outcome of the pre-flight check for one query."""
+
+    action: AdmissionAction
+    caller: str
+    query: str
+    query_class: QueryClass
+    estimated_documents: int
+    estimated_ru: float
+    max_ru: float
+    reason: str = ""
+
+
+class PartitionCatalog(LoggerMixin):
+    """
+    Document counts per (pkType, pkFilter) for the gold container.
+
+    Loaded from a JSON file of the form {"repay:settlement": {"20251122": 1200, ...}}
+    and refreshed from Cosmos DB with a GROUP BY over the partition key.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the partition catalog.
+
+        Args:
+            path: Optional JSON file to load counts from and save them to
+        """
+        self.path = path
+        self._counts: Dict[str, Dict[str, int]] = {}
+        if path and Path(path).exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+                self._counts = {
+                    pk_type: {str(pk_filter): int(count) for pk_filter, count in filters.items()}
+                    for pk_type, filters in raw.items()
+                }
+            except (OSError, ValueError) as e:
+                self._counts = {}
+                self.logger.warning(f"Failed to load partition catalog {path}: {e}")
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether the catalog has any counts."""
+        return not self._counts
+
+    def update(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Replace counts from rows of {"pkType", "pkFilter", "cnt"}.
+
+        Args:
+            rows: Result of the partition count query
+        """
+        counts: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            pk_type = row.get("pkType")
+            if pk_type is None:
+                continue
+            counts.setdefault(str(pk_type), {})[str(row.get("pkFilter"))] = int(row.get("cnt", 0))
+        self._counts = counts
+
+    def save(self) -> None:
+        """Write the counts to the catalog file."""
+        if not self.path:
+            return
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self._counts, f)
+
+    def total(self) -> Optional[int]:
+        """Total documents in the container, if known."""
+        if self.is_empty:
+            return None
+        return sum(sum(filters.values()) for filters in self._counts.values())
+
+    def count(
+        self,
+        pk_type: str,
+        pk_filter: Optional[str] = None,
+        pk_filter_range: Optional[Tuple[str, str]] = None
+    ) -> Optional[int]:
+        """
+        Count documents under a pkType, optionally narrowed by pkFilter.
+
+        Args:
+            pk_type: Partition type
+            pk_filter: Exact pkFilter value
+            pk_filter_range: (operator, bound) comparison on pkFilter
+
+        Returns:
+            Document count, or None if the pkType is not in the catalog
+        """
+        filters = self._counts.get(pk_type)
+        if filters is None:
+            return None
+        if pk_filter is not None:
+            return filters.get(str(pk_filter), 0)
+        if pk_filter_range is None:
+            return sum(filters.values())
+
+        operator, bound = pk_filter_range
+        return sum(
+            count for value, count in filters.items()
+            if _compare(value, operator, bound)
+        )
+
+
+def _compare(value: str, operator: str, bound: str) -> bool:
+    """Compare pkFilter values numerically when possible (dates like 20251122)."""
+    try:
+        left: Any = float(value)
+        right: Any = float(bound)
+    except ValueError:
+        left, right = value, bound
+    if operator == ">=":
+        return left >= right
+    if operator == "<=":
+        return left <= right
+    if operator == ">":
+        return left > right
+    return left < right
+
+
+class QueryAdmissionGuard(LoggerMixin):
+    """Pre-flight analyzer that enforces per-caller cost limits on gold queries."""
+
+    def __init__(self, catalog: Optional[PartitionCatalog] = None):
+        """
+        Initialize the admission guard.
+
+        Args:
+            catalog: Partition catalog (default: loaded from settings.partition_catalog_path)
+        """
+        self.catalog = catalog or PartitionCatalog(settings.partition_catalog_path or None)
+        self._observed_ru: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        # Optional hook that rewrites an aggregate query to a pre-aggregated source.
+        # Returns the replacement query, or None when no pre-aggregate covers it.
+        self.preaggregated_router: Optional[Callable[[QueryAnalysis], Optional[str]]] = None
+
+    def max_ru_for(self, caller: str) -> float:
+        """
+        Get the per-query RU limit for a caller.
+
+        Callers are matched exactly first, then by the part before ':'
+        (so 'tool:analytics' falls back to 'tool').
+        """
+        limits = settings.query_guard_caller_limits
+        if caller in limits:
+            return limits[caller]
+        return limits.get(caller.split(":", 1)[0], settings.query_guard_default_max_ru)
+
+    def observe(
+        self,
+        query: str,
+        parameters: Optional[List[Dict[str, Any]]],
+        request_charge: float
+    ) -> None:
+        """
+        Record the actual request charge of an executed query.
+
+        Args:
+            query: SQL query text that was executed
+            parameters: Query parameters
+            request_charge: Total RU charged across all pages
+        """
+        key = self._telemetry_key(analyze_query(query, parameters))
+        with self._lock:
+            previous = self._observed_ru.get(key)
+            # Exponentially weighted so the estimate follows data growth
+            self._observed_ru[key] = (
+                request_charge if previous is None else 0.7 * previous + 0.3 * request_charge
+            )
+
+    @staticmethod
+    def _telemetry_key(analysis: QueryAnalysis) -> str:
+        """Key observed charges by query shape and the pkTypes it touches."""
+        return f"{normalize_query(analysis.query)}|{','.join(sorted(analysis.pk_types))}"
+
+    def estimate_documents(self, analysis: QueryAnalysis) -> int:
+        """
+        Estimate how many documents a query has to read.
+
+        Args:
+            analysis: Query analysis
+
+        Returns:
+            Estimated number of documents scanned
+        """
+        default_partition = settings.query_guard_default_partition_documents
+
+        if analysis.query_class == QueryClass.POINT_READ:
+            documents = 1
+        elif analysis.query_class == QueryClass.SINGLE_PARTITION:
+            documents = self.catalog.count(analysis.pk_types[0], analysis.pk_filter)
+            if documents is None:
+                documents = default_partition
+        elif analysis.query_class in (QueryClass.PREFIX, QueryClass.FAN_OUT):
+            documents = 0
+            for pk_type in analysis.pk_types:
+                count = self.catalog.count(pk_type, pk_filter_range=analysis.pk_filter_range)
+                documents += count if count is not None else default_partition * 30
+        else:
+            total = self.catalog.total()
+            documents = total if total is not None else settings.query_guard_default_total_documents
+
+        # TOP caps the read unless every document has to be aggregated first
+        if analysis.top is not None and not analysis.has_aggregate:
+            documents = min(documents, analysis.top)
+
+        return documents
+
+    def estimate_ru(self, analysis: QueryAnalysis) -> Tuple[int, float]:
+        """
+        Estimate the request charge of a query.
+
+        Observed charges for the same query shape take precedence over the
+        catalog based estimate.
+
+        Returns:
+            Tuple of (estimated documents, estimated RU)
+        """
+        documents = self.estimate_documents(analysis)
+
+        with self._lock:
+            observed = self._observed_ru.get(self._telemetry_key(analysis))
+        if observed is not None:
+            return documents, observed
+
+        if analysis.query_class == QueryClass.POINT_READ:
+            return documents, 1.0
+        return documents, 2.5 + documents * settings.query_guard_ru_per_document
+
+    def admit(
+        self,
+        query: str,
+        parameters: Optional[List[Dict[str, Any]]] = None,
+        caller: str = "api"
+    ) -> AdmissionDecision:
+        """
+        Decide whether and how a query may run.
+
+        Args:
+            query: SQL query text
+            parameters: Query parameters
+            caller: Caller identity used to pick limits ('api', 'tool:<name>', 'agent')
+
+        Returns:
+            Admission decision; decision.query is the query to execute
+
+        Raises:
+            QueryRejectedError: If the query cannot be brought within the caller's limits
+        """
+        analysis = analyze_query(query, parameters)
+        documents, estimated_ru = self.estimate_ru(analysis)
+        max_ru = self.max_ru_for(caller)
+        max_rows = settings.query_guard_max_rows
+
+        decision = AdmissionDecision(
+            action=AdmissionAction.ADMIT,
+            caller=caller,
+            query=query,
+            query_class=analysis.query_class,
+            estimated_documents=documents,
+            estimated_ru=round(estimated_ru, 2),
+            max_ru=max_ru,
+        )
+
+        # Unbounded scans get a row cap even when they fit the budget
+        unbounded = analysis.query_class in (
+            QueryClass.PREFIX, QueryClass.FAN_OUT, QueryClass.FULL_SCAN
+        )
+        # An existing TOP or OFFSET ... LIMIT above the row cap can be lowered in place
+        over_limit = (
+            analysis.top is not None and analysis.top > max_rows and not analysis.has_aggregate
+        )
+        if estimated_ru <= max_ru:
+            if unbounded and analysis.can_add_top:
+                decision.action = AdmissionAction.LIMIT
+                decision.query = apply_top(query, max_rows)
+                decision.reason = f"added TOP {max_rows} to unbounded {analysis.query_class.value}"
+            elif over_limit:
+                decision.action = AdmissionAction.LIMIT
+                decision.query = apply_top(query, max_rows)
+                decision.reason = f"reduced row limit to {max_rows}"
+            return self._log(decision)
+
+        if analysis.has_aggregate and self.preaggregated_router is not None:
+            routed = self.preaggregated_router(analysis)
+            if routed:
+                decision.action = AdmissionAction.ROUTE
+                decision.query = routed
+                decision.reason = "routed to pre-aggregated data"
+                return self._log(decision)
+
+        if analysis.can_add_top or over_limit:
+            limited = analysis.model_copy(update={"top": max_rows, "query": apply_top(query, max_rows)})
+            documents, estimated_ru = self.estimate_ru(limited)
+            if estimated_ru <= max_ru:
+                decision.action = AdmissionAction.LIMIT
+                decision.query = limited.query
+                decision.estimated_documents = documents
+                decision.estimated_ru = round(estimated_ru, 2)
+                decision.reason = f"limited to {max_rows} rows to stay within {max_ru} RU"
+                return self._log(decision)
+
+        decision.action = AdmissionAction.REJECT
+        decision.reason = (
+            f"{analysis.query_class.value} query estimated at {decision.estimated_ru} RU "
+            f"(~{decision.estimated_documents} documents) exceeds the {max_ru} RU limit for "
+            f"'{caller}'; filter on c.pkType and c.pkFilter or add TOP"
+        )
+        self._log(decision)
+        raise QueryRejectedError(decision.reason, decision)
+
+    def _log(self, decision: AdmissionDecision) -> AdmissionDecision:
+        """Log an admission decision."""
+        message = (
+            f"Query admission [{decision.caller}]: {decision.action.value} "
+            f"{decision.query_class.value}, ~{decision.estimated_ru} RU"
+        )
+        if decision.reason:
+            message += f" ({decision.reason})"
+        if decision.action == AdmissionAction.REJECT:
+            self.logger.warning(message)
+        else:
+            self.logger.info(message)
+        return decision
+
+
+# Global guard instance
+_query_guard: Optional[QueryAdmissionGuard] = None
+
+
+def get_query_guard() -> QueryAdmissionGuard:
+    """Get or create query admission guard instance."""
+    global _query_guard
+    if _query_guard is None:
+        _query_guard = QueryAdmissionGuard()
+    return _query_guard
@@ -2,14 +2,29 @@
 RAG (Retrieval-Augmented Generation) service for context-aware responses.
 """
 from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import threading
 
+import numpy as np
 import chromadb
 from chromadb.config import Settings as ChromaSettings
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 
-from src.utils import LoggerMixin, settings
+from src.services.embedding_backends import create_embeddings, embedding_cache_namespace
+from src.services.context_packer import ContextPacker
+from src.services.embedding_cache import CachedEmbeddings
+from src.services.flat_index import FlatVectorIndex
+from src.services.indexing_pipeline import IndexingPipeline, ProgressCallback
+from src.services.lexical_index import BM25Index, reciprocal_rank_fusion
+from src.utils import (
+    BoundedExecutor,
+    LoggerMixin,
+    SingleFlight,
+    flight_key,
+    get_token_counter,
+    settings,
+)
+from src.utils.metadata_filter import normalize_where
 
 
 class RAGService(LoggerMixin):
@@ -19,11 +34,19 @@ class RAGService(LoggerMixin):
         """Initialize RAG service with vector store and embeddings."""
         self.embeddings = None
         self.vector_store = None
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
+        self.collection = None
+        self.lexical_index: Optional[BM25Index] = None
+        self.indexing_pipeline: Optional[IndexingPipeline] = None
+        
+        # Query embedding + ANN lookup run here so concurrent searches overlap
+        self.search_executor = BoundedExecutor(
+            "rag-search",
+            settings.rag_search_workers,
+            max_queue=settings.rag_search_max_queue,
+            queue_timeout=settings.rag_search_queue_timeout_ms / 1000
         )
+        # Concurrent identical searches share one execution
+        self.search_flight = SingleFlight("rag-search")
         
         if settings.rag_enabled:
             self._initialize()
@@ -34,12 +57,28 @@ class RAGService(LoggerMixin):
             self.logger.info("Initializing RAG service")
             
             # Initialize embeddings
-            self.embeddings = HuggingFaceEmbeddings(
+            normalize_embeddings = True
+            self.embeddings = create_embeddings(
                 model_name=settings.embedding_model,
-                model_kwargs={'device': 'cpu'},
-                encode_kwargs={'normalize_embeddings': True}
+                backend=settings.embedding_backend,
+                normalize=normalize_embeddings,
+                num_threads=settings.embedding_num_threads,
+                onnx_int8_file=settings.embedding_onnx_int8_file
             )
             
+            # Skip model inference for text that was already embedded
+            if settings.embedding_cache_enabled:
+                self.embeddings = CachedEmbeddings(
+                    self.embeddings,
+                    model_name=embedding_cache_namespace(
+                        settings.embedding_model, settings.embedding_backend
+                    ),
+                    normalize=normalize_embeddings,
+                    path=settings.embedding_cache_path or None,
+                    memory_size=settings.embedding_cache_memory_size,
+                    disk_max_entries=settings.embedding_cache_max_entries
+                )
+            
             # Initialize vector store
             if settings.vector_store_type == "chromadb":
                 chroma_client = chromadb.PersistentClient(
@@ -51,10 +90,26 @@ class RAGService(LoggerMixin):
                     client=chroma_client,
                     collection_name="knowledge_base",
                     embedding_function=self.embeddings,
+                    # Squared L2 between unit vectors is 2 - 2cos, so this is cosine similarity
+                    relevance_score_fn=lambda distance: 1.0 - distance / 2,
                 )
+                
+                # Same collection, written directly with precomputed vectors
+                self.collection = chroma_client.get_or_create_collection(name="knowledge_base")
+            elif settings.vector_store_type == "numpy":
+                # Exact search over a memory-mapped matrix; also serves as the collection
+                self.vector_store = FlatVectorIndex(settings.vector_store_path)
+                self.collection = self.vector_store
             else:
                 raise ValueError(f"Unsupported vector store: {settings.vector_store_type}")
             
+            self.indexing_pipeline = IndexingPipeline(self.embeddings, self.collection)
+            
+            # Lexical index for exact identifiers, fused with vector results
+            if settings.rag_hybrid_enabled:
+                self.lexical_index = BM25Index.from_collection(self.collection)
+                self.indexing_pipeline.lexical_index = self.lexical_index
+            
             self.logger.info("RAG service initialized successfully")
             
         except Exception as e:
@@ -64,41 +119,26 @@ class RAGService(LoggerMixin):
     async def add_documents(
         self,
         texts: List[str],
-        metadatas: Optional[List[Dict[str, Any]]] = None
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        on_progress: Optional[ProgressCallback] = None
     ) -> List[str]:
         """
         Add documents to the vector store.
         
+        Chunking, embedding and writes run off the event loop in batches.
+        
         Args:
             texts: List of text documents to add
             metadatas: Optional metadata for each document
+            on_progress: Optional callback receiving IndexingProgress updates
             
         Returns:
             List of document IDs
         """
         try:
-            # Split documents into chunks
-            chunks = []
-            chunk_metadatas = []
-            
-            for i, text in enumerate(texts):
-                text_chunks = self.text_splitter.split_text(text)
-                chunks.extend(text_chunks)
-                
-                # Add metadata for each chunk
-                base_metadata = metadatas[i] if metadatas else {}
-                chunk_metadatas.extend([
-                    {**base_metadata, "chunk_index": j}
-                    for j in range(len(text_chunks))
-                ])
-            
-            # Add to vector store
-            ids = self.vector_store.add_texts(
-                texts=chunks,
-                metadatas=chunk_metadatas
-            )
+            ids = await self.indexing_pipeline.index(texts, metadatas, on_progress=on_progress)
             
-            self.logger.info(f"Added {len(chunks)} chunks to vector store")
+            self.logger.info(f"Added {len(ids)} chunks to vector store")
             return ids
             
         except Exception as e:
@@ -109,87 +149,246 @@ class RAGService(LoggerMixin):
         self,
         query: str,
         k: Optional[int] = None,
-        filter: Optional[Dict[str, Any]] = None
+        filter: Optional[Dict[str, Any]] = None,
+        score_threshold: Optional[float] = None
     ) -> List[Tuple[str, float, Dict[str, Any]]]:
         """
         Search for similar documents.
         
+        With hybrid retrieval enabled, vector and BM25 candidates are fused by
+        reciprocal rank for ordering. The score is always the cosine similarity
+        to the query.
+        
+        The metadata filter is pushed down into each index and applied before
+        top-k selection, so a filtered search returns up to k matching chunks.
+        
         Args:
             query: Search query
             k: Number of results to return
-            filter: Optional metadata filter
+            filter: Optional Chroma-style metadata filter ($eq, $in, $gte, $and, ...)
+            score_threshold: Minimum cosine similarity for vector candidates
+                (default: settings.rag_similarity_threshold)
             
         Returns:
             List of tuples (text, score, metadata)
         """
         try:
-            top_k = k or settings.rag_top_k
-            
-            # Perform similarity search with scores
-            results = self.vector_store.similarity_search_with_score(
-                query=query,
-                k=top_k,
-                filter=filter
-            )
-            
-            # Filter by similarity threshold
-            filtered_results = [
-                (doc.page_content, score, doc.metadata)
-                for doc, score in results
-                if score >= settings.rag_similarity_threshold
-            ]
+            results = await self._search(query, k or settings.rag_top_k, filter, score_threshold)
             
             self.logger.info(
-                f"Found {len(filtered_results)} relevant documents for query"
+                f"Found {len(results)} relevant documents for query"
             )
-            return filtered_results
+            return [(text, score, metadata) for _, text, score, metadata in results]
             
         except Exception as e:
             self.logger.error(f"Failed to perform similarity search: {e}")
             raise
     
+    async def _search(
+        self,
+        query: str,
+        k: int,
+        filter: Optional[Dict[str, Any]],
+        score_threshold: Optional[float] = None
+    ) -> List[Tuple[str, str, float, Dict[str, Any]]]:
+        """Dense or hybrid search, as (id, text, score, metadata)."""
+        where = normalize_where(filter)
+        if score_threshold is None:
+            score_threshold = settings.rag_similarity_threshold
+        
+        async def search() -> List[Tuple[str, str, float, Dict[str, Any]]]:
+            if self.lexical_index is None:
+                return await self.search_executor.run(self._dense_search, query, k, where, score_threshold)
+            return await self._hybrid_search(query, k, where, score_threshold)
+        
+        return await self.search_flight.do(
+            flight_key(query, k, where, score_threshold), search, share=list
+        )
+    
+    def _dense_search(
+        self,
+        query: str,
+        k: int,
+        filter: Optional[Dict[str, Any]],
+        score_threshold: float
+    ) -> List[Tuple[str, str, float, Dict[str, Any]]]:
+        """Vector search above the similarity threshold, as (id, text, score, metadata)."""
+        if isinstance(self.vector_store, FlatVectorIndex):
+            results = self.vector_store.query(self.embeddings.embed_query(query), k, where=filter)
+        else:
+            results = [
+                (doc.id, doc.page_content, score, doc.metadata)
+                for doc, score in self.vector_store.similarity_search_with_relevance_scores(
+                    query=query,
+                    k=k,
+                    filter=filter
+                )
+            ]
+        return [result for result in results if result[2] >= score_threshold]
+    
+    async def _hybrid_search(
+        self,
+        query: str,
+        k: int,
+        filter: Optional[Dict[str, Any]],
+        score_threshold: float
+    ) -> List[Tuple[str, str, float, Dict[str, Any]]]:
+        """
+        Fuse vector and BM25 candidates by reciprocal rank.
+        
+        Chunks found only by BM25 must reach settings.rag_lexical_min_score, so
+        a query sharing a common word with a chunk does not pull it in. The
+        fused rank only orders the results; each keeps its cosine similarity.
+        """
+        candidates = max(k, settings.rag_hybrid_candidates)
+        dense, lexical = await asyncio.gather(
+            self.search_executor.run(self._dense_search, query, candidates, filter, score_threshold),
+            self.search_executor.run(self.lexical_index.search, query, candidates, filter),
+        )
+        
+        chunks = {chunk_id: (text, score, metadata) for chunk_id, text, score, metadata in dense}
+        lexical = [
+            (chunk_id, score) for chunk_id, score in lexical
+            if chunk_id in chunks or score >= settings.rag_lexical_min_score
+        ]
+        fused = reciprocal_rank_fusion(
+            [[chunk_id for chunk_id, _, _, _ in dense], [chunk_id for chunk_id, _ in lexical]],
+            k=settings.rag_rrf_k
+        )[:k]
+        
+        missing = [chunk_id for chunk_id, _ in fused if chunk_id not in chunks]
+        if missing:
+            chunks.update(await self.search_executor.run(self._load_lexical_hits, query, missing))
+        
+        return [
+            (chunk_id, chunks[chunk_id][0], chunks[chunk_id][1], chunks[chunk_id][2])
+            for chunk_id, _ in fused
+            if chunk_id in chunks
+        ]
+    
+    def _load_lexical_hits(
+        self,
+        query: str,
+        ids: List[str]
+    ) -> Dict[str, Tuple[str, float, Dict[str, Any]]]:
+        """Load lexical-only hits from the collection with their cosine similarity to the query."""
+        found = self.collection.get(ids=ids, include=["documents", "metadatas", "embeddings"])
+        embeddings = found.get("embeddings")
+        similarities = [0.0] * len(found["ids"])
+        if embeddings is not None and len(embeddings):
+            query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+            vectors = np.asarray(embeddings, dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_vector)
+            similarities = (vectors @ query_vector / np.maximum(norms, 1e-12)).tolist()
+        return {
+            chunk_id: (text, float(similarity), metadata or {})
+            for chunk_id, text, metadata, similarity in zip(
+                found["ids"], found["documents"], found["metadatas"], similarities
+            )
+        }
+    
+    def _candidate_vectors(
+        self,
+        query: str,
+        candidates: List[Tuple[str, str, float, Dict[str, Any]]]
+    ) -> Tuple[List[float], List[List[float]]]:
+        """Query embedding and stored embeddings for retrieved chunks."""
+        query_vector = self.embeddings.embed_query(query)
+        
+        ids = [chunk_id for chunk_id, _, _, _ in candidates]
+        stored = self.collection.get(ids=ids, include=["embeddings"])
+        embeddings = stored.get("embeddings")
+        by_id = dict(zip(stored["ids"], embeddings if embeddings is not None else []))
+        missing = [text for chunk_id, text, _, _ in candidates if chunk_id not in by_id]
+        # Chunks written without an id mapping are re-embedded (usually cache hits)
+        fallback = iter(self.embeddings.embed_documents(missing)) if missing else iter(())
+        vectors = [
+            list(by_id[chunk_id]) if chunk_id in by_id else next(fallback)
+            for chunk_id, _, _, _ in candidates
+        ]
+        return query_vector, vectors
+    
+    async def warm_up(self) -> None:
+        """
+        Run one encode and one search so the first request does not pay
+        for first-inference and index loading costs.
+        """
+        if self.vector_store is None:
+            raise RuntimeError("RAG service is not initialized")
+        
+        # Bypass the embedding cache so the model itself runs
+        model = self.embeddings.embeddings if isinstance(self.embeddings, CachedEmbeddings) else self.embeddings
+        await self.search_executor.run(model.embed_query, "warm-up query")
+        await self.similarity_search("warm-up query", k=1)
+        self.logger.info("RAG service warmed up")
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get executor and embedding cache statistics.
+        
+        Returns:
+            Queue depth and latency for search and embedding executors,
+            coalesced searches, plus embedding cache hit rates when the
+            cache is enabled
+        """
+        stats: Dict[str, Any] = {
+            "search": self.search_executor.stats(),
+            "search_coalescing": self.search_flight.stats(),
+        }
+        if self.indexing_pipeline is not None:
+            stats["embedding"] = self.indexing_pipeline.embedding_executor.stats()
+        if isinstance(self.embeddings, CachedEmbeddings):
+            stats["embedding_cache"] = self.embeddings.stats()
+        return stats
+    
     async def get_relevant_context(
         self,
         query: str,
         k: Optional[int] = None,
-        max_tokens: int = 2000
+        max_tokens: int = 2000,
+        filter: Optional[Dict[str, Any]] = None
     ) -> Tuple[str, List[Dict[str, Any]]]:
         """
         Get relevant context for a query.
         
+        Over-fetches candidates, reorders them by MMR to drop near-duplicate
+        chunks, strips overlap shared by adjacent chunks and packs them up to
+        an exact token budget for the configured LLM.
+        
         Args:
             query: User query
-            k: Number of documents to retrieve
-            max_tokens: Maximum tokens in context (approximate)
+            k: Maximum number of chunks in the context
+            max_tokens: Maximum tokens in context, separators included
+            filter: Optional metadata filter
             
         Returns:
             Tuple of (context_string, source_documents)
         """
         try:
-            results = await self.similarity_search(query, k=k)
+            top_k = k or settings.rag_top_k
+            candidates = await self._search(
+                query, top_k * max(1, settings.rag_context_candidate_factor), filter
+            )
             
-            if not results:
+            if not candidates:
                 return "", []
             
-            # Build context string with token limit
-            context_parts = []
-            sources = []
-            total_chars = 0
-            max_chars = max_tokens * 4  # Rough estimate: 1 token ≈ 4 chars
-            
-            for text, score, metadata in results:
-                if total_chars + len(text) > max_chars:
-                    break
-                
-                context_parts.append(text)
-                sources.append({
-                    "text": text[:200] + "..." if len(text) > 200 else text,
-                    "score": float(score),
-                    "metadata": metadata
-                })
-                total_chars += len(text)
-            
-            context = "\n\n---\n\n".join(context_parts)
+            query_vector, vectors = await self.search_executor.run(
+                self._candidate_vectors, query, candidates
+            )
+            packer = ContextPacker(
+                get_token_counter(),
+                mmr_lambda=settings.rag_context_mmr_lambda,
+                dedup_threshold=settings.rag_context_dedup_threshold,
+                max_overlap=settings.rag_chunk_overlap
+            )
+            context, sources = packer.pack(
+                candidates,
+                max_tokens,
+                query_vector=query_vector,
+                vectors=vectors,
+                max_chunks=top_k
+            )
             
             self.logger.info(f"Generated context with {len(sources)} sources")
             return context, sources
@@ -202,23 +401,34 @@ class RAGService(LoggerMixin):
         self,
         ids: Optional[List[str]] = None,
         filter: Optional[Dict[str, Any]] = None
-    ) -> None:
+    ) -> int:
         """
         Delete documents from vector store.
         
         Args:
             ids: Specific document IDs to delete
-            filter: Metadata filter for documents to delete
+            filter: Metadata filter for documents to delete, e.g. {"source_id": "doc-1"};
+                combined with ids, only the listed ids that match are deleted
+            
+        Returns:
+            Number of chunks deleted
         """
         try:
-            if ids:
-                self.vector_store.delete(ids=ids)
-                self.logger.info(f"Deleted {len(ids)} documents")
-            elif filter:
-                # Delete by filter (implementation depends on vector store)
-                self.logger.warning("Delete by filter not fully implemented")
-            else:
+            if not ids and not filter:
                 self.logger.warning("No IDs or filter provided for deletion")
+                return 0
+            
+            # Resolve to stored ids, so the count excludes unknown ids and the
+            # lexical index stays in sync with filter deletes
+            where = normalize_where(filter) if filter else None
+            found = await self.search_executor.run(
+                lambda: self.collection.get(ids=ids or None, where=where, include=[])
+            )
+            ids = found.get("ids") or []
+            
+            await asyncio.to_thread(self.indexing_pipeline.delete, ids)
+            self.logger.info(f"Deleted {len(ids)} documents")
+            return len(ids)
                 
         except Exception as e:
             self.logger.error(f"Failed to delete documents: {e}")
@@ -227,11 +437,20 @@ class RAGService(LoggerMixin):
 
 # Global service instance
 _rag_service: Optional[RAGService] = None
+# Warm-up builds the service in a worker thread while requests may ask for it
+_rag_service_lock = threading.Lock()
 
 
 def get_rag_service() -> RAGService:
     """Get or create RAG service instance."""
     global _rag_service
     if _rag_service is None:
-        _rag_service = RAGService()
+        with _rag_service_lock:
+            if _rag_service is None:
+                _rag_service = RAGService()
+    return _rag_service
+
+
+def peek_rag_service() -> Optional[RAGService]:
+    """Get the RAG service instance if it was already created (never creates it)."""
     return _rag_service
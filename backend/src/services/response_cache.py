@@ -0,0 +1,252 @@
+"""
+Exact-match cache for LLM responses.
+
+Keys are a SHA-256 over the provider, model, temperature, system prompt,
+the normalized message list and any extra generation arguments, so only
+byte-identical requests (modulo surrounding whitespace and line endings)
+share an entry. Two tiers:
+
+- an in-memory LRU of recent responses
+- a SQLite file that keeps responses across restarts
+
+Every entry carries an expiry time. Caching is opt-in per agent, each with
+its own TTL, and hit rates are tracked per agent.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from src.utils import LoggerMixin, settings
+
+
+def parse_agent_ttls(spec: str, default_ttl: int) -> Dict[str, int]:
+    """
+    Parse the per-agent opt-in list.
+
+    Args:
+        spec: Comma-separated ``Agent`` or ``Agent:ttl_seconds`` entries
+        default_ttl: TTL for entries without an explicit one
+
+    Returns:
+        Mapping of agent name to TTL in seconds
+    """
+    ttls: Dict[str, int] = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _, ttl = entry.partition(":")
+        ttls[name.strip()] = int(ttl) if ttl.strip() else default_ttl
+    return ttls
+
+
+def _normalize_text(text: Optional[str]) -> str:
+    """Normalize line endings and surrounding whitespace."""
+    return (text or "").replace("\r\n", "\n").strip()
+
+
+class ResponseCache(LoggerMixin):
+    """LLM response cache with an in-memory LRU tier in front of a SQLite tier."""
+
+    def __init__(
+        self,
+        agent_ttls: Dict[str, int],
+        path: Optional[str] = None,
+        memory_size: int = 1000
+    ):
+        """
+        Initialize the response cache.
+
+        Args:
+            agent_ttls: Agents that opted in, with their TTL in seconds
+            path: SQLite file for the disk tier (None keeps the cache in memory only)
+            memory_size: Maximum number of responses kept in the LRU tier
+        """
+        self.agent_ttls = agent_ttls
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        if path:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                    "agent TEXT, expires_at REAL NOT NULL)"
+                )
+                self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self.logger.warning(f"LLM response disk cache unavailable, using memory only: {e}")
+                self._conn = None
+
+    def enabled_for(self, agent: Optional[str]) -> bool:
+        """Whether an agent opted in to response caching."""
+        return agent is not None and agent in self.agent_ttls
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: str,
+        temperature: Optional[float],
+        system_prompt: Optional[str],
+        messages: List[Dict[str, str]],
+        extra: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Build the cache key for a request.
+
+        Args:
+            provider: LLM provider
+            model: Model or deployment name
+            temperature: Sampling temperature
+            system_prompt: System prompt
+            messages: Messages with 'role' and 'content'
+            extra: Additional generation arguments
+
+        Returns:
+            Hex digest identifying the request
+        """
+        payload = {
+            "provider": provider,
+            "model": model,
+            "temperature": temperature,
+            "system": _normalize_text(system_prompt),
+            "messages": [
+                [msg.get("role", "").strip().lower(), _normalize_text(msg.get("content"))]
+                for msg in messages
+            ],
+            "extra": extra or {},
+        }
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _count(self, agent: str, field: str) -> None:
+        """Increment a per-agent counter (caller holds the lock)."""
+        counters = self._stats.setdefault(agent, {"hits": 0, "disk_hits": 0, "misses": 0})
+        counters[field] += 1
+
+    def _remember(self, key: str, response: str, expires_at: float) -> None:
+        """Put a response in the LRU tier (caller holds the lock)."""
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str, agent: str) -> Optional[str]:
+        """
+        Look a response up in memory, then on disk.
+
+        Args:
+            key: Cache key from make_key
+            agent: Calling agent, for hit-rate accounting
+
+        Returns:
+            Cached response, or None on a miss or expired entry
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self._count(agent, "hits")
+                    return entry[0]
+                del self._memory[key]
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT response, expires_at FROM responses WHERE key = ? AND expires_at > ?",
+                        (key, now)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    self.logger.warning(f"LLM response disk cache read failed: {e}")
+                    row = None
+                if row is not None:
+                    self._remember(key, row[0], row[1])
+                    self._count(agent, "hits")
+                    self._count(agent, "disk_hits")
+                    return row[0]
+
+            self._count(agent, "misses")
+            return None
+
+    def put(self, key: str, response: str, agent: str) -> None:
+        """
+        Store a response with the agent's TTL.
+
+        Args:
+            key: Cache key from make_key
+            response: Generated response text
+            agent: Agent that generated it
+        """
+        ttl = self.agent_ttls.get(agent)
+        if not ttl or ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+
+        with self._lock:
+            self._remember(key, response, expires_at)
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, response, agent, expires_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (key, response, agent, expires_at)
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    self.logger.warning(f"LLM response disk cache write failed: {e}")
+
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM responses")
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    self.logger.warning(f"LLM response disk cache clear failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit statistics per agent."""
+        with self._lock:
+            agents = {}
+            for agent, counters in self._stats.items():
+                total = counters["hits"] + counters["misses"]
+                agents[agent] = {
+                    **counters,
+                    "hit_rate": round(counters["hits"] / total, 4) if total else 0.0,
+                }
+            return {
+                "memory_entries": len(self._memory),
+                "agents": agents,
+            }
+
+
+# Global cache instance
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get or create the LLM response cache."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            agent_ttls=parse_agent_ttls(settings.llm_cache_agents, settings.llm_cache_ttl_seconds),
+            path=settings.llm_cache_path or None,
+            memory_size=settings.llm_cache_memory_size
+        )
+    return _response_cache
@@ -0,0 +1,168 @@
+"""
+Retention service for TTL-driven expiry of conversations and gold data.
+
+Containers are configured with TTL enabled but no default expiry
+(defaultTtl = -1), and individual items are stamped with a ``ttl`` according
+to policy. Cosmos DB then deletes expired items in the background using
+spare request units, instead of foreground delete loops.
+"""
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from azure.cosmos import PartitionKey
+
+from src.models import Conversation
+from src.utils import LoggerMixin, settings
+
+if TYPE_CHECKING:
+    from src.services.cosmos_service import CosmosDBService
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class RetentionService(LoggerMixin):
+    """Service for applying retention policies through Cosmos DB TTL."""
+
+    def __init__(self):
+        """Initialize retention policies from settings."""
+        self.deleted_conversation_days = settings.retention_deleted_conversation_days
+        self.gold_days: Dict[str, int] = dict(settings.retention_gold_days)
+        self.gold_default_days = settings.retention_gold_default_days
+
+    def configure_containers(self, cosmos_service: "CosmosDBService") -> List[str]:
+        """
+        Enable TTL (defaultTtl = -1) on containers that do not have it yet.
+
+        With defaultTtl = -1 nothing expires by default; only items that carry
+        their own ``ttl`` are removed.
+
+        Args:
+            cosmos_service: Initialized Cosmos DB service
+
+        Returns:
+            Names of the containers whose TTL setting was changed
+        """
+        if not cosmos_service.database:
+            self.logger.warning("Cosmos DB not configured, skipping TTL configuration")
+            return []
+
+        targets = [
+            (cosmos_service.conversations_container, PartitionKey(path="/partitionKey")),
+            (
+                cosmos_service.gold_container,
+                PartitionKey(path=["/pkType", "/pkFilter"], kind="MultiHash")
+            ),
+        ]
+
+        changed = []
+        for container, partition_key in targets:
+            if container is None:
+                continue
+            try:
+                properties = container.read()
+                if properties.get("defaultTtl") is not None:
+                    continue
+
+                cosmos_service.database.replace_container(
+                    container,
+                    partition_key=partition_key,
+                    indexing_policy=properties.get("indexingPolicy"),
+                    default_ttl=-1
+                )
+                changed.append(container.id)
+                self.logger.info(f"Enabled TTL on container: {container.id}")
+            except Exception as e:
+                self.logger.error(f"Failed to enable TTL on container {container.id}: {e}")
+
+        return changed
+
+    def stamp_deleted_conversation(self, conversation: Conversation) -> Conversation:
+        """
+        Mark a conversation as deleted and schedule its expiry.
+
+        Args:
+            conversation: Conversation being deleted
+
+        Returns:
+            The same conversation with status and ttl set
+        """
+        conversation.status = "deleted"
+        if self.deleted_conversation_days > 0:
+            conversation.ttl = self.deleted_conversation_days * SECONDS_PER_DAY
+        return conversation
+
+    def gold_ttl(self, item: Dict[str, Any], now: Optional[datetime] = None) -> Optional[int]:
+        """
+        Compute the ttl for a gold item from its pkType retention window.
+
+        When pkFilter is a YYYYMMDD business date the item expires that many
+        days after the date itself; otherwise after its last write.
+
+        Args:
+            item: Gold item with pkType and pkFilter
+            now: Current time (default: utcnow)
+
+        Returns:
+            ttl in seconds, or None if the pkType is kept forever
+        """
+        days = self.gold_days.get(str(item.get("pkType")), self.gold_default_days)
+        if not days or days <= 0:
+            return None
+
+        business_date = _parse_business_date(item.get("pkFilter"))
+        if business_date is None:
+            return days * SECONDS_PER_DAY
+
+        expires_at = business_date + timedelta(days=days)
+        remaining = (expires_at - (now or datetime.utcnow())).total_seconds()
+        # ttl must be positive; data already past retention expires right away
+        return max(1, int(remaining))
+
+    def stamp_gold_items(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Stamp ttl on gold items according to their pkType retention window.
+
+        Items that already carry a ttl are left unchanged.
+
+        Args:
+            items: Gold items about to be written
+
+        Returns:
+            The same items, with ttl set where a policy applies
+        """
+        now = datetime.utcnow()
+        stamped = 0
+        for item in items:
+            if "ttl" in item:
+                continue
+            ttl = self.gold_ttl(item, now)
+            if ttl is not None:
+                item["ttl"] = ttl
+                stamped += 1
+
+        if stamped:
+            self.logger.info(f"Stamped retention ttl on {stamped}/{len(items)} gold items")
+        return items
+
+
+def _parse_business_date(value: Any) -> Optional[datetime]:
+    """Parse a YYYYMMDD pkFilter value into a datetime."""
+    text = str(value) if value is not None else ""
+    if len(text) != 8 or not text.isdigit():
+        return None
+    try:
+        return datetime.strptime(text, "%Y%m%d")
+    except ValueError:
+        return None
+
+
+# Global service instance
+_retention_service: Optional[RetentionService] = None
+
+
+def get_retention_service() -> RetentionService:
+    """Get or create retention service instance."""
+    global _retention_service
+    if _retention_service is None:
+        _retention_service = RetentionService()
+    return _retention_service
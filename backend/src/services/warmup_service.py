@@ -0,0 +1,116 @@
+"""
+Startup warm-up for models, clients and the agent orchestrator.
+
+Loads the embedding model, vector store, LLM client and orchestrator during
+application startup instead of on the first chat request, runs a warm-up
+encode and search, and exposes readiness once everything is hot.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import time
+
+from src.services.llm_service import get_llm_service
+from src.services.rag_service import get_rag_service
+from src.utils import LoggerMixin, settings
+
+
+class WarmupService(LoggerMixin):
+    """Service that preloads components and tracks readiness."""
+
+    def __init__(self):
+        """Initialize warm-up state."""
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self.started = False
+        self.finished = False
+
+    @property
+    def ready(self) -> bool:
+        """Whether warm-up finished and no component failed."""
+        return self.finished and all(
+            component["status"] != "failed" for component in self.components.values()
+        )
+
+    async def _step(self, name: str, warm: Callable[[], Awaitable[Any]]) -> None:
+        """Run one warm-up step and record its status and duration."""
+        self.components[name] = {"status": "warming"}
+        start = time.perf_counter()
+        try:
+            await warm()
+            status = "warm"
+        except Exception as e:
+            self.logger.error(f"Warm-up of {name} failed: {e}")
+            self.components[name]["error"] = str(e)
+            status = "failed"
+        self.components[name].update({
+            "status": status,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+        })
+
+    async def _warm_rag(self) -> None:
+        """Load the embedding model and vector store, then encode and search once."""
+        rag_service = await asyncio.to_thread(get_rag_service)
+        await rag_service.warm_up()
+
+    async def _warm_llm(self) -> None:
+        """Create the default LLM client."""
+        llm_service = get_llm_service()
+        await asyncio.to_thread(llm_service.preload)
+
+    async def _warm_orchestrator(self) -> None:
+        """Build the agents and compile the workflow graph."""
+        # Imported here; agents depend on the service layer
+        from src.agents import get_orchestrator
+
+        await asyncio.to_thread(get_orchestrator)
+
+    async def warm_up(self) -> bool:
+        """
+        Preload all components.
+
+        The embedding model, vector store and LLM client load concurrently;
+        the orchestrator is built afterwards so its agents reuse them.
+
+        Returns:
+            True if every component is warm
+        """
+        self.started = True
+        start = time.perf_counter()
+        self.logger.info("Warming up models and clients")
+
+        steps = [self._step("llm", self._warm_llm)]
+        if settings.rag_enabled:
+            steps.append(self._step("rag", self._warm_rag))
+        await asyncio.gather(*steps)
+
+        await self._step("orchestrator", self._warm_orchestrator)
+
+        self.finished = True
+        elapsed = (time.perf_counter() - start) * 1000
+        if self.ready:
+            self.logger.info(f"Warm-up complete in {elapsed:.0f} ms")
+        else:
+            failed = [name for name, c in self.components.items() if c["status"] == "failed"]
+            self.logger.warning(f"Warm-up finished in {elapsed:.0f} ms with failures: {failed}")
+        return self.ready
+
+    def status(self) -> Dict[str, Any]:
+        """Get warm-up status for readiness checks."""
+        if not self.started:
+            state = "not_started"
+        elif not self.finished:
+            state = "warming"
+        else:
+            state = "ready" if self.ready else "failed"
+        return {"status": state, "components": self.components}
+
+
+# Global service instance
+_warmup_service: Optional[WarmupService] = None
+
+
+def get_warmup_service() -> WarmupService:
+    """Get or create warm-up service instance."""
+    global _warmup_service
+    if _warmup_service is None:
+        _warmup_service = WarmupService()
+    return _warmup_service
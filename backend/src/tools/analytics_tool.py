@@ -45,7 +45,10 @@ class AnalyticsTool(BaseMCPTool):
             
             # Fetch data if needed
             if data is None and query:
-                data = await self.cosmos_service.query_gold_data(query)
+                data = await self.cosmos_service.query_gold_data(
+                    query,
+                    caller=f"tool:{self.name}"
+                )
             
             if not data:
                 return {
@@ -4,6 +4,7 @@ Vector search MCP tool for RAG operations.
 from typing import Any, Dict, List
 
 from src.services import get_rag_service
+from src.utils.metadata_filter import normalize_where
 from .base_tool import BaseMCPTool
 
 
@@ -29,11 +30,14 @@ class VectorSearchTool(BaseMCPTool):
         """
         Execute vector search.
         
+        Filters are pushed down into the index and applied before top-k
+        selection, so a filtered search returns up to k matching documents.
+        
         Args:
             query: Search query
             k: Number of results to return
-            score_threshold: Minimum relevance score (0-1)
-            filters: Metadata filters to apply
+            score_threshold: Minimum vector similarity (0-1) for a candidate
+            filters: Metadata filters to apply (Chroma-style where clause)
             
         Returns:
             Search results with relevance scores
@@ -41,31 +45,26 @@ class VectorSearchTool(BaseMCPTool):
         try:
             self.logger.info(f"Executing vector search for query: {query[:50]}...")
             
-            # Perform similarity search
-            results = self.rag_service.similarity_search(query, k=k)
-            
-            # Filter by score if available
-            filtered_results = []
-            for doc in results:
-                score = getattr(doc, "score", 1.0)
-                if score >= score_threshold:
-                    filtered_results.append({
-                        "content": doc.page_content,
-                        "metadata": doc.metadata,
-                        "score": score
-                    })
+            results = await self.rag_service.similarity_search(
+                query,
+                k=k,
+                filter=normalize_where(filters),
+                score_threshold=score_threshold
+            )
             
-            # Apply metadata filters if provided
-            if filters:
-                filtered_results = [
-                    doc for doc in filtered_results
-                    if self._matches_filters(doc["metadata"], filters)
-                ]
+            formatted_results = [
+                {
+                    "content": text,
+                    "metadata": metadata,
+                    "score": score
+                }
+                for text, score, metadata in results
+            ]
             
             return {
                 "success": True,
-                "results": filtered_results,
-                "count": len(filtered_results)
+                "results": formatted_results,
+                "count": len(formatted_results)
             }
             
         except Exception as e:
@@ -76,22 +75,6 @@ class VectorSearchTool(BaseMCPTool):
                 "results": []
             }
     
-    def _matches_filters(self, metadata: Dict[str, Any], filters: Dict[str, Any]) -> bool:
-        """
-        Check if metadata matches filters.
-        
-        Args:
-            metadata: Document metadata
-            filters: Filters to apply
-            
-        Returns:
-            True if metadata matches all filters
-        """
-        for key, value in filters.items():
-            if key not in metadata or metadata[key] != value:
-                return False
-        return True
-    
     def _get_parameters_schema(self) -> Dict[str, Any]:
         """Get parameters schema."""
         return {
@@ -108,12 +91,16 @@ class VectorSearchTool(BaseMCPTool):
                 },
                 "score_threshold": {
                     "type": "number",
-                    "description": "Minimum relevance score threshold (0-1)",
+                    "description": "Minimum vector similarity threshold (0-1)",
                     "default": 0.7
                 },
                 "filters": {
                     "type": "object",
-                    "description": "Metadata filters to apply to results"
+                    "description": (
+                        "Metadata filters applied before ranking, e.g. {\"source\": \"faq\"} or "
+                        "{\"year\": {\"$gte\": 2023}}; supports $eq, $ne, $gt, $gte, $lt, $lte, "
+                        "$in, $nin, $and and $or"
+                    )
                 }
             },
             "required": ["query"]
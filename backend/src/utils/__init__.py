@@ -2,6 +2,12 @@
 from src.utils.config import get_settings, settings
 from src.utils.logger import configure_logging, get_logger, LoggerMixin
 from src.utils.cosmos_bulk_operations import CosmosBulkOperations
+from src.utils.bounded_executor import BoundedExecutor, ExecutorOverloadedError
+from src.utils.latency_histogram import LatencyHistogram
+from src.utils.cosmos_consistency import ReadConsistency, SessionTokenStore, consistency_options
+from src.utils.slow_query_log import QueryStats, SlowQueryLog
+from src.utils.tokenizer import TokenCounter, get_token_counter
+from src.utils.singleflight import SingleFlight, flight_key
 
 __all__ = [
     "settings",
@@ -10,4 +16,16 @@ __all__ = [
     "get_logger",
     "LoggerMixin",
     "CosmosBulkOperations",
+    "BoundedExecutor",
+    "ExecutorOverloadedError",
+    "LatencyHistogram",
+    "ReadConsistency",
+    "SessionTokenStore",
+    "consistency_options",
+    "QueryStats",
+    "SlowQueryLog",
+    "TokenCounter",
+    "get_token_counter",
+    "SingleFlight",
+    "flight_key",
 ]
@@ -0,0 +1,170 @@
+"""
+Bounded thread executor with queue-depth and latency metrics.
+
+Used to run blocking work (model inference, vector index lookups) off the
+event loop on a fixed number of dedicated threads, while recording how long
+calls wait for a thread and how long they run. The wait queue can be bounded
+by depth and by time, so overload turns requests away instead of letting
+them pile up.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, TypeVar
+import asyncio
+import threading
+import time
+
+T = TypeVar("T")
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class ExecutorOverloadedError(RuntimeError):
+    """Raised when a call is turned away because the executor queue is full or too slow."""
+
+
+class BoundedExecutor:
+    """Dedicated thread pool that tracks queue depth and call latency."""
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        window: int = 1000,
+        max_queue: int = 0,
+        queue_timeout: Optional[float] = None
+    ):
+        """
+        Initialize the executor.
+
+        Args:
+            name: Name used for worker threads and in stats
+            max_workers: Number of dedicated worker threads
+            window: Number of recent calls kept for latency percentiles
+            max_queue: Maximum calls waiting for a thread (0 = unbounded)
+            queue_timeout: Seconds a call may wait for a thread before it is dropped (None = no limit)
+        """
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout if queue_timeout and queue_timeout > 0 else None
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix=name
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._max_queued = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._queue_ms: Deque[float] = deque(maxlen=window)
+        self._run_ms: Deque[float] = deque(maxlen=window)
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls waiting for a worker thread."""
+        return self._queued
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Run a blocking function on the executor.
+
+        Args:
+            fn: Function to call
+            *args: Positional arguments for the function
+
+        Returns:
+            The function's result
+
+        Raises:
+            ExecutorOverloadedError: If the queue is full, or the call waited
+                longer than queue_timeout for a thread
+        """
+        submitted = time.perf_counter()
+        with self._lock:
+            if self.max_queue and self._queued >= self.max_queue:
+                self._rejected += 1
+                raise ExecutorOverloadedError(
+                    f"{self.name}: {self._queued} calls already queued (max {self.max_queue})"
+                )
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+        dequeued = False
+
+        def call() -> T:
+            nonlocal dequeued
+            begin = time.perf_counter()
+            waited = begin - submitted
+            with self._lock:
+                if not dequeued:
+                    dequeued = True
+                    self._queued -= 1
+                self._queue_ms.append(waited * 1000)
+                if self.queue_timeout is not None and waited > self.queue_timeout:
+                    # The caller has likely given up; free the thread for fresher work
+                    self._timed_out += 1
+                    raise ExecutorOverloadedError(
+                        f"{self.name}: waited {waited * 1000:.0f} ms for a thread "
+                        f"(limit {self.queue_timeout * 1000:.0f} ms)"
+                    )
+                self._running += 1
+            ok = False
+            try:
+                result = fn(*args)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._run_ms.append((time.perf_counter() - begin) * 1000)
+                    if ok:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+        finally:
+            # A call cancelled before it reached a thread never leaves the queue itself
+            with self._lock:
+                if not dequeued:
+                    dequeued = True
+                    self._queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue-depth and latency statistics."""
+        with self._lock:
+            queue_ms = list(self._queue_ms)
+            run_ms = list(self._run_ms)
+            stats = {
+                "name": self.name,
+                "workers": self.max_workers,
+                "queued": self._queued,
+                "running": self._running,
+                "max_queued": self._max_queued,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+            }
+        stats.update({
+            "queue_ms_p50": round(percentile(queue_ms, 50), 2),
+            "queue_ms_p95": round(percentile(queue_ms, 95), 2),
+            "run_ms_p50": round(percentile(run_ms, 50), 2),
+            "run_ms_p95": round(percentile(run_ms, 95), 2),
+        })
+        return stats
+
+    def shutdown(self) -> None:
+        """Shut down the worker threads."""
+        self._executor.shutdown(wait=False)
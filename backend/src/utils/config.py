@@ -3,7 +3,7 @@ Configuration management using Pydantic Settings.
 Loads environment variables and provides typed configuration.
 """
 from functools import lru_cache
-from typing import List, Literal
+from typing import Dict, List, Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -37,6 +37,7 @@ class Settings(BaseSettings):
     # LLM Configuration
     openai_api_key: str = Field(default="", alias="OPENAI_API_KEY")
     openai_model: str = Field(default="gpt-4-turbo-preview", alias="OPENAI_MODEL")
+    openai_fast_model: str = Field(default="gpt-4o-mini", alias="OPENAI_FAST_MODEL")
     openai_temperature: float = Field(default=0.7, alias="OPENAI_TEMPERATURE")
     openai_max_tokens: int = Field(default=2000, alias="OPENAI_MAX_TOKENS")
 
@@ -44,21 +45,92 @@ class Settings(BaseSettings):
     azure_openai_endpoint: str = Field(default="", alias="AZURE_OPENAI_ENDPOINT")
     azure_openai_api_key: str = Field(default="", alias="AZURE_OPENAI_API_KEY")
     azure_openai_deployment_name: str = Field(default="gpt-4", alias="AZURE_OPENAI_DEPLOYMENT_NAME")
+    # Empty: the fast tier uses the main deployment
+    azure_openai_fast_deployment_name: str = Field(default="", alias="AZURE_OPENAI_FAST_DEPLOYMENT_NAME")
     azure_openai_api_version: str = Field(default="2024-02-15-preview", alias="AZURE_OPENAI_API_VERSION")
     azure_openai_temperature: float = Field(default=0.7, alias="AZURE_OPENAI_TEMPERATURE")
     azure_openai_max_tokens: int = Field(default=2000, alias="AZURE_OPENAI_MAX_TOKENS")
 
     google_api_key: str = Field(default="", alias="GOOGLE_API_KEY")
     google_model: str = Field(default="gemini-pro", alias="GOOGLE_MODEL")
+    google_fast_model: str = Field(default="gemini-1.5-flash", alias="GOOGLE_FAST_MODEL")
 
     anthropic_api_key: str = Field(default="", alias="ANTHROPIC_API_KEY")
     anthropic_model: str = Field(
         default="claude-3-opus-20240229", alias="ANTHROPIC_MODEL"
     )
+    anthropic_fast_model: str = Field(
+        default="claude-3-haiku-20240307", alias="ANTHROPIC_FAST_MODEL"
+    )
 
-    default_llm_provider: Literal["openai", "azure-openai", "google", "anthropic"] = Field(
+    # Local fake provider for offline tests and benchmarks: scripted or template replies
+    # with simulated latency (fixed, uniform, normal or lognormal), token rate and errors
+    local_fake_model: str = Field(default="local-fake", alias="LOCAL_FAKE_MODEL")
+    local_fake_responses_path: str = Field(default="", alias="LOCAL_FAKE_RESPONSES_PATH")
+    local_fake_template: str = Field(
+        default=(
+            "This is a simulated answer to: {query}\n<<<FOLLOW_UP>>>\n"
+            '{"suggestions": ["How does this compare with the previous period?", '
+            '"Which segments drove the change?", "What is the trend over the last 12 months?"]}'
+        ),
+        alias="LOCAL_FAKE_TEMPLATE"
+    )
+    local_fake_latency_ms: float = Field(default=0.0, alias="LOCAL_FAKE_LATENCY_MS")
+    local_fake_latency_jitter_ms: float = Field(default=0.0, alias="LOCAL_FAKE_LATENCY_JITTER_MS")
+    local_fake_latency_distribution: Literal["fixed", "uniform", "normal", "lognormal"] = Field(
+        default="fixed", alias="LOCAL_FAKE_LATENCY_DISTRIBUTION"
+    )
+    local_fake_tokens_per_second: float = Field(default=0.0, alias="LOCAL_FAKE_TOKENS_PER_SECOND")
+    local_fake_error_rate: float = Field(default=0.0, alias="LOCAL_FAKE_ERROR_RATE")
+    local_fake_rate_limit_rate: float = Field(default=0.0, alias="LOCAL_FAKE_RATE_LIMIT_RATE")
+    local_fake_seed: int = Field(default=0, alias="LOCAL_FAKE_SEED")
+
+    default_llm_provider: Literal["openai", "azure-openai", "google", "anthropic", "local-fake"] = Field(
         default="openai", alias="DEFAULT_LLM_PROVIDER"
     )
+    # Per-agent models as "Agent=fast", "Agent=provider:model" or "Agent=model" (default provider)
+    llm_agent_models: str = Field(
+        default="QueryUnderstandingAgent=fast,RecommendationAgent=fast", alias="LLM_AGENT_MODELS"
+    )
+    # Fused mode: query analysis via structured output, and follow-up suggestions returned
+    # by the response call, so a turn takes two LLM round-trips instead of three
+    llm_fused_mode: bool = Field(default=True, alias="LLM_FUSED_MODE")
+    # tiktoken encoding for token counts (empty: derived from the provider's model)
+    llm_tokenizer_encoding: str = Field(default="", alias="LLM_TOKENIZER_ENCODING")
+
+    # LLM response cache (exact match, opt-in per agent as "Agent" or "Agent:ttl_seconds")
+    llm_cache_enabled: bool = Field(default=True, alias="LLM_CACHE_ENABLED")
+    llm_cache_agents: str = Field(
+        default="QueryUnderstandingAgent,RecommendationAgent", alias="LLM_CACHE_AGENTS"
+    )
+    llm_cache_ttl_seconds: int = Field(default=3600, alias="LLM_CACHE_TTL_SECONDS")
+    llm_cache_path: str = Field(default="./data/llm_cache.sqlite", alias="LLM_CACHE_PATH")
+    llm_cache_memory_size: int = Field(default=1000, alias="LLM_CACHE_MEMORY_SIZE")
+
+    # LLM scheduler: per-provider quotas as "provider:requests_per_minute:tokens_per_minute"
+    # (0 or a missing provider means unlimited) and priority admission
+    llm_scheduler_enabled: bool = Field(default=True, alias="LLM_SCHEDULER_ENABLED")
+    llm_rate_limits: str = Field(default="", alias="LLM_RATE_LIMITS")
+    llm_max_concurrency: int = Field(default=16, alias="LLM_MAX_CONCURRENCY")
+    llm_rate_limit_burst_seconds: float = Field(default=10.0, alias="LLM_RATE_LIMIT_BURST_SECONDS")
+    llm_rate_limit_retries: int = Field(default=2, alias="LLM_RATE_LIMIT_RETRIES")
+
+    # Failover to the fallback providers on errors, and optional hedging: when the
+    # primary is slower than its latency percentile, the fallback is raced against it
+    llm_fallback_providers: str = Field(default="", alias="LLM_FALLBACK_PROVIDERS")
+    llm_hedge_enabled: bool = Field(default=False, alias="LLM_HEDGE_ENABLED")
+    llm_hedge_percentile: float = Field(default=95.0, alias="LLM_HEDGE_PERCENTILE")
+    llm_hedge_min_samples: int = Field(default=20, alias="LLM_HEDGE_MIN_SAMPLES")
+    llm_hedge_default_delay_ms: float = Field(default=3000.0, alias="LLM_HEDGE_DEFAULT_DELAY_MS")
+    llm_hedge_min_delay_ms: float = Field(default=250.0, alias="LLM_HEDGE_MIN_DELAY_MS")
+
+    # Semantic answer cache (near-duplicate questions skip retrieval and generation)
+    answer_cache_enabled: bool = Field(default=True, alias="ANSWER_CACHE_ENABLED")
+    answer_cache_similarity_threshold: float = Field(
+        default=0.92, alias="ANSWER_CACHE_SIMILARITY_THRESHOLD"
+    )
+    answer_cache_ttl_seconds: int = Field(default=900, alias="ANSWER_CACHE_TTL_SECONDS")
+    answer_cache_max_entries: int = Field(default=5000, alias="ANSWER_CACHE_MAX_ENTRIES")
 
     # Azure Cosmos DB
     cosmos_endpoint: str = Field(default="", alias="COSMOS_ENDPOINT")
@@ -73,13 +145,88 @@ class Settings(BaseSettings):
     cosmos_container_gold: str = Field(
         default="gold", alias="COSMOS_CONTAINER_GOLD"
     )
+    cosmos_read_many_concurrency: int = Field(
+        default=8, alias="COSMOS_READ_MANY_CONCURRENCY"
+    )
+    # Per-operation read consistency (can only relax the account default)
+    cosmos_gold_consistency: Literal["Default", "Session", "ConsistentPrefix", "Eventual"] = Field(
+        default="Eventual", alias="COSMOS_GOLD_CONSISTENCY"
+    )
+    cosmos_conversation_consistency: Literal["Default", "Session"] = Field(
+        default="Session", alias="COSMOS_CONVERSATION_CONSISTENCY"
+    )
+    cosmos_session_token_store_path: str = Field(
+        default="", alias="COSMOS_SESSION_TOKEN_STORE_PATH"
+    )
+
+    # Slow-query log (opt-in; enables Cosmos query and index metrics)
+    slow_query_log_enabled: bool = Field(default=False, alias="SLOW_QUERY_LOG_ENABLED")
+    slow_query_log_path: str = Field(
+        default="./logs/slow_queries.jsonl", alias="SLOW_QUERY_LOG_PATH"
+    )
+    slow_query_latency_threshold_ms: float = Field(
+        default=500.0, alias="SLOW_QUERY_LATENCY_THRESHOLD_MS"
+    )
+    slow_query_ru_threshold: float = Field(default=50.0, alias="SLOW_QUERY_RU_THRESHOLD")
+    slow_query_log_max_bytes: int = Field(
+        default=10 * 1024 * 1024, alias="SLOW_QUERY_LOG_MAX_BYTES"
+    )
+    slow_query_log_backup_count: int = Field(default=5, alias="SLOW_QUERY_LOG_BACKUP_COUNT")
+
+    # Query admission guard for ad-hoc gold queries
+    query_guard_enabled: bool = Field(default=True, alias="QUERY_GUARD_ENABLED")
+    query_guard_caller_limits: Dict[str, float] = Field(
+        default={"api": 500.0, "tool": 1000.0, "agent": 2000.0},
+        alias="QUERY_GUARD_CALLER_LIMITS"
+    )
+    query_guard_default_max_ru: float = Field(default=500.0, alias="QUERY_GUARD_DEFAULT_MAX_RU")
+    query_guard_max_rows: int = Field(default=1000, alias="QUERY_GUARD_MAX_ROWS")
+    query_guard_ru_per_document: float = Field(
+        default=0.05, alias="QUERY_GUARD_RU_PER_DOCUMENT"
+    )
+    query_guard_default_partition_documents: int = Field(
+        default=1000, alias="QUERY_GUARD_DEFAULT_PARTITION_DOCUMENTS"
+    )
+    query_guard_default_total_documents: int = Field(
+        default=1000000, alias="QUERY_GUARD_DEFAULT_TOTAL_DOCUMENTS"
+    )
+    partition_catalog_path: str = Field(
+        default="./data/partition_catalog.json", alias="PARTITION_CATALOG_PATH"
+    )
+
+    # Retention (TTL-driven expiry; 0 days keeps data forever)
+    retention_enabled: bool = Field(default=True, alias="RETENTION_ENABLED")
+    retention_deleted_conversation_days: int = Field(
+        default=30, alias="RETENTION_DELETED_CONVERSATION_DAYS"
+    )
+    retention_gold_days: Dict[str, int] = Field(default={}, alias="RETENTION_GOLD_DAYS")
+    retention_gold_default_days: int = Field(default=0, alias="RETENTION_GOLD_DEFAULT_DAYS")
+
+    # Startup warm-up (preload models and clients before reporting ready)
+    warmup_enabled: bool = Field(default=True, alias="WARMUP_ENABLED")
 
     # Vector Store
+    # chromadb, or numpy for an exact memory-mapped flat index (small knowledge bases)
     vector_store_type: str = Field(default="chromadb", alias="VECTOR_STORE_TYPE")
     vector_store_path: str = Field(default="./data/vectorstore", alias="VECTOR_STORE_PATH")
     embedding_model: str = Field(
         default="sentence-transformers/all-MiniLM-L6-v2", alias="EMBEDDING_MODEL"
     )
+    # Inference runtime: torch, onnx, or onnx-int8 (dynamically quantized ONNX export)
+    embedding_backend: Literal["torch", "onnx", "onnx-int8"] = Field(
+        default="torch", alias="EMBEDDING_BACKEND"
+    )
+    embedding_num_threads: int = Field(default=0, alias="EMBEDDING_NUM_THREADS")
+    embedding_onnx_int8_file: str = Field(
+        default="onnx/model_qint8_avx512_vnni.onnx", alias="EMBEDDING_ONNX_INT8_FILE"
+    )
+    embedding_cache_enabled: bool = Field(default=True, alias="EMBEDDING_CACHE_ENABLED")
+    embedding_cache_path: str = Field(
+        default="./data/embedding_cache.sqlite", alias="EMBEDDING_CACHE_PATH"
+    )
+    embedding_cache_memory_size: int = Field(default=10000, alias="EMBEDDING_CACHE_MEMORY_SIZE")
+    # Vectors kept on disk; the oldest writes are evicted first (0: unlimited)
+    embedding_cache_max_entries: int = Field(default=100000, alias="EMBEDDING_CACHE_MAX_ENTRIES")
 
     # Memory & Context
     max_conversation_history: int = Field(default=10, alias="MAX_CONVERSATION_HISTORY")
@@ -89,6 +236,32 @@ class Settings(BaseSettings):
     rag_enabled: bool = Field(default=True, alias="RAG_ENABLED")
     rag_top_k: int = Field(default=5, alias="RAG_TOP_K")
     rag_similarity_threshold: float = Field(default=0.7, alias="RAG_SIMILARITY_THRESHOLD")
+    # Hybrid retrieval: BM25 candidates fused with vector candidates by reciprocal rank
+    rag_hybrid_enabled: bool = Field(default=True, alias="RAG_HYBRID_ENABLED")
+    rag_hybrid_candidates: int = Field(default=20, alias="RAG_HYBRID_CANDIDATES")
+    rag_rrf_k: int = Field(default=60, alias="RAG_RRF_K")
+    # Minimum BM25 score for chunks that only the lexical index found
+    rag_lexical_min_score: float = Field(default=3.0, alias="RAG_LEXICAL_MIN_SCORE")
+    rag_chunk_size: int = Field(default=1000, alias="RAG_CHUNK_SIZE")
+    rag_chunk_overlap: int = Field(default=200, alias="RAG_CHUNK_OVERLAP")
+    # Context packing: over-fetch, MMR reorder, drop near-duplicates, pack to the token budget
+    rag_context_candidate_factor: int = Field(default=2, alias="RAG_CONTEXT_CANDIDATE_FACTOR")
+    rag_context_mmr_lambda: float = Field(default=0.7, alias="RAG_CONTEXT_MMR_LAMBDA")
+    rag_context_dedup_threshold: float = Field(default=0.95, alias="RAG_CONTEXT_DEDUP_THRESHOLD")
+
+    # RAG Indexing Pipeline (chunking in processes, embedding on a dedicated executor)
+    rag_chunking_workers: int = Field(default=2, alias="RAG_CHUNKING_WORKERS")
+    rag_chunking_process_min_chars: int = Field(
+        default=200000, alias="RAG_CHUNKING_PROCESS_MIN_CHARS"
+    )
+    rag_embedding_workers: int = Field(default=1, alias="RAG_EMBEDDING_WORKERS")
+    rag_embedding_batch_size: int = Field(default=64, alias="RAG_EMBEDDING_BATCH_SIZE")
+    rag_index_write_batch_size: int = Field(default=1024, alias="RAG_INDEX_WRITE_BATCH_SIZE")
+    rag_search_workers: int = Field(default=4, alias="RAG_SEARCH_WORKERS")
+    # Searches waiting for a thread beyond this depth (or longer than the timeout) are
+    # turned away instead of queueing without limit (0 = unbounded)
+    rag_search_max_queue: int = Field(default=64, alias="RAG_SEARCH_MAX_QUEUE")
+    rag_search_queue_timeout_ms: float = Field(default=5000.0, alias="RAG_SEARCH_QUEUE_TIMEOUT_MS")
 
     # MCP Configuration
     mcp_server_host: str = Field(default="localhost", alias="MCP_SERVER_HOST")
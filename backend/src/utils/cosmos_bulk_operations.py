@@ -8,7 +8,7 @@ Best Practices Applied:
 - Diagnostic logging for performance monitoring
 - Proper error handling and retry logic
 """
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from collections import defaultdict
 import asyncio
 
@@ -236,7 +236,110 @@ class CosmosBulkOperations:
             f"Bulk delete completed: {total_deleted}/{len(item_ids)} items deleted"
         )
         return total_deleted
-    
+
+    @staticmethod
+    async def bulk_read_items(
+        container: ContainerProxy,
+        item_ids: List[Tuple[str, Any]],
+        max_concurrency: int = 8,
+        request_options: Optional[Dict[str, Any]] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Read multiple items whose id and partition key are already known.
+
+        Best Practices:
+        - Items are grouped by partition key so each partition is hit once
+        - A partition with a single id uses a point read (cheapest possible read)
+        - A partition with several ids uses one id-list query scoped to that partition
+        - Partitions are fetched concurrently, bounded by max_concurrency
+
+        Args:
+            container: Cosmos DB container client
+            item_ids: List of (item_id, partition_key) tuples
+                      partition_key can be a string or list for hierarchical keys
+            max_concurrency: Maximum number of partitions fetched in parallel
+            request_options: Extra keyword arguments for every read (e.g. consistency headers)
+
+        Returns:
+            Items in the same order as item_ids, with None for items that were not found
+
+        Raises:
+            Exception: If reading any partition fails (e.g. throttling or timeout)
+        """
+        if not item_ids:
+            return []
+
+        container_name = container.id
+
+        # Group by partition key (lists are not hashable, so use tuples for hierarchical keys)
+        partitioned_reads: Dict[Any, List[str]] = defaultdict(list)
+        for item_id, partition_key in item_ids:
+            pk = tuple(partition_key) if isinstance(partition_key, list) else partition_key
+            if item_id not in partitioned_reads[pk]:
+                partitioned_reads[pk].append(item_id)
+
+        logger.info(
+            f"Starting bulk read of {len(item_ids)} items across "
+            f"{len(partitioned_reads)} partitions in container: {container_name}"
+        )
+
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        options = request_options or {}
+
+        def read_partition(pk: Any, ids: List[str]) -> List[Dict[str, Any]]:
+            pk_value = list(pk) if isinstance(pk, tuple) else pk
+            if len(ids) == 1:
+                try:
+                    return [container.read_item(item=ids[0], partition_key=pk_value, **options)]
+                except exceptions.CosmosResourceNotFoundError:
+                    return []
+            return list(container.query_items(
+                query="SELECT * FROM c WHERE ARRAY_CONTAINS(@ids, c.id)",
+                parameters=[{"name": "@ids", "value": ids}],
+                partition_key=pk_value,
+                **options
+            ))
+
+        async def read_partition_batch(
+            pk: Any,
+            ids: List[str]
+        ) -> Tuple[Any, List[Dict[str, Any]]]:
+            async with semaphore:
+                try:
+                    # The sync SDK blocks, so run each partition read off the event loop
+                    items = await asyncio.to_thread(read_partition, pk, ids)
+                    return pk, items
+                except Exception as e:
+                    # Re-raise so a throttled or timed-out partition is not reported as "not found"
+                    logger.error(
+                        f"Read batch failed for partition {pk}: {str(e)}",
+                        exc_info=True
+                    )
+                    raise
+
+        tasks = [
+            read_partition_batch(pk, ids)
+            for pk, ids in partitioned_reads.items()
+        ]
+
+        results = await asyncio.gather(*tasks)
+
+        found: Dict[Tuple[Any, str], Dict[str, Any]] = {}
+        for pk, items in results:
+            for item in items:
+                found[(pk, item.get("id"))] = item
+
+        ordered = [
+            found.get((tuple(pk) if isinstance(pk, list) else pk, item_id))
+            for item_id, pk in item_ids
+        ]
+
+        logger.info(
+            f"Bulk read completed: {sum(1 for item in ordered if item is not None)}"
+            f"/{len(item_ids)} items found"
+        )
+        return ordered
+
     # Private helper methods
     
     @staticmethod
@@ -0,0 +1,143 @@
+"""
+Azure Cosmos DB per-operation consistency and session-token handling.
+
+Best Practices Applied:
+- Relax consistency per request (never stronger than the account default)
+- Eventual consistency for immutable historical data (lower read RU cost)
+- Session consistency with explicit session tokens for read-your-writes
+- Session tokens kept per (container, user) and optionally shared across workers
+"""
+from enum import Enum
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+import sqlite3
+import threading
+from pathlib import Path
+
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+CONSISTENCY_HEADER = "x-ms-consistency-level"
+SESSION_TOKEN_HEADER = "x-ms-session-token"
+
+
+class ReadConsistency(str, Enum):
+    """Consistency levels that can be requested for a single read."""
+    DEFAULT = "Default"
+    STRONG = "Strong"
+    BOUNDED_STALENESS = "BoundedStaleness"
+    SESSION = "Session"
+    CONSISTENT_PREFIX = "ConsistentPrefix"
+    EVENTUAL = "Eventual"
+
+
+def consistency_options(
+    consistency: ReadConsistency,
+    session_token: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Build request keyword arguments for a read with the given consistency.
+
+    Args:
+        consistency: Consistency level for this operation (DEFAULT uses the account default)
+        session_token: Session token to send with Session consistency reads
+
+    Returns:
+        Keyword arguments for read_item / query_items
+    """
+    options: Dict[str, Any] = {}
+
+    if consistency != ReadConsistency.DEFAULT:
+        options["initial_headers"] = {CONSISTENCY_HEADER: consistency.value}
+
+    if session_token and consistency in (ReadConsistency.DEFAULT, ReadConsistency.SESSION):
+        options["session_token"] = session_token
+
+    return options
+
+
+class SessionTokenStore:
+    """
+    Session tokens per (container, user).
+
+    Tokens are always cached in process. When a path is configured they are also
+    written to a small SQLite file so that every worker process on the host sees
+    the latest token for a user, keeping read-your-writes when consecutive requests
+    from one user land on different workers.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the session token store.
+
+        Args:
+            path: Optional SQLite file shared by worker processes
+        """
+        self._tokens: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if path:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS session_tokens ("
+                    "container TEXT NOT NULL, user_id TEXT NOT NULL, token TEXT NOT NULL, "
+                    "PRIMARY KEY (container, user_id))"
+                )
+                self._conn.commit()
+                logger.info(f"Sharing Cosmos DB session tokens via {path}")
+            except sqlite3.Error as e:
+                logger.warning(f"Falling back to in-process session tokens: {e}")
+                self._conn = None
+
+    def get(self, container: str, user_id: str) -> Optional[str]:
+        """Get the latest session token for a user in a container."""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT token FROM session_tokens WHERE container = ? AND user_id = ?",
+                        (container, user_id)
+                    ).fetchone()
+                    if row:
+                        self._tokens[(container, user_id)] = row[0]
+                        return row[0]
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to read shared session token: {e}")
+            return self._tokens.get((container, user_id))
+
+    def set(self, container: str, user_id: str, token: str) -> None:
+        """Record the session token returned by a write."""
+        with self._lock:
+            self._tokens[(container, user_id)] = token
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO session_tokens (container, user_id, token) "
+                        "VALUES (?, ?, ?)",
+                        (container, user_id, token)
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to share session token: {e}")
+
+    def capture(self, container: str, user_id: str) -> Callable[[Mapping[str, Any], Any], None]:
+        """
+        Build a response_hook that records the session token of a write.
+
+        Args:
+            container: Container name
+            user_id: User the write belongs to
+
+        Returns:
+            Callable suitable for the SDK's response_hook keyword argument
+        """
+        def hook(headers: Mapping[str, Any], _body: Any) -> None:
+            token = headers.get(SESSION_TOKEN_HEADER) if headers else None
+            if token:
+                self.set(container, user_id, token)
+
+        return hook
@@ -0,0 +1,67 @@
+"""
+Latency histogram over a sliding window of recent samples.
+
+Percentiles are computed from the retained samples, so they follow a
+provider that speeds up or degrades instead of averaging over the whole
+process lifetime. Bucket counts (log-spaced bounds) summarize the same
+window for metrics.
+"""
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence
+import bisect
+
+from src.utils.bounded_executor import percentile
+
+# Upper bounds in ms; the last bucket is unbounded
+DEFAULT_BOUNDS_MS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+
+
+class LatencyHistogram:
+    """Bucketed latency distribution of the most recent samples."""
+
+    def __init__(self, window: int = 1000, bounds_ms: Sequence[float] = DEFAULT_BOUNDS_MS):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            window: Number of recent samples retained
+            bounds_ms: Ascending bucket upper bounds in milliseconds
+        """
+        self.bounds_ms = list(bounds_ms)
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._counts: List[int] = [0] * (len(self.bounds_ms) + 1)
+        self.total = 0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def _bucket(self, value_ms: float) -> int:
+        return bisect.bisect_left(self.bounds_ms, value_ms)
+
+    def add(self, value_ms: float) -> None:
+        """Record one latency in milliseconds."""
+        if len(self._samples) == self._samples.maxlen:
+            self._counts[self._bucket(self._samples[0])] -= 1
+        self._samples.append(value_ms)
+        self._counts[self._bucket(value_ms)] += 1
+        self.total += 1
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Latency percentile of the window (None without samples)."""
+        if not self._samples:
+            return None
+        return percentile(list(self._samples), percent)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get sample counts, percentiles and bucket counts."""
+        samples = list(self._samples)
+        buckets = {f"le_{bound:g}": count for bound, count in zip(self.bounds_ms, self._counts)}
+        buckets["le_inf"] = self._counts[-1]
+        return {
+            "samples": len(samples),
+            "total": self.total,
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p95_ms": round(percentile(samples, 95), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+            "buckets": buckets,
+        }
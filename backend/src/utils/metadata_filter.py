@@ -0,0 +1,131 @@
+"""
+In-process evaluation of Chroma-style metadata ``where`` filters.
+
+Supports plain equality ({"source": "faq"}), the comparison operators
+$eq, $ne, $gt, $gte, $lt, $lte, $in and $nin, and the logical operators
+$and and $or, so indexes kept outside Chroma filter exactly like Chroma does.
+"""
+from typing import Any, Dict, List, Optional
+
+COMPARISON_OPERATORS = ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte", "$in", "$nin")
+LOGICAL_OPERATORS = ("$and", "$or")
+
+
+def _compare(value: Any, operator: str, operand: Any) -> bool:
+    """Apply one comparison operator to a metadata value."""
+    if operator == "$eq":
+        return value == operand
+    if operator == "$ne":
+        return value != operand
+    if operator == "$in":
+        return value in operand
+    if operator == "$nin":
+        return value not in operand
+    if value is None:
+        return False
+    try:
+        if operator == "$gt":
+            return value > operand
+        if operator == "$gte":
+            return value >= operand
+        if operator == "$lt":
+            return value < operand
+        if operator == "$lte":
+            return value <= operand
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """
+    Check whether metadata satisfies a where filter.
+
+    Args:
+        metadata: Chunk metadata
+        where: Chroma-style filter (None or empty matches everything)
+
+    Returns:
+        True if the metadata matches
+    """
+    if not where:
+        return True
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif metadata.get(key) != condition:
+            return False
+
+    return True
+
+
+def _field_clauses(key: str, condition: Any) -> List[Dict[str, Any]]:
+    """Split one field condition into single-operator clauses."""
+    if not isinstance(condition, dict):
+        return [{key: condition}]
+    if not condition:
+        raise ValueError(f"Empty condition for filter field '{key}'")
+    clauses = []
+    for operator, operand in condition.items():
+        if operator not in COMPARISON_OPERATORS:
+            raise ValueError(f"Unsupported filter operator: {operator}")
+        if operator in ("$in", "$nin") and not isinstance(operand, list):
+            raise ValueError(f"{operator} on '{key}' requires a list")
+        clauses.append({key: {operator: operand}})
+    return clauses
+
+
+def normalize_where(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Validate a metadata filter and rewrite it into the form Chroma accepts.
+
+    Chroma requires exactly one field or logical operator per filter
+    object, so {"source": "faq", "year": {"$gte": 2023, "$lt": 2025}} becomes
+    an $and of single-operator clauses. The result means the same thing to
+    matches_where, so every index can push it down.
+
+    Args:
+        filters: Metadata filter (None or empty means no filter)
+
+    Returns:
+        Normalized filter, or None when there is nothing to filter on
+
+    Raises:
+        ValueError: If the filter uses an unsupported operator or shape
+    """
+    if not filters:
+        return None
+    if not isinstance(filters, dict):
+        raise ValueError("Metadata filter must be an object")
+
+    clauses: List[Dict[str, Any]] = []
+    for key, condition in filters.items():
+        if key in LOGICAL_OPERATORS:
+            if not isinstance(condition, list) or not condition:
+                raise ValueError(f"{key} requires a non-empty list of filters")
+            nested = [normalize_where(clause) for clause in condition]
+            if key == "$or" and None in nested:
+                # An empty alternative matches everything
+                continue
+            nested = [clause for clause in nested if clause]
+            if len(nested) == 1:
+                clauses.append(nested[0])
+            elif nested:
+                clauses.append({key: nested})
+        elif key.startswith("$"):
+            raise ValueError(f"Unsupported filter operator: {key}")
+        else:
+            clauses.extend(_field_clauses(key, condition))
+
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
@@ -0,0 +1,235 @@
+"""
+Static analysis of Cosmos DB SQL queries against the gold container.
+
+Classifies a query by how much of the hierarchical (pkType, pkFilter)
+partition key it pins down, without touching Cosmos DB:
+
+- point_read:       id, pkType and pkFilter all fixed
+- single_partition: pkType and pkFilter fixed
+- prefix:           only pkType fixed (optionally with a pkFilter range)
+- fan_out:          several pkType values (IN list, or OR across partition key predicates)
+- full_scan:        no partition key predicate at all
+"""
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+import re
+
+from pydantic import BaseModel, Field
+
+_WHITESPACE = re.compile(r"\s+")
+_VALUE = r"(@\w+|'[^']*'|\"[^\"]*\"|-?\d+(?:\.\d+)?)"
+_PK_TYPE_EQ = re.compile(rf"\bc\.pkType\s*=\s*{_VALUE}", re.IGNORECASE)
+_PK_TYPE_IN = re.compile(r"\bc\.pkType\s+IN\s*\(([^)]*)\)", re.IGNORECASE)
+_PK_TYPE_ARRAY = re.compile(
+    r"\bARRAY_CONTAINS\s*\(\s*(@\w+)\s*,\s*c\.pkType\s*\)", re.IGNORECASE
+)
+_PK_FILTER_EQ = re.compile(
+    rf"(?:STRINGTONUMBER\s*\(\s*)?\bc\.pkFilter\s*\)?\s*=\s*{_VALUE}", re.IGNORECASE
+)
+_PK_FILTER_RANGE = re.compile(
+    rf"(?:STRINGTONUMBER\s*\(\s*)?\bc\.pkFilter\s*\)?\s*(>=|<=|>|<)\s*{_VALUE}", re.IGNORECASE
+)
+_ID_EQ = re.compile(rf"\bc\.id\s*=\s*{_VALUE}", re.IGNORECASE)
+_TOP = re.compile(r"^\s*SELECT\s+(?:DISTINCT\s+)?TOP\s+(@\w+|\d+)", re.IGNORECASE)
+_WHERE = re.compile(
+    r"\bWHERE\b(.*?)(?=\bORDER\s+BY\b|\bGROUP\s+BY\b|\bOFFSET\b|$)", re.IGNORECASE | re.DOTALL
+)
+_AGGREGATE = re.compile(r"\b(COUNT|SUM|AVG|MIN|MAX)\s*\(|\bGROUP\s+BY\b", re.IGNORECASE)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\b", re.IGNORECASE)
+_DISTINCT = re.compile(r"^\s*SELECT\s+DISTINCT\b", re.IGNORECASE)
+_OFFSET_LIMIT = re.compile(r"\bOFFSET\s+\S+\s+LIMIT\s+(@\w+|\d+)", re.IGNORECASE)
+_OR = re.compile(r"\bOR\b", re.IGNORECASE)
+_STRING = re.compile(r"'[^']*'|\"[^\"]*\"")
+_PK_FIELD = re.compile(r"\bc\.pk(?:Type|Filter)\b", re.IGNORECASE)
+_SELECT = re.compile(r"^\s*SELECT\s+", re.IGNORECASE)
+
+
+class QueryClass(str, Enum):
+    """Partition scope of a gold query, from cheapest to most expensive."""
+    POINT_READ = "point_read"
+    SINGLE_PARTITION = "single_partition"
+    PREFIX = "prefix"
+    FAN_OUT = "fan_out"
+    FULL_SCAN = "full_scan"
+
+
+class QueryAnalysis(BaseModel):
+    """Result of analyzing a query before it is sent to Cosmos DB."""
+
+    query: str
+    query_class: QueryClass
+    pk_types: List[str] = Field(default_factory=list)
+    pk_filter: Optional[str] = None
+    pk_filter_range: Optional[Tuple[str, str]] = None
+    top: Optional[int] = None
+    has_offset_limit: bool = False
+    has_aggregate: bool = False
+    has_order_by: bool = False
+    has_distinct: bool = False
+
+    @property
+    def is_bounded(self) -> bool:
+        """Whether the query returns a bounded number of rows."""
+        return self.top is not None or self.query_class == QueryClass.POINT_READ
+
+    @property
+    def can_add_top(self) -> bool:
+        """Whether a TOP clause can be added without changing what the rows mean."""
+        # Cosmos DB rejects TOP together with OFFSET ... LIMIT
+        return (
+            self.top is None
+            and not self.has_offset_limit
+            and not self.has_aggregate
+            and not self.has_distinct
+        )
+
+
+def _resolve(token: str, parameters: Dict[str, Any]) -> Optional[str]:
+    """Resolve a literal or @parameter token to its string value."""
+    token = token.strip()
+    if token.startswith("@"):
+        value = parameters.get(token)
+        return None if value is None else str(value)
+    return token.strip("'\"")
+
+
+def _or_spans_partition_key(where: str) -> bool:
+    """
+    Whether an OR in a WHERE clause combines partition key predicates.
+
+    An OR only widens the partition scope when its enclosing group (the
+    innermost parentheses around it, or the whole clause) mentions pkType or
+    pkFilter; ``c.pkType = 'x' AND (c.status = 'a' OR c.status = 'b')`` stays
+    in one partition.
+    """
+    # Blank out string literals so parentheses and ORs inside them are ignored
+    masked = _STRING.sub(lambda m: "'" + "_" * (len(m.group(0)) - 2) + "'", where)
+    for match in _OR.finditer(masked):
+        depth, start = 0, 0
+        for i in range(match.start() - 1, -1, -1):
+            if masked[i] == ")":
+                depth += 1
+            elif masked[i] == "(":
+                if depth == 0:
+                    start = i + 1
+                    break
+                depth -= 1
+        depth, end = 0, len(masked)
+        for i in range(match.end(), len(masked)):
+            if masked[i] == "(":
+                depth += 1
+            elif masked[i] == ")":
+                if depth == 0:
+                    end = i
+                    break
+                depth -= 1
+        if _PK_FIELD.search(masked[start:end]):
+            return True
+    return False
+
+
+def analyze_query(
+    query: str,
+    parameters: Optional[List[Dict[str, Any]]] = None
+) -> QueryAnalysis:
+    """
+    Classify a gold query by partition scope and shape.
+
+    Args:
+        query: SQL query text
+        parameters: Query parameters ({"name": "@x", "value": ...})
+
+    Returns:
+        Query analysis
+    """
+    params = {p.get("name"): p.get("value") for p in parameters or []}
+    text = _WHITESPACE.sub(" ", query).strip()
+
+    where_match = _WHERE.search(text)
+    where = where_match.group(1) if where_match else ""
+
+    pk_types: List[str] = []
+    for match in _PK_TYPE_EQ.finditer(where):
+        value = _resolve(match.group(1), params)
+        if value is not None and value not in pk_types:
+            pk_types.append(value)
+    listed = [
+        _resolve(token, params)
+        for match in _PK_TYPE_IN.finditer(where)
+        for token in match.group(1).split(",")
+    ]
+    for match in _PK_TYPE_ARRAY.finditer(where):
+        listed.extend(str(v) for v in params.get(match.group(1)) or [])
+    for value in listed:
+        if value is not None and value not in pk_types:
+            pk_types.append(value)
+
+    pk_filter_match = _PK_FILTER_EQ.search(where)
+    pk_filter = _resolve(pk_filter_match.group(1), params) if pk_filter_match else None
+
+    pk_filter_range = None
+    range_match = _PK_FILTER_RANGE.search(where)
+    if range_match:
+        bound = _resolve(range_match.group(2), params)
+        if bound is not None:
+            pk_filter_range = (range_match.group(1), bound)
+
+    id_match = _ID_EQ.search(where)
+    has_or = _or_spans_partition_key(where)
+
+    if not pk_types:
+        query_class = QueryClass.FULL_SCAN
+    elif len(pk_types) > 1 or has_or:
+        query_class = QueryClass.FAN_OUT
+    elif pk_filter is not None and id_match:
+        query_class = QueryClass.POINT_READ
+    elif pk_filter is not None:
+        query_class = QueryClass.SINGLE_PARTITION
+    else:
+        query_class = QueryClass.PREFIX
+
+    top = None
+    offset_limit = _OFFSET_LIMIT.search(text)
+    top_match = _TOP.search(text) or offset_limit
+    if top_match:
+        resolved = _resolve(top_match.group(1), params)
+        if resolved is not None and resolved.isdigit():
+            top = int(resolved)
+
+    return QueryAnalysis(
+        query=query,
+        query_class=query_class,
+        pk_types=pk_types,
+        pk_filter=pk_filter,
+        pk_filter_range=pk_filter_range,
+        top=top,
+        has_offset_limit=offset_limit is not None,
+        has_aggregate=bool(_AGGREGATE.search(text)),
+        has_order_by=bool(_ORDER_BY.search(text)),
+        has_distinct=bool(_DISTINCT.search(text)),
+    )
+
+
+def apply_top(query: str, top: int) -> str:
+    """
+    Add or tighten the row limit of a query.
+
+    An existing TOP or OFFSET ... LIMIT clause is lowered in place (Cosmos DB
+    rejects TOP combined with OFFSET ... LIMIT); otherwise TOP is added. A
+    @parameter limit is replaced by the literal, so callers only pass queries
+    whose limit is unknown or above top.
+
+    Args:
+        query: SQL query text
+        top: Maximum number of rows
+
+    Returns:
+        Query limited to at most top rows
+    """
+    existing = _OFFSET_LIMIT.search(query) or _TOP.search(query)
+    if existing:
+        if existing.group(1).isdigit() and int(existing.group(1)) <= top:
+            return query
+        start, end = existing.span(1)
+        return f"{query[:start]}{top}{query[end:]}"
+    return _SELECT.sub(lambda m: f"{m.group(0)}TOP {top} ", query, count=1)
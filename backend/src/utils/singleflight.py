@@ -0,0 +1,98 @@
+"""
+Request coalescing for identical in-flight async calls ("singleflight").
+
+The first caller for a key starts the call; callers arriving with the same
+key while it is still running await the same future instead of issuing
+their own upstream request. Once the call finishes the key is released, so
+nothing is cached beyond the lifetime of the call.
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+import asyncio
+import hashlib
+import json
+
+T = TypeVar("T")
+
+
+def flight_key(*parts: Any) -> str:
+    """
+    Build a coalescing key from JSON-serializable parts.
+
+    Args:
+        *parts: Values identifying the call (dict keys are sorted)
+
+    Returns:
+        SHA-256 hex digest of the parts
+    """
+    encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Shares one in-flight call between concurrent callers with the same key."""
+
+    def __init__(self, name: str):
+        """
+        Initialize the coalescer.
+
+        Args:
+            name: Name reported in stats
+        """
+        self.name = name
+        self._flights: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running."""
+        return len(self._flights)
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        share: Optional[Callable[[T], T]] = None
+    ) -> T:
+        """
+        Run fn, or join the identical call already in flight.
+
+        The shared call is shielded: a caller that is cancelled stops waiting
+        but does not cancel the call for the others. Exceptions propagate to
+        every caller.
+
+        Args:
+            key: Identifies identical calls
+            fn: Coroutine function performing the call
+            share: Copies the result for callers that joined (for mutable results)
+
+        Returns:
+            Result of the call
+        """
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            result = await asyncio.shield(flight)
+            return share(result) if share is not None else result
+
+        flight = asyncio.ensure_future(fn())
+        self._flights[key] = flight
+        flight.add_done_callback(lambda done: self._release(key, done))
+        return await asyncio.shield(flight)
+
+    def _release(self, key: Hashable, flight: "asyncio.Future[Any]") -> None:
+        """Forget a finished call."""
+        self._flights.pop(key, None)
+        if not flight.cancelled():
+            # Mark the exception retrieved in case every caller stopped waiting
+            flight.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics."""
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight,
+        }
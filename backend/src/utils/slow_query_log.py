@@ -0,0 +1,245 @@
+"""
+Slow-query log for Azure Cosmos DB queries.
+
+Records every query above a latency or RU threshold as one JSON line in a
+rotating local file, together with the Cosmos query metrics and index
+utilization returned by the service. The file is meant to be mined offline
+for missing indexes and partition-key fixes.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional
+import base64
+import json
+import logging
+import re
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from src.utils import get_logger
+from src.utils.query_analyzer import analyze_query
+
+logger = get_logger(__name__)
+
+REQUEST_CHARGE_HEADER = "x-ms-request-charge"
+QUERY_METRICS_HEADER = "x-ms-documentdb-query-metrics"
+INDEX_UTILIZATION_HEADER = "x-ms-cosmos-index-utilization"
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"(?<![\w@.])-?\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Reduce a query to its shape so that queries differing only in literals group together.
+
+    Args:
+        query: SQL query text
+
+    Returns:
+        Query with literals replaced by '?' and whitespace collapsed
+    """
+    shape = _STRING_LITERAL.sub("?", query)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _IN_LIST.sub("IN (?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def partition_scope(query: str, parameters: Optional[List[Dict[str, Any]]] = None) -> str:
+    """
+    Describe which part of the hierarchical (pkType, pkFilter) key a query is scoped to.
+
+    Args:
+        query: SQL query text
+        parameters: Query parameters
+
+    Returns:
+        Query class value ('point_read', 'single_partition', 'prefix', 'fan_out', 'full_scan')
+    """
+    return analyze_query(query, parameters).query_class.value
+
+
+def parse_query_metrics(header: Optional[str]) -> Dict[str, float]:
+    """
+    Parse the semicolon separated x-ms-documentdb-query-metrics header.
+
+    Args:
+        header: Raw header value
+
+    Returns:
+        Mapping of metric name to numeric value
+    """
+    metrics: Dict[str, float] = {}
+    if not header:
+        return metrics
+
+    for part in header.split(";"):
+        if "=" not in part:
+            continue
+        name, value = part.split("=", 1)
+        try:
+            metrics[name.strip()] = float(value)
+        except ValueError:
+            continue
+    return metrics
+
+
+def parse_index_utilization(header: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Decode the base64 JSON x-ms-cosmos-index-utilization header.
+
+    Args:
+        header: Raw header value
+
+    Returns:
+        Decoded index utilization report, or None if unavailable
+    """
+    if not header:
+        return None
+    try:
+        return json.loads(base64.b64decode(header).decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class QueryStats:
+    """Accumulates Cosmos response headers across the pages of one query."""
+
+    def __init__(self):
+        """Initialize empty query statistics."""
+        self.request_charge = 0.0
+        self.page_count = 0
+        self.metrics: Dict[str, float] = {}
+        self._ratio_pages: Dict[str, int] = {}
+        self.index_utilization: Optional[Dict[str, Any]] = None
+
+    def add_page(self, headers: Optional[Mapping[str, Any]]) -> None:
+        """
+        Add the response headers of one page.
+
+        Args:
+            headers: Response headers returned for the page
+        """
+        if not headers:
+            return
+
+        self.page_count += 1
+        try:
+            self.request_charge += float(headers.get(REQUEST_CHARGE_HEADER, 0) or 0)
+        except (TypeError, ValueError):
+            pass
+
+        for name, value in parse_query_metrics(headers.get(QUERY_METRICS_HEADER)).items():
+            if name.endswith("Ratio"):
+                # Ratios are averaged across pages, counts and timings are summed
+                pages = self._ratio_pages.get(name, 0)
+                self.metrics[name] = (self.metrics.get(name, 0.0) * pages + value) / (pages + 1)
+                self._ratio_pages[name] = pages + 1
+            else:
+                self.metrics[name] = self.metrics.get(name, 0.0) + value
+
+        index_utilization = parse_index_utilization(headers.get(INDEX_UTILIZATION_HEADER))
+        if index_utilization and self.index_utilization is None:
+            self.index_utilization = index_utilization
+
+
+class SlowQueryLog:
+    """Opt-in log of queries above a latency or RU threshold."""
+
+    def __init__(
+        self,
+        path: str,
+        latency_threshold_ms: float,
+        ru_threshold: float,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5
+    ):
+        """
+        Initialize the slow-query log.
+
+        Args:
+            path: JSON-lines file the entries are written to
+            latency_threshold_ms: Record queries slower than this
+            ru_threshold: Record queries that cost more request units than this
+            max_bytes: Size at which the file is rotated
+            backup_count: Number of rotated files to keep
+        """
+        self.latency_threshold_ms = latency_threshold_ms
+        self.ru_threshold = ru_threshold
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        # Plain stdlib logger so entries stay one raw JSON object per line
+        self._file_logger = logging.getLogger(f"slow_query_log.{path}")
+        self._file_logger.setLevel(logging.INFO)
+        self._file_logger.propagate = False
+        if not self._file_logger.handlers:
+            handler = RotatingFileHandler(
+                path,
+                maxBytes=max_bytes,
+                backupCount=backup_count,
+                encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._file_logger.addHandler(handler)
+
+    def should_record(self, duration_ms: float, request_charge: float) -> bool:
+        """Check whether a query crossed either threshold."""
+        return duration_ms >= self.latency_threshold_ms or request_charge >= self.ru_threshold
+
+    def record(
+        self,
+        container: str,
+        query: str,
+        parameters: Optional[List[Dict[str, Any]]],
+        duration_ms: float,
+        item_count: int,
+        stats: QueryStats
+    ) -> bool:
+        """
+        Record a query if it crossed the latency or RU threshold.
+
+        Args:
+            container: Container the query ran against
+            query: SQL query text
+            parameters: Query parameters (only their names are logged)
+            duration_ms: Wall-clock duration of the whole query
+            item_count: Number of documents returned to the caller
+            stats: Accumulated response header statistics
+
+        Returns:
+            True if an entry was written
+        """
+        if not self.should_record(duration_ms, stats.request_charge):
+            return False
+
+        retrieved = stats.metrics.get("retrievedDocumentCount")
+        output = stats.metrics.get("outputDocumentCount", float(item_count))
+
+        entry = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "container": container,
+            "query_shape": normalize_query(query),
+            "parameter_names": [p.get("name") for p in parameters or []],
+            "partition_scope": partition_scope(query, parameters),
+            "duration_ms": round(duration_ms, 2),
+            "request_charge": round(stats.request_charge, 2),
+            "page_count": stats.page_count,
+            "item_count": item_count,
+            "retrieved_document_count": retrieved,
+            "output_document_count": output,
+            "retrieved_output_ratio": (
+                round(retrieved / output, 2) if retrieved is not None and output else None
+            ),
+            "index_hit_ratio": stats.metrics.get("indexUtilizationRatio"),
+            "query_metrics": stats.metrics,
+            "index_utilization": stats.index_utilization,
+        }
+
+        try:
+            self._file_logger.info(json.dumps(entry, default=str))
+        except Exception as e:
+            logger.warning(f"Failed to write slow-query log entry: {e}")
+            return False
+        return True
@@ -0,0 +1,63 @@
+"""
+Text chunking helpers for the RAG indexing pipeline.
+
+Kept free of service imports so worker processes only load the text splitter.
+"""
+from typing import Any, Dict, List, Optional
+import hashlib
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+def split_texts(texts: List[str], chunk_size: int, chunk_overlap: int) -> List[List[str]]:
+    """
+    Split texts into overlapping chunks.
+
+    Args:
+        texts: Texts to split
+        chunk_size: Maximum characters per chunk
+        chunk_overlap: Characters shared between consecutive chunks
+
+    Returns:
+        One list of chunks per input text, in input order
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+    )
+    return [splitter.split_text(text) for text in texts]
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 hex digest of a text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def source_id_for(text: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Get the source document id for a text.
+
+    Uses the 'source_id' metadata field when present, otherwise the hash of
+    the full text (so re-adding identical text is a no-op, but changed text
+    without a source_id is indexed as a new document).
+    """
+    if metadata and metadata.get("source_id") not in (None, ""):
+        return str(metadata["source_id"])
+    return f"sha256:{text_hash(text)[:32]}"
+
+
+def chunk_id(source_id: str, chunk_index: int, chunk_text_hash: str) -> str:
+    """
+    Content-addressed chunk id from its source, position and text.
+
+    Args:
+        source_id: Source document id
+        chunk_index: Position of the chunk in the source
+        chunk_text_hash: SHA-256 of the chunk text
+
+    Returns:
+        Stable 32-character chunk id
+    """
+    key = f"{source_id}|{chunk_index}|{chunk_text_hash}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
@@ -0,0 +1,123 @@
+"""
+Token counting matched to the configured LLM.
+
+OpenAI and Azure OpenAI models use their tiktoken encoding. Google and
+Anthropic do not publish local tokenizers for current models, so their
+counts use cl100k_base as the closest available proxy. If tiktoken or its
+encoding files are unavailable, counts fall back to a characters-per-token
+estimate.
+"""
+from typing import Dict, List, Optional
+import math
+
+from src.utils.config import settings
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_PROXY_ENCODING = "cl100k_base"
+
+
+class TokenCounter:
+    """Counts and truncates text in tokens of one encoding."""
+
+    def __init__(self, encoding: Optional[object] = None, chars_per_token: float = 4.0):
+        """
+        Initialize the counter.
+
+        Args:
+            encoding: tiktoken Encoding (None uses the character estimate)
+            chars_per_token: Characters per token for the estimate
+        """
+        self.encoding = encoding
+        self.chars_per_token = chars_per_token
+        self.name = getattr(encoding, "name", f"estimate({chars_per_token} chars/token)")
+
+    @property
+    def is_exact(self) -> bool:
+        """Whether counts come from a real tokenizer."""
+        return self.encoding is not None
+
+    def encode(self, text: str) -> List[int]:
+        """Encode text to token ids (requires a real tokenizer)."""
+        return self.encoding.encode(text, disallowed_special=())
+
+    def count(self, text: str) -> int:
+        """
+        Count tokens in a text.
+
+        Args:
+            text: Text to count
+
+        Returns:
+            Number of tokens
+        """
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encode(text))
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Cut a text to at most max_tokens tokens.
+
+        Args:
+            text: Text to truncate
+            max_tokens: Token limit
+
+        Returns:
+            The longest prefix within the limit
+        """
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encode(text)
+            return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+        return text[:int(max_tokens * self.chars_per_token)]
+
+
+def _load_encoding(provider: str) -> Optional[object]:
+    """Load the tiktoken encoding for a provider's configured model."""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken not installed, estimating token counts")
+        return None
+
+    try:
+        if settings.llm_tokenizer_encoding:
+            return tiktoken.get_encoding(settings.llm_tokenizer_encoding)
+        if provider in ("openai", "azure-openai"):
+            model = settings.openai_model if provider == "openai" else settings.azure_openai_deployment_name
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                # Azure deployment names are arbitrary; current models use o200k_base
+                return tiktoken.get_encoding("o200k_base")
+        return tiktoken.get_encoding(_PROXY_ENCODING)
+    except Exception as e:
+        logger.warning(f"Failed to load tokenizer for {provider}, estimating token counts: {e}")
+        return None
+
+
+_counters: Dict[str, TokenCounter] = {}
+
+
+def get_token_counter(provider: Optional[str] = None) -> TokenCounter:
+    """
+    Get the token counter for an LLM provider.
+
+    Args:
+        provider: LLM provider (default: settings.default_llm_provider)
+
+    Returns:
+        Cached token counter
+    """
+    provider = provider or settings.default_llm_provider
+    counter = _counters.get(provider)
+    if counter is None:
+        counter = TokenCounter(_load_encoding(provider))
+        _counters[provider] = counter
+        logger.info(f"Using {counter.name} token counts for {provider}")
+    return counter
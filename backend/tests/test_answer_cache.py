@@ -0,0 +1,141 @@
+"""
+Tests for the semantic answer cache.
+"""
+from unittest.mock import MagicMock
+
+from src.services.answer_cache import ALL_PARTITIONS, SemanticAnswerCache, key_terms, partition_key
+
+
+def store(cache, scope, vector, partitions, response="Settlement volume was 1.2M", terms=()):
+    return cache.store(
+        scope=scope,
+        query="settlement volume yesterday",
+        vector=vector,
+        response=response,
+        suggestions=["Compare with last week"],
+        metadata={},
+        partitions=partitions,
+        terms=terms
+    )
+
+
+def test_lookup_is_scoped_and_thresholded():
+    cache = SemanticAnswerCache(similarity_threshold=0.9)
+    store(cache, "role=analyst", [1.0, 0.0], [partition_key("settlement", "2024-06")])
+
+    entry, similarity = cache.lookup("role=analyst", [0.99, 0.05])
+    assert entry.response == "Settlement volume was 1.2M" and similarity > 0.9
+    assert cache.lookup("role=viewer", [1.0, 0.0]) is None
+    assert cache.lookup("role=analyst", [0.5, 0.5]) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_key_terms_must_match():
+    """Near-identical questions about different periods do not share an answer."""
+    cache = SemanticAnswerCache(similarity_threshold=0.9)
+    q1 = key_terms("Total revenue for Q1 2024", ["revenue", "Q1 2024"])
+    q2 = key_terms("Total revenue for Q2 2024", ["revenue", "Q2 2024"])
+    assert q1 == ["2024", "q1", "q1 2024", "revenue"]
+    store(cache, "s", [1.0, 0.0], [], response="Q1 revenue was 3.1M", terms=q1)
+
+    # The embeddings are identical; only the period differs
+    assert cache.lookup("s", [1.0, 0.0], q2) is None
+    assert cache.lookup("s", [1.0, 0.0], key_terms("revenue Q1 2024", ["Revenue", "q1  2024"]))[0].response == (
+        "Q1 revenue was 3.1M"
+    )
+    assert key_terms("settlement volume last month") != key_terms("settlement volume last week")
+    assert key_terms("refunds above 500 in March") == ["500", "march"]
+
+
+def test_gold_writes_invalidate_dependent_answers():
+    cache = SemanticAnswerCache()
+    june = partition_key("settlement", "2024-06")
+    store(cache, "s", [1.0, 0.0], [june])
+    store(cache, "s", [0.0, 1.0], [partition_key("chargeback", "2024-06")])
+    store(cache, "s", [0.7, 0.7], [ALL_PARTITIONS])
+
+    assert cache.invalidate_partitions([partition_key("settlement", "2024-05")]) == 1
+    assert len(cache) == 2
+    assert cache.invalidate_partitions([june]) == 1
+    assert cache.lookup("s", [0.0, 1.0]) is not None
+
+
+def test_expired_answers_are_not_served(monkeypatch):
+    import src.services.answer_cache as answer_cache
+
+    cache = SemanticAnswerCache(ttl_seconds=60)
+    store(cache, "s", [1.0, 0.0], [])
+    now = answer_cache.time.time()
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now + 61)
+
+    assert cache.lookup("s", [1.0, 0.0]) is None
+    assert len(cache) == 0
+
+
+class FakeAgent:
+    """Workflow node that records calls and applies a state update."""
+
+    def __init__(self, update):
+        self.update = update
+        self.calls = 0
+
+    async def __call__(self, state):
+        self.calls += 1
+        state.update(self.update)
+        return state
+
+
+async def test_orchestrator_skips_pipeline_on_cache_hit(monkeypatch):
+    """A near-duplicate question from the same scope is answered from the cache."""
+    from src.agents import orchestrator as orchestrator_module
+
+    agents = {
+        "QueryUnderstandingAgent": FakeAgent({"reformulated_query": "settlement volume yesterday"}),
+        "DataRetrievalAgent": FakeAgent({"retrieved_data": {
+            "rag_sources": [], "metadata": {"gold_partitions": [partition_key("settlement", "2024-06")]}
+        }}),
+        "ResponseGenerationAgent": FakeAgent({
+            "response": "Settlement volume was 1.2M", "response_metadata": {"context_used": True}
+        }),
+        "RecommendationAgent": FakeAgent({"suggestions": ["Compare with last week"]}),
+    }
+    for name, agent in agents.items():
+        monkeypatch.setattr(orchestrator_module, name, lambda agent=agent: agent)
+
+    rag_service = MagicMock()
+    rag_service.embeddings.embed_query = lambda text: [1.0, 0.0]
+
+    async def run(fn, *args):
+        return fn(*args)
+    rag_service.search_executor.run = run
+
+    cosmos_service = MagicMock()
+    cosmos_service.users_container = None
+    cache = SemanticAnswerCache()
+    monkeypatch.setattr(orchestrator_module, "get_rag_service", lambda: rag_service)
+    monkeypatch.setattr(orchestrator_module, "get_cosmos_service", lambda: cosmos_service)
+    monkeypatch.setattr(orchestrator_module, "get_answer_cache", lambda: cache)
+
+    orchestrator = orchestrator_module.AgentOrchestrator()
+    first = await orchestrator.process_query("What was settlement volume yesterday?", "u1", "c1")
+    second = await orchestrator.process_query("settlement volume for yesterday?", "u1", "c2")
+
+    assert first["metadata"]["answer_cache"] == {"hit": False}
+    assert second["metadata"]["answer_cache"]["hit"] is True
+    assert second["response"] == first["response"]
+    assert second["suggestions"] == ["Compare with last week"]
+    assert agents["QueryUnderstandingAgent"].calls == 2
+    assert agents["ResponseGenerationAgent"].calls == 1
+
+    # Another user without a loadable profile gets a private scope
+    third = await orchestrator.process_query("settlement volume for yesterday?", "u2", "c3")
+    assert third["metadata"]["answer_cache"] == {"hit": False}
+
+    # Same embedding but a different period in the reformulated query
+    agents["QueryUnderstandingAgent"].update = {
+        "reformulated_query": "settlement volume Q2",
+        "query_analysis": {"entities": ["settlement volume", "Q2"]},
+    }
+    fourth = await orchestrator.process_query("settlement volume in Q2?", "u1", "c4")
+    assert fourth["metadata"]["answer_cache"] == {"hit": False}
+    assert agents["ResponseGenerationAgent"].calls == 3
@@ -0,0 +1,93 @@
+"""
+Tests for the bounded executor used for vector search.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+async def test_calls_overlap_up_to_worker_count():
+    """Concurrent calls run in parallel on the dedicated threads."""
+    from src.utils import BoundedExecutor
+
+    executor = BoundedExecutor("test-search", max_workers=4)
+    barrier = threading.Barrier(4, timeout=5)
+
+    def search(i):
+        # Only passes if all four calls are running at the same time
+        barrier.wait()
+        return i
+
+    results = await asyncio.gather(*[executor.run(search, i) for i in range(4)])
+
+    assert results == [0, 1, 2, 3]
+    stats = executor.stats()
+    assert stats["completed"] == 4
+    assert stats["queued"] == 0 and stats["running"] == 0
+    executor.shutdown()
+
+
+async def test_queue_depth_and_latency_are_tracked():
+    """Calls beyond the worker count wait in the queue and are measured."""
+    from src.utils import BoundedExecutor
+
+    executor = BoundedExecutor("test-search", max_workers=1)
+
+    def slow():
+        time.sleep(0.05)
+
+    tasks = [asyncio.create_task(executor.run(slow)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    assert executor.queue_depth == 2
+
+    await asyncio.gather(*tasks)
+    stats = executor.stats()
+    assert stats["max_queued"] >= 2
+    assert stats["queued"] == 0
+    assert stats["run_ms_p50"] >= 40
+    assert stats["queue_ms_p95"] >= 40
+    executor.shutdown()
+
+
+async def test_full_queue_rejects_calls():
+    """Calls beyond max_queue are turned away instead of queueing."""
+    from src.utils import BoundedExecutor, ExecutorOverloadedError
+
+    executor = BoundedExecutor("test-search", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    running = asyncio.create_task(executor.run(release.wait, 5))
+    await asyncio.sleep(0.01)
+    queued = asyncio.create_task(executor.run(lambda: "queued"))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(ExecutorOverloadedError):
+        await executor.run(lambda: "rejected")
+
+    release.set()
+    assert await queued == "queued"
+    await running
+    assert executor.stats()["rejected"] == 1
+    executor.shutdown()
+
+
+async def test_stale_queued_calls_time_out():
+    """A call that waited longer than queue_timeout is dropped without running."""
+    from src.utils import BoundedExecutor, ExecutorOverloadedError
+
+    executor = BoundedExecutor("test-search", max_workers=1, queue_timeout=0.02)
+    ran = []
+
+    blocker = asyncio.create_task(executor.run(time.sleep, 0.08))
+    await asyncio.sleep(0.01)
+    with pytest.raises(ExecutorOverloadedError):
+        await executor.run(ran.append, 1)
+
+    await blocker
+    assert ran == []
+    stats = executor.stats()
+    assert stats["timed_out"] == 1
+    assert stats["queued"] == 0 and stats["running"] == 0
+    executor.shutdown()
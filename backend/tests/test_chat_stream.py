@@ -0,0 +1,92 @@
+"""
+Tests for the Server-Sent Events chat endpoint.
+"""
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+class FakeAgent:
+    """Workflow node that optionally streams tokens, then applies a state update."""
+
+    def __init__(self, update, tokens=()):
+        self.update = update
+        self.tokens = tokens
+
+    async def __call__(self, state):
+        for token in self.tokens:
+            await state["on_token"](token)
+        state.update(self.update)
+        return state
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+async def test_astream_query_emits_stage_events_in_order(monkeypatch):
+    from src.agents import orchestrator as orchestrator_module
+
+    agents = {
+        "QueryUnderstandingAgent": FakeAgent({"query_analysis": {"intent": "trend"}}),
+        "DataRetrievalAgent": FakeAgent({"retrieved_data": {"rag_sources": [{"text": "Q3 report"}]}}),
+        "ResponseGenerationAgent": FakeAgent(
+            {"response": "Revenue grew.", "response_metadata": {"context_used": True}},
+            tokens=["Revenue ", "grew."]
+        ),
+        "RecommendationAgent": FakeAgent({"suggestions": ["Break down by region"]}),
+    }
+    for name, agent in agents.items():
+        monkeypatch.setattr(orchestrator_module, name, lambda agent=agent: agent)
+    monkeypatch.setattr(orchestrator_module, "get_rag_service", MagicMock)
+    monkeypatch.setattr(orchestrator_module, "get_cosmos_service", MagicMock)
+    monkeypatch.setattr(orchestrator_module.settings, "answer_cache_enabled", False)
+
+    orchestrator = orchestrator_module.AgentOrchestrator()
+    events = [event async for event in orchestrator.astream_query("How did revenue change?", "u1", "c1")]
+
+    assert [event["event"] for event in events] == [
+        "analysis", "sources", "token", "token", "suggestions", "done"
+    ]
+    assert events[1]["data"]["sources"] == [{"text": "Q3 report"}]
+    assert events[-1]["data"]["response"] == "Revenue grew."
+
+
+def test_stream_endpoint_persists_conversation_once_at_the_end(monkeypatch):
+    from src.api import chat
+
+    async def astream_query(**kwargs):
+        yield {"event": "analysis", "data": {"query_analysis": {}}}
+        yield {"event": "token", "data": {"delta": "Hello"}}
+        yield {"event": "done", "data": {"response": "Hello", "suggestions": ["Next?"], "metadata": {}}}
+
+    orchestrator = MagicMock()
+    orchestrator.astream_query = astream_query
+    cosmos_service = MagicMock()
+    cosmos_service.create_conversation = AsyncMock()
+    cosmos_service.update_conversation = AsyncMock()
+    monkeypatch.setattr(chat, "get_orchestrator", lambda: orchestrator)
+    monkeypatch.setattr(chat, "get_cosmos_service", lambda: cosmos_service)
+    monkeypatch.setattr(chat, "get_memory_service", MagicMock)
+
+    app = FastAPI()
+    app.include_router(chat.router)
+    response = TestClient(app).post("/chat/message/stream", json={"message": "Hi", "user_id": "u1"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    assert [name for name, _ in events] == ["conversation", "analysis", "token", "done"]
+    done = events[-1][1]
+    assert done["message"]["content"] == "Hello"
+    assert done["conversation_id"] == events[0][1]["conversation_id"]
+
+    cosmos_service.create_conversation.assert_awaited_once()
+    saved = cosmos_service.create_conversation.await_args.args[0]
+    assert [message.content for message in saved.messages] == ["Hi", "Hello"]
+    cosmos_service.update_conversation.assert_not_awaited()
@@ -0,0 +1,59 @@
+"""
+Tests for token-budgeted RAG context packing.
+"""
+from src.services.context_packer import CONTEXT_SEPARATOR, ContextPacker, strip_overlap
+from src.utils.tokenizer import TokenCounter
+
+
+class WordCounter(TokenCounter):
+    """Counts one token per whitespace-separated word."""
+
+    def __init__(self):
+        super().__init__()
+        self.name = "words"
+
+    def count(self, text):
+        return len(text.split())
+
+
+def test_mmr_drops_near_duplicates():
+    """A near-duplicate of a selected chunk is pruned in favour of a distinct one."""
+    candidates = [
+        ("a", "revenue grew in march", 0.9, {}),
+        ("b", "revenue grew in march again", 0.89, {}),
+        ("c", "churn fell in april", 0.5, {}),
+    ]
+    vectors = [[1.0, 0.0], [0.999, 0.01], [0.6, 0.8]]
+
+    order = ContextPacker(WordCounter()).order(candidates, [1.0, 0.0], vectors)
+
+    assert order == [0, 2]
+
+
+def test_adjacent_chunk_overlap_is_emitted_once():
+    """Overlap shared with an already-packed predecessor chunk is stripped."""
+    assert strip_overlap("alpha beta gamma", "beta gamma delta", 20) == "delta"
+
+    candidates = [
+        ("a", "one two three four", 0.9, {"source_id": "doc", "chunk_index": 0}),
+        ("b", "three four five six", 0.8, {"source_id": "doc", "chunk_index": 1}),
+    ]
+    context, sources = ContextPacker(WordCounter()).pack(candidates, max_tokens=100)
+
+    assert context == "one two three four" + CONTEXT_SEPARATOR + "five six"
+    assert len(sources) == 2
+
+
+def test_pack_never_exceeds_budget():
+    """Chunks that do not fit are skipped while smaller ones still fill the budget."""
+    counter = TokenCounter(chars_per_token=4.0)
+    candidates = [
+        ("a", "x" * 40, 0.9, {}),
+        ("b", "y" * 400, 0.8, {}),
+        ("c", "z" * 20, 0.7, {}),
+    ]
+
+    context, sources = ContextPacker(counter).pack(candidates, max_tokens=20)
+
+    assert counter.count(context) <= 20
+    assert [source["text"] for source in sources] == ["x" * 40, "z" * 20]
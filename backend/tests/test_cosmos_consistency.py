@@ -0,0 +1,99 @@
+"""
+Tests for per-operation read consistency and per-user session tokens.
+"""
+from src.models import Conversation
+from src.utils.cosmos_consistency import (
+    CONSISTENCY_HEADER,
+    SESSION_TOKEN_HEADER,
+    ReadConsistency,
+    SessionTokenStore,
+    consistency_options,
+)
+
+
+def test_consistency_options():
+    assert consistency_options(ReadConsistency.DEFAULT) == {}
+    assert consistency_options(ReadConsistency.EVENTUAL, "0:1#5") == {
+        "initial_headers": {CONSISTENCY_HEADER: "Eventual"}
+    }
+    assert consistency_options(ReadConsistency.SESSION, "0:1#5") == {
+        "initial_headers": {CONSISTENCY_HEADER: "Session"},
+        "session_token": "0:1#5",
+    }
+    assert consistency_options(ReadConsistency.DEFAULT, "0:1#5") == {"session_token": "0:1#5"}
+
+
+def test_tokens_are_captured_per_user_and_shared_across_workers(tmp_path):
+    path = str(tmp_path / "tokens.sqlite")
+    worker_a = SessionTokenStore(path)
+    worker_b = SessionTokenStore(path)
+
+    worker_a.capture("conversations", "alice")({SESSION_TOKEN_HEADER: "0:1#7"}, {})
+    worker_a.capture("conversations", "bob")({}, {})
+
+    assert worker_b.get("conversations", "alice") == "0:1#7"
+    assert worker_b.get("conversations", "bob") is None
+    assert worker_b.get("users", "alice") is None
+
+
+class FakeContainer:
+    """Container stand-in that records read options and returns a session token on writes."""
+
+    id = "container"
+
+    def __init__(self):
+        self.items = {}
+        self.reads = []
+
+    def create_item(self, body, response_hook=None, **kwargs):
+        self.items[body["id"]] = body
+        if response_hook:
+            response_hook({SESSION_TOKEN_HEADER: f"0:1#{len(self.items)}"}, body)
+        return body
+
+    def read_item(self, item, partition_key, **kwargs):
+        self.reads.append(kwargs)
+        return self.items.get(item) or {"id": item, "user_id": partition_key}
+
+
+async def test_reads_replay_the_users_session_token():
+    from src.services.cosmos_service import CosmosDBService
+
+    service = CosmosDBService()
+    service.session_tokens = SessionTokenStore()
+    service.conversation_consistency = ReadConsistency.SESSION
+    service.conversations_container = FakeContainer()
+
+    conversation = await service.create_conversation(Conversation(user_id="alice"))
+    await service.get_conversation(conversation.id, "alice")
+    await service.get_conversation("other", "bob")
+
+    alice_read, bob_read = service.conversations_container.reads
+    assert alice_read["session_token"] == "0:1#1"
+    assert alice_read["initial_headers"] == {CONSISTENCY_HEADER: "Session"}
+    assert "session_token" not in bob_read
+
+
+async def test_read_many_consistency_per_container():
+    import pytest
+
+    from src.services.cosmos_service import CosmosDBService
+
+    service = CosmosDBService()
+    service.gold_consistency = ReadConsistency.EVENTUAL
+    service.conversation_consistency = ReadConsistency.SESSION
+    service.session_tokens = SessionTokenStore()
+    service.gold_container = FakeContainer()
+    service.users_container = FakeContainer()
+    service.session_tokens.capture("users", "u1")({SESSION_TOKEN_HEADER: "0:1#9"}, {})
+
+    await service.read_many("gold", [("g1", ["settlement", "2024-01"])])
+    await service.read_many("users", [("u1", "u1")], user_id="u1")
+
+    assert service.gold_container.reads == [{"initial_headers": {CONSISTENCY_HEADER: "Eventual"}}]
+    # Per-user reads replay the user's session token, as the point reads do
+    assert service.users_container.reads == [
+        {"initial_headers": {CONSISTENCY_HEADER: "Session"}, "session_token": "0:1#9"}
+    ]
+    with pytest.raises(ValueError):
+        await service.read_many("users", [("u1", "u1")])
@@ -0,0 +1,83 @@
+"""
+Tests for batched point reads (bulk_read_items / read_many).
+"""
+import pytest
+
+from azure.cosmos import exceptions
+
+from src.utils.cosmos_bulk_operations import CosmosBulkOperations
+
+
+class FakeContainer:
+    """Container stand-in holding items by (partition key, id)."""
+
+    id = "gold"
+
+    def __init__(self, items, failing=()):
+        self.items = items
+        self.failing = set(failing)
+        self.point_reads = []
+        self.queries = []
+
+    def _check(self, partition_key):
+        if tuple(partition_key) in self.failing:
+            raise exceptions.CosmosHttpResponseError(status_code=429, message="throttled")
+
+    def read_item(self, item, partition_key, **kwargs):
+        self._check(partition_key)
+        self.point_reads.append((item, tuple(partition_key)))
+        found = self.items.get((tuple(partition_key), item))
+        if found is None:
+            raise exceptions.CosmosResourceNotFoundError(status_code=404, message="not found")
+        return found
+
+    def query_items(self, query, parameters, partition_key, **kwargs):
+        self._check(partition_key)
+        ids = parameters[0]["value"]
+        self.queries.append((tuple(ids), tuple(partition_key)))
+        return [
+            item for (pk, item_id), item in self.items.items()
+            if pk == tuple(partition_key) and item_id in ids
+        ]
+
+
+def make_items():
+    return {
+        (("settlement", "2024-01"), "a"): {"id": "a"},
+        (("settlement", "2024-01"), "b"): {"id": "b"},
+        (("fees", "2024-02"), "c"): {"id": "c"},
+    }
+
+
+async def test_reads_are_grouped_by_partition_and_keep_input_order():
+    container = FakeContainer(make_items())
+    jan = ["settlement", "2024-01"]
+    feb = ["fees", "2024-02"]
+
+    items = await CosmosBulkOperations.bulk_read_items(
+        container, [("c", feb), ("b", jan), ("a", jan), ("b", jan)]
+    )
+
+    assert [item["id"] for item in items] == ["c", "b", "a", "b"]
+    # One point read for the single-id partition, one id-list query for the other
+    assert container.point_reads == [("c", ("fees", "2024-02"))]
+    assert container.queries == [(("b", "a"), ("settlement", "2024-01"))]
+
+
+async def test_missing_items_are_none():
+    container = FakeContainer(make_items())
+
+    items = await CosmosBulkOperations.bulk_read_items(
+        container, [("a", ["settlement", "2024-01"]), ("x", ["settlement", "2024-01"]), ("y", ["fees", "2099"])]
+    )
+
+    assert items == [{"id": "a"}, None, None]
+
+
+async def test_partition_errors_propagate():
+    container = FakeContainer(make_items(), failing=[("fees", "2024-02")])
+
+    with pytest.raises(exceptions.CosmosHttpResponseError):
+        await CosmosBulkOperations.bulk_read_items(
+            container, [("a", ["settlement", "2024-01"]), ("c", ["fees", "2024-02"])]
+        )
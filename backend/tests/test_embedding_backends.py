@@ -0,0 +1,43 @@
+"""
+Tests for embedding backend selection.
+"""
+import pytest
+
+
+def test_onnx_int8_backend_options(monkeypatch):
+    """onnx-int8 loads the quantized export through ONNX Runtime with thread limits."""
+    from src.services import embedding_backends
+
+    captured = {}
+    monkeypatch.setattr(
+        embedding_backends, "HuggingFaceEmbeddings", lambda **kwargs: captured.update(kwargs)
+    )
+
+    embedding_backends.create_embeddings(
+        "sentence-transformers/all-MiniLM-L6-v2",
+        backend="onnx-int8",
+        num_threads=3,
+        onnx_int8_file="onnx/model_qint8_avx2.onnx"
+    )
+
+    model_kwargs = captured["model_kwargs"]
+    assert model_kwargs["backend"] == "onnx"
+    assert model_kwargs["model_kwargs"]["file_name"] == "onnx/model_qint8_avx2.onnx"
+    assert model_kwargs["model_kwargs"]["session_options"].intra_op_num_threads == 3
+    assert captured["encode_kwargs"] == {"normalize_embeddings": True}
+
+
+def test_unknown_backend_rejected():
+    """Unknown backends fail fast."""
+    from src.services.embedding_backends import create_embeddings
+
+    with pytest.raises(ValueError):
+        create_embeddings("all-MiniLM-L6-v2", backend="tensorrt")
+
+
+def test_cache_namespace_per_backend():
+    """Quantized vectors never share cache keys with PyTorch vectors."""
+    from src.services.embedding_backends import embedding_cache_namespace
+
+    assert embedding_cache_namespace("m", "torch") == "m"
+    assert embedding_cache_namespace("m", "onnx-int8") == "m@onnx-int8"
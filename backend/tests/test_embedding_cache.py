@@ -0,0 +1,87 @@
+"""
+Tests for the content-hash keyed embedding cache.
+"""
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+
+class CountingEmbeddings(Embeddings):
+    """Fake embedding model that counts how many texts it encoded."""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.encoded += len(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.encoded += 1
+        return [float(len(text)), 0.0]
+
+
+def test_repeated_documents_skip_inference(tmp_path):
+    """Only texts never seen before reach the model."""
+    from src.services.embedding_cache import CachedEmbeddings
+
+    model = CountingEmbeddings()
+    cache = CachedEmbeddings(model, "test-model", True, path=str(tmp_path / "emb.sqlite"))
+
+    first = cache.embed_documents(["alpha", "beta", "alpha"])
+    second = cache.embed_documents(["beta", "gamma"])
+
+    assert model.encoded == 3
+    assert first[0] == first[2] == [5.0, 1.0]
+    assert second[0] == first[1]
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Vectors persisted to SQLite are reused by a new cache instance."""
+    from src.services.embedding_cache import CachedEmbeddings
+
+    path = str(tmp_path / "emb.sqlite")
+    CachedEmbeddings(CountingEmbeddings(), "test-model", True, path=path).embed_query("hello")
+
+    model = CountingEmbeddings()
+    cache = CachedEmbeddings(model, "test-model", True, path=path)
+
+    assert cache.embed_query("hello") == [5.0, 0.0]
+    assert model.encoded == 0
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_keys_include_model_and_normalization(tmp_path):
+    """A different model or normalization flag never reuses vectors."""
+    from src.services.embedding_cache import CachedEmbeddings
+
+    path = str(tmp_path / "emb.sqlite")
+    CachedEmbeddings(CountingEmbeddings(), "model-a", True, path=path).embed_documents(["text"])
+
+    model = CountingEmbeddings()
+    CachedEmbeddings(model, "model-a", False, path=path).embed_documents(["text"])
+    CachedEmbeddings(model, "model-b", True, path=path).embed_documents(["text"])
+
+    assert model.encoded == 2
+
+
+def test_disk_tier_is_capped(tmp_path):
+    """The SQLite tier keeps at most disk_max_entries vectors, dropping the oldest."""
+    import sqlite3
+
+    from src.services.embedding_cache import CachedEmbeddings
+
+    path = str(tmp_path / "emb.sqlite")
+    cache = CachedEmbeddings(CountingEmbeddings(), "test-model", True, path=path, disk_max_entries=10)
+    for i in range(11):
+        cache.embed_query(f"query {i}")
+
+    # Trimmed to 90% of the cap once it was exceeded
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] == 9
+    assert cache.stats()["disk_entries"] == 9
+
+    model = CountingEmbeddings()
+    restarted = CachedEmbeddings(model, "test-model", True, path=path, memory_size=0, disk_max_entries=10)
+    restarted.embed_query("query 10")
+    restarted.embed_query("query 0")
+    assert model.encoded == 1
@@ -0,0 +1,149 @@
+"""
+Tests for the local fake LLM provider.
+"""
+import json
+import time
+
+import pytest
+
+from src.models import QueryAnalysis
+from src.services import llm_models
+from src.services.fake_llm import FakeChatModel, FakeLLMError, FakeRateLimitError
+from src.services.llm_scheduler import is_rate_limit_error
+
+
+def make_service(model):
+    from src.services.llm_service import LLMService
+
+    service = LLMService(provider="local-fake")
+    service.response_cache = None
+    service.scheduler = None
+    service._get_model = lambda provider=None, name=None: model
+    return service
+
+
+async def test_scripted_rules_and_template(tmp_path, monkeypatch):
+    rules = tmp_path / "responses.json"
+    rules.write_text(json.dumps([
+        {"match": "(?i)volume", "system": "analyst", "response": "Volume grew 4%."},
+        {"match": "(?i)volume", "response": "Generic volume answer."},
+    ]))
+    monkeypatch.setattr(llm_models.settings, "local_fake_responses_path", str(rules))
+    monkeypatch.setattr(llm_models, "_chat_models", {})
+    from src.services.llm_service import LLMService
+
+    service = LLMService(provider="local-fake")
+    service.response_cache = None
+    messages = [{"role": "user", "content": "What was the volume?"}]
+
+    assert await service.generate_response(messages, system_prompt="You are an analyst") == "Volume grew 4%."
+    assert await service.generate_response(messages) == "Generic volume answer."
+    answer = await service.generate_response([{"role": "user", "content": "Top merchants?"}])
+    assert answer.startswith("This is a simulated answer to: Top merchants?\n<<<FOLLOW_UP>>>\n")
+    assert llm_models.pooled_models() == {"local-fake": 1}
+
+
+async def test_streaming_follows_token_rate():
+    model = FakeChatModel(template="one two three four five", latency_ms=20, tokens_per_second=100)
+    service = make_service(model)
+
+    start = time.perf_counter()
+    deltas = [delta async for delta in service.astream_response([{"role": "user", "content": "hi"}])]
+    elapsed = time.perf_counter() - start
+
+    assert deltas == ["one ", "two ", "three ", "four ", "five"]
+    # 20 ms to the first token, then 10 ms per token
+    assert elapsed >= 0.055
+    assert model.simulated_ms == [pytest.approx(60.0)]
+
+
+def test_seeded_latency_is_reproducible():
+    first = FakeChatModel(latency_ms=500, latency_jitter_ms=200, latency_distribution="lognormal", seed=7)
+    second = FakeChatModel(latency_ms=500, latency_jitter_ms=200, latency_distribution="lognormal", seed=7)
+
+    samples = [first.sample_latency() for _ in range(50)]
+
+    assert samples == [second.sample_latency() for _ in range(50)]
+    assert min(samples) > 0
+    assert len(set(samples)) == 50
+
+
+async def test_error_injection():
+    service = make_service(FakeChatModel(error_rate=1.0))
+    with pytest.raises(FakeLLMError):
+        await service.generate_response([{"role": "user", "content": "hi"}])
+
+    model = FakeChatModel(rate_limit_rate=1.0)
+    with pytest.raises(FakeRateLimitError) as excinfo:
+        await model.ainvoke("hi")
+    assert is_rate_limit_error(excinfo.value)
+    assert model.calls == 1
+
+
+async def test_structured_output_placeholder():
+    service = make_service(FakeChatModel())
+
+    analysis = await service.generate_structured(
+        [
+            {"role": "user", "content": "Recent conversation context:\nuser: Show Q2 revenue"},
+            {"role": "user", "content": "Analyze this query: Compare Q3 with Q2"},
+        ],
+        QueryAnalysis
+    )
+
+    assert analysis.reformulated_query == "Compare Q3 with Q2"
+    assert analysis.intent == "analyze"
+    assert analysis.query_type == "analytical"
+    assert analysis.entities == []
+
+
+async def test_default_template_carries_a_suggestions_trailer():
+    from src.agents.response_generation_agent import SuggestionTrailer
+
+    service = make_service(FakeChatModel())
+    trailer = SuggestionTrailer()
+
+    deltas = [
+        trailer.feed(delta)
+        async for delta in service.astream_response([{"role": "user", "content": "Top merchants?"}])
+    ]
+
+    assert "".join(deltas) + trailer.finish() == "This is a simulated answer to: Top merchants?"
+    assert len(trailer.suggestions()) == 3
+
+
+async def test_full_workflow_on_local_fake(monkeypatch):
+    """The agent workflow runs end to end offline: two fused calls, suggestions from the trailer."""
+    from src.agents.orchestrator import AgentOrchestrator
+    from src.services import cosmos_service, llm_service, rag_service
+    from src.utils import settings
+
+    monkeypatch.setattr(settings, "default_llm_provider", "local-fake")
+    monkeypatch.setattr(settings, "llm_agent_models", "")
+    monkeypatch.setattr(settings, "llm_fused_mode", True)
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    monkeypatch.setattr(settings, "local_fake_responses_path", "")
+    monkeypatch.setattr(settings, "rag_enabled", False)
+    monkeypatch.setattr(settings, "cosmos_endpoint", "")
+    monkeypatch.setattr(llm_models, "_chat_models", {})
+    monkeypatch.setattr(llm_service, "_llm_services", {})
+    monkeypatch.setattr(rag_service, "_rag_service", None)
+    monkeypatch.setattr(cosmos_service, "_cosmos_service", None)
+
+    orchestrator = AgentOrchestrator()
+    query = "What was settlement volume in Q2?"
+    result = await orchestrator.process_query(query, "u1", "c1")
+
+    assert result["response"] == f"This is a simulated answer to: {query}"
+    assert len(result["suggestions"]) == 3
+    assert result["metadata"]["query_analysis"]["reformulated_query"] == query
+    # Query understanding and the response (with its suggestions); no recommendation call
+    (model,) = llm_models._chat_models.values()
+    assert model.calls == 2
+
+    events = [event async for event in orchestrator.astream_query("And in Q3?", "u1", "c2")]
+    done = events[-1]["data"]
+    assert done["response"] == "This is a simulated answer to: And in Q3?"
+    assert "".join(e["data"]["delta"] for e in events if e["event"] == "token") == done["response"]
+    assert done["suggestions"] == result["suggestions"]
+    assert model.calls == 4
@@ -0,0 +1,139 @@
+"""
+Tests for the memory-mapped flat vector index.
+"""
+
+
+def make_index(tmp_path):
+    from src.services.flat_index import FlatVectorIndex
+
+    index = FlatVectorIndex(str(tmp_path))
+    index.upsert(
+        ["a", "b", "c", "d"],
+        [[1.0, 0.0], [0.8, 0.6], [0.0, 1.0], [-1.0, 0.0]],
+        ["alpha", "beta", "gamma", "delta"],
+        [
+            {"source": "faq", "year": 2024},
+            {"source": "report", "year": 2025},
+            {"source": "faq", "year": 2025},
+            {"source": "report", "year": 2023},
+        ],
+    )
+    return index
+
+
+def test_query_is_exact_and_ordered(tmp_path):
+    """Top-k returns the highest cosine similarities, best first."""
+    index = make_index(tmp_path)
+
+    results = index.query([2.0, 0.0], k=2)
+
+    assert [r[0] for r in results] == ["a", "b"]
+    assert results[0][2] == 1.0
+    assert abs(results[1][2] - 0.8) < 1e-6
+
+
+def test_query_prefilters_metadata(tmp_path):
+    """Filters are applied before ranking, not after."""
+    index = make_index(tmp_path)
+
+    assert [r[0] for r in index.query([1.0, 0.0], k=1, where={"source": "report"})] == ["b"]
+    assert [r[0] for r in index.query([1.0, 0.0], k=4, where={"year": {"$gte": 2025}})] == ["b", "c"]
+    assert [r[0] for r in index.query(
+        [1.0, 0.0], k=4, where={"$or": [{"source": "faq"}, {"year": {"$lt": 2024}}]}
+    )] == ["a", "c", "d"]
+
+
+def test_upsert_delete_and_reopen(tmp_path):
+    """Upserts replace rows, deletes compact, and the index survives a reopen."""
+    from src.services.flat_index import FlatVectorIndex
+
+    index = make_index(tmp_path)
+    index.upsert(["a"], [[0.0, 1.0]], ["alpha v2"], [{"source": "faq", "year": 2026}])
+    index.delete(where={"source": "report"})
+
+    reopened = FlatVectorIndex(str(tmp_path))
+    assert reopened.count() == 2
+    assert sorted(reopened.get()["ids"]) == ["a", "c"]
+    assert reopened.get(ids=["a"])["documents"] == ["alpha v2"]
+    assert reopened.query([0.0, 1.0], k=1)[0][0] in ("a", "c")
+    assert reopened.query([0.0, 1.0], k=2)[0][2] == 1.0
+
+
+def test_writes_append_to_the_log_and_compaction_keeps_rows(tmp_path):
+    """A write appends only its own records; compaction and torn tails keep the index readable."""
+    from src.services.flat_index import FlatVectorIndex
+
+    index = make_index(tmp_path)
+    log_path = tmp_path / "records.log"
+    size = log_path.stat().st_size
+
+    index.upsert(["e"], [[0.6, 0.8]], ["epsilon"], [{"source": "faq", "year": 2026}])
+    appended = log_path.read_bytes()[size:]
+    assert appended.count(b"\n") == 1 and b"alpha" not in appended
+
+    index.upsert(["a"], [[0.0, 1.0]], ["alpha v2"])
+    index.delete(ids=["b", "d"])
+    index.compact()
+    assert log_path.read_bytes().count(b"\n") == 3
+
+    with open(log_path, "ab") as f:
+        f.write(b'{"op": "put", "id": "x"')
+    reopened = FlatVectorIndex(str(tmp_path))
+    assert reopened.count() == 3
+    assert reopened.get(ids=["a", "c", "e"])["documents"] == ["alpha v2", "gamma", "epsilon"]
+    assert reopened.query([0.0, 1.0], k=1)[0][2] == 1.0
+    assert log_path.read_bytes().count(b"\n") == 3
+
+
+def test_legacy_records_file_is_migrated(tmp_path):
+    """An index saved as a single records.json reopens from the log format."""
+    import json
+
+    import numpy as np
+
+    from src.services.flat_index import FlatVectorIndex
+
+    vectors = np.memmap(tmp_path / "vectors.f32", dtype=np.float32, mode="w+", shape=(4, 2))
+    vectors[:2] = [[1.0, 0.0], [0.0, 1.0]]
+    vectors.flush()
+    (tmp_path / "records.json").write_text(json.dumps({
+        "dim": 2,
+        "capacity": 4,
+        "ids": ["a", "b"],
+        "documents": ["alpha", "beta"],
+        "metadatas": [{"source": "faq"}, {}],
+    }))
+
+    index = FlatVectorIndex(str(tmp_path))
+
+    assert not (tmp_path / "records.json").exists()
+    assert FlatVectorIndex(str(tmp_path)).get(where={"source": "faq"})["documents"] == ["alpha"]
+    assert index.query([0.0, 1.0], k=1)[0][:2] == ("b", "beta")
+
+
+def test_delete_interrupted_before_moving_vectors_is_completed_on_open(tmp_path):
+    """A crash between logging a delete and moving its rows leaves no stale vectors."""
+    import pytest
+
+    from src.services.flat_index import FlatVectorIndex
+
+    index = FlatVectorIndex(str(tmp_path))
+    index.upsert(["a", "b", "c"], [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]], ["a", "b", "c"])
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("crash")
+
+    index._remove_row = crash
+    with pytest.raises(RuntimeError):
+        index.delete(ids=["a"])
+
+    reopened = FlatVectorIndex(str(tmp_path))
+    assert sorted(reopened.get()["ids"]) == ["b", "c"]
+    assert [(r[0], r[2]) for r in reopened.query([0.0, 0.0, 1.0], k=1)] == [("c", 1.0)]
+    assert [(r[0], r[2]) for r in reopened.query([0.0, 1.0, 0.0], k=1)] == [("b", 1.0)]
+
+    # The completed delete is acknowledged, so later writes to the freed row are kept
+    reopened.upsert(["d"], [[1.0, 0.0, 0.0]], ["d"])
+    again = FlatVectorIndex(str(tmp_path))
+    assert [(r[0], r[2]) for r in again.query([0.0, 0.0, 1.0], k=1)] == [("c", 1.0)]
+    assert [(r[0], r[2]) for r in again.query([1.0, 0.0, 0.0], k=1)] == [("d", 1.0)]
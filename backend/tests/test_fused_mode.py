@@ -0,0 +1,148 @@
+"""
+Tests for fused mode: structured query analysis and suggestions returned with the response.
+"""
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from langchain_core.messages import AIMessage
+
+from src.agents.response_generation_agent import SUGGESTIONS_MARKER, SuggestionTrailer
+from src.models import QueryAnalysis
+
+
+def test_trailer_splits_answer_from_suggestions_across_deltas():
+    trailer = SuggestionTrailer()
+    deltas = ["The answer", " is 4%.\n<<<FOL", "LOW_UP>>>\n{\"sugg", "estions\": [\"Why?\", \" \", \"By region?\"]}"]
+
+    emitted = "".join(trailer.feed(delta) for delta in deltas) + trailer.finish()
+
+    assert emitted == "The answer is 4%."
+    assert trailer.suggestions() == ["Why?", "By region?"]
+
+
+def test_trailer_releases_text_that_only_looked_like_the_marker():
+    trailer = SuggestionTrailer()
+
+    emitted = trailer.feed("a <") + trailer.feed("<b>> c <<") + trailer.finish()
+
+    assert emitted == "a <<b>> c <<"
+    assert trailer.suggestions() is None
+
+
+def test_trailer_keeps_whitespace_without_a_marker():
+    trailer = SuggestionTrailer()
+
+    emitted = [trailer.feed("Volume rose "), trailer.feed("4%.\n\n"), trailer.finish()]
+
+    assert emitted == ["Volume rose", " 4%.", "\n\n"]
+    assert trailer.suggestions() is None
+
+
+def test_invalid_trailer_yields_no_suggestions():
+    trailer = SuggestionTrailer()
+    trailer.feed(f"answer\n{SUGGESTIONS_MARKER}\n[\"not an object\"")
+
+    assert trailer.suggestions() is None
+
+
+class StructuredModel:
+    """Chat model stand-in with structured output."""
+
+    def __init__(self, parsed, parsing_error=None):
+        self.parsed = parsed
+        self.parsing_error = parsing_error
+        self.calls = 0
+
+    def with_structured_output(self, schema, include_raw=False):
+        model = self
+
+        class Runnable:
+            async def ainvoke(self, messages, **kwargs):
+                model.calls += 1
+                return {"raw": AIMessage(content=""), "parsed": model.parsed, "parsing_error": model.parsing_error}
+
+        return Runnable()
+
+
+async def test_generate_structured_returns_validated_schema():
+    from src.services.llm_service import LLMService
+
+    service = LLMService(provider="openai")
+    service.response_cache = None
+    model = StructuredModel({
+        "intent": "compare", "entities": ["Q3"], "query_type": "comparison",
+        "reformulated_query": "Compare Q3 with Q2 revenue",
+    })
+    service._get_model = lambda provider=None, name=None: model
+
+    analysis = await service.generate_structured(
+        [{"role": "user", "content": "vs Q2?"}], QueryAnalysis, agent="QueryUnderstandingAgent"
+    )
+
+    assert isinstance(analysis, QueryAnalysis)
+    assert analysis.reformulated_query == "Compare Q3 with Q2 revenue"
+
+
+async def test_generate_structured_rejects_unparseable_output():
+    from src.services.llm_service import LLMService
+
+    service = LLMService(provider="openai")
+    service.response_cache = None
+    model = StructuredModel(None, parsing_error=ValueError("bad json"))
+    service._get_model = lambda provider=None, name=None: model
+
+    with pytest.raises(ValueError, match="did not match QueryAnalysis"):
+        await service.generate_structured([{"role": "user", "content": "hi"}], QueryAnalysis)
+
+
+async def test_query_understanding_uses_one_structured_call(monkeypatch):
+    from src.agents import query_understanding_agent
+
+    llm_service = MagicMock()
+    llm_service.generate_structured = AsyncMock(return_value=QueryAnalysis(
+        intent="analyze", entities=["merchants"], query_type="analytical",
+        reformulated_query="Top merchants by volume"
+    ))
+    monkeypatch.setattr(query_understanding_agent, "get_llm_service", lambda: llm_service)
+    monkeypatch.setattr(query_understanding_agent, "get_rag_service", MagicMock())
+    monkeypatch.setattr(query_understanding_agent.settings, "llm_fused_mode", True)
+
+    agent = query_understanding_agent.QueryUnderstandingAgent()
+    state = await agent.execute({"user_query": "top merchants?"})
+
+    assert state["reformulated_query"] == "Top merchants by volume"
+    assert state["query_analysis"]["entities"] == ["merchants"]
+    llm_service.generate_structured.assert_awaited_once()
+    llm_service.generate_response.assert_not_called()
+
+
+async def test_response_call_returns_suggestions_and_skips_recommendations(monkeypatch):
+    from src.agents import recommendation_agent, response_generation_agent
+
+    async def astream_response(**kwargs):
+        assert SUGGESTIONS_MARKER in kwargs["system_prompt"]
+        for delta in ["Volume rose 4%.", f"\n{SUGGESTIONS_MARKER}\n", '{"suggestions": ["Which merchants grew most?"]}']:
+            yield delta
+
+    llm_service = MagicMock()
+    llm_service.astream_response = astream_response
+    llm_service.generate_response = AsyncMock()
+    monkeypatch.setattr(response_generation_agent, "get_llm_service", lambda: llm_service)
+    monkeypatch.setattr(recommendation_agent, "get_llm_service", lambda: llm_service)
+    monkeypatch.setattr(response_generation_agent.settings, "llm_fused_mode", True)
+
+    received = []
+
+    async def on_token(delta):
+        received.append(delta)
+
+    state = await response_generation_agent.ResponseGenerationAgent().execute(
+        {"user_query": "How did volume change?", "on_token": on_token}
+    )
+    state = await recommendation_agent.RecommendationAgent().execute(state)
+
+    assert state["response"] == "Volume rose 4%."
+    assert "".join(received) == state["response"]
+    assert state["suggestions"] == ["Which merchants grew most?"]
+    llm_service.generate_response.assert_not_called()
@@ -0,0 +1,26 @@
+"""
+Tests for the runtime metrics endpoint.
+"""
+
+
+async def test_metrics_do_not_create_services(monkeypatch):
+    """A scrape before warm-up reports None instead of building services on the event loop."""
+    from src.api import health
+    from src.services import cosmos_service, llm_service, rag_service
+
+    monkeypatch.setattr(rag_service, "_rag_service", None)
+    monkeypatch.setattr(cosmos_service, "_cosmos_service", None)
+    monkeypatch.setattr(llm_service, "_llm_services", {})
+
+    def fail():
+        raise AssertionError("metrics must not create services")
+
+    monkeypatch.setattr(rag_service, "RAGService", fail)
+    monkeypatch.setattr(cosmos_service, "CosmosDBService", fail)
+    monkeypatch.setattr(llm_service, "LLMService", lambda provider: fail())
+
+    metrics = await health.service_metrics()
+
+    assert metrics["rag"] is None
+    assert metrics["llm"] is None
+    assert metrics["cosmos"] is None
@@ -0,0 +1,118 @@
+"""
+Tests for the batched RAG indexing pipeline.
+"""
+import pytest
+
+
+class FakeEmbeddings:
+    """Records the batch sizes it is called with."""
+
+    def __init__(self):
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(len(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class FakeCollection:
+    """Records bulk upserts and keeps the stored rows."""
+
+    def __init__(self):
+        self.upserts = []
+        self.rows = {}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        assert len(ids) == len(embeddings) == len(documents) == len(metadatas)
+        self.upserts.append(list(zip(ids, documents, metadatas)))
+        self.rows.update(zip(ids, metadatas))
+
+    def get(self, where=None, include=None):
+        sources = where["source_id"]["$in"]
+        return {"ids": [i for i, m in self.rows.items() if m["source_id"] in sources]}
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            self.rows.pop(chunk_id, None)
+
+
+def make_pipeline(embedding_batch_size=4, write_batch_size=8):
+    from src.services.indexing_pipeline import IndexingPipeline
+
+    pipeline = IndexingPipeline(FakeEmbeddings(), FakeCollection())
+    pipeline.chunk_size = 50
+    pipeline.chunk_overlap = 0
+    pipeline.embedding_batch_size = embedding_batch_size
+    pipeline.write_batch_size = write_batch_size
+    return pipeline
+
+
+@pytest.mark.asyncio
+async def test_index_embeds_and_writes_in_batches():
+    """Chunks are embedded in fixed batches and written in larger bulk batches."""
+    pipeline = make_pipeline()
+    texts = [f"document {i} " + "word " * 40 for i in range(5)]
+    updates = []
+
+    ids = await pipeline.index(texts, [{"source": f"doc{i}"} for i in range(len(texts))], updates.append)
+
+    assert len(ids) == len(set(ids))
+    assert all(len(chunk_id) == 32 for chunk_id in ids)
+    assert all(size <= 4 for size in pipeline.embeddings.batches)
+    assert sum(pipeline.embeddings.batches) == len(ids)
+
+    written = [row for upsert in pipeline.collection.upserts for row in upsert]
+    assert [row[0] for row in written] == ids
+    assert all(len(upsert) <= 8 for upsert in pipeline.collection.upserts)
+    assert {row[2]["source"] for row in written} == {f"doc{i}" for i in range(5)}
+    assert all("chunk_index" in row[2] for row in written)
+
+    assert updates[-1].done
+    assert updates[-1].written == updates[-1].chunks == len(ids)
+    pipeline.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_chunking_in_process_pool_matches_inline():
+    """Process-pool chunking yields the same chunks as in-thread chunking."""
+    texts = [f"section {i}. " + "value " * 30 for i in range(4)]
+
+    inline = make_pipeline()
+    inline.chunking_workers = 0
+    expected = await inline.chunk(texts)
+
+    pooled = make_pipeline()
+    pooled.chunking_workers = 2
+    pooled.process_min_chars = 0
+    assert await pooled.chunk(texts) == expected
+
+    inline.shutdown()
+    pooled.shutdown()
+
+
+async def test_reindexing_only_touches_changed_chunks():
+    """Content-addressed ids make indexing idempotent and incremental."""
+    from src.services.indexing_pipeline import IndexingPipeline
+
+    pipeline = IndexingPipeline(FakeEmbeddings(), FakeCollection())
+    pipeline.chunk_size = 50
+    pipeline.chunk_overlap = 0
+    paragraphs = [f"Paragraph {i} about merchant settlements." for i in range(4)]
+    metadata = [{"source_id": "doc-1"}]
+
+    first = await pipeline.index(["\n\n".join(paragraphs)], metadata)
+    embedded = sum(pipeline.embeddings.batches)
+    assert embedded == len(first) == len(pipeline.collection.rows)
+
+    # Same content again: nothing is embedded or written
+    updates = []
+    assert await pipeline.index(["\n\n".join(paragraphs)], metadata, updates.append) == first
+    assert sum(pipeline.embeddings.batches) == embedded
+    assert updates[-1].unchanged == len(first) and updates[-1].done
+
+    # Change one paragraph and drop the last one
+    changed = paragraphs[:1] + ["Paragraph 1 was rewritten."] + paragraphs[2:3]
+    second = await pipeline.index(["\n\n".join(changed)], metadata)
+    assert sum(pipeline.embeddings.batches) == embedded + 1
+    assert set(pipeline.collection.rows) == set(second)
+    assert len(set(first) & set(second)) == 2
@@ -0,0 +1,137 @@
+"""
+Tests for the BM25 lexical index and reciprocal rank fusion.
+"""
+
+
+def test_tokenize_keeps_identifiers():
+    """Compound identifiers are indexed whole and by part; stopwords are dropped."""
+    from src.services.lexical_index import tokenize
+
+    assert tokenize("What were the settlements for repay:settlement, BIN E001") == [
+        "settlements", "repay:settlement", "repay", "settlement", "bin", "e001"
+    ]
+
+
+def test_bm25_ranks_exact_identifier_first():
+    """A rare identifier outranks chunks that only share common words."""
+    from src.services.lexical_index import BM25Index
+
+    index = BM25Index()
+    index.add(
+        ["a", "b", "c"],
+        [
+            "Merchant transactions summary for the month",
+            "Merchant E001 declined transactions summary",
+            "Transactions summary by merchant category",
+        ],
+        [{"source": "report"}, {"source": "faq"}, {"source": "report"}],
+    )
+
+    assert index.search("declines for E001", k=3)[0][0] == "b"
+    assert {chunk_id for chunk_id, _ in index.search("merchant", k=3, where={"source": "report"})} == {"a", "c"}
+
+    index.remove(["b"])
+    assert all(chunk_id != "b" for chunk_id, _ in index.search("E001 merchant", k=3))
+    assert len(index) == 2
+
+
+def test_bm25_add_replaces_existing_chunk():
+    """Re-adding an id replaces its terms instead of accumulating them."""
+    from src.services.lexical_index import BM25Index
+
+    index = BM25Index()
+    index.add(["a"], ["old text about chargebacks"])
+    index.add(["a"], ["new text about refunds"])
+
+    assert index.search("chargebacks", k=1) == []
+    assert index.search("refunds", k=1)[0][0] == "a"
+
+
+def test_reciprocal_rank_fusion():
+    """Items ranked well in both lists win."""
+    from src.services.lexical_index import reciprocal_rank_fusion
+
+    fused = reciprocal_rank_fusion([["x", "y", "z"], ["y", "w"]], k=60)
+
+    assert fused[0][0] == "y"
+    assert {item for item, _ in fused} == {"x", "y", "z", "w"}
+
+
+def test_matches_where_operators():
+    """Chroma-style where filters are evaluated in process."""
+    from src.utils.metadata_filter import matches_where
+
+    metadata = {"source": "faq", "year": 2025}
+
+    assert matches_where(metadata, {"source": "faq"})
+    assert matches_where(metadata, {"year": {"$gte": 2024, "$lt": 2026}})
+    assert matches_where(metadata, {"$or": [{"source": "report"}, {"year": 2025}]})
+    assert not matches_where(metadata, {"$and": [{"source": "faq"}, {"year": {"$in": [2023]}}]})
+    assert not matches_where(metadata, {"missing": {"$gt": 1}})
+
+
+class TopicEmbeddings:
+    """Embeds text on two topic axes plus an 'other' axis."""
+
+    def embed_query(self, text):
+        text = text.lower()
+        return [float("settlement" in text), float("chargeback" in text), 0.1]
+
+
+def make_hybrid_service(tmp_path, monkeypatch):
+    from src.services import rag_service
+    from src.services.flat_index import FlatVectorIndex
+    from src.services.lexical_index import BM25Index
+
+    monkeypatch.setattr(rag_service.settings, "rag_enabled", False)
+    service = rag_service.RAGService()
+    service.embeddings = TopicEmbeddings()
+    service.vector_store = service.collection = FlatVectorIndex(str(tmp_path))
+    texts = [
+        "Settlement totals are posted daily for the merchant",
+        "Chargeback rules for merchant E001 and what the merchant must provide",
+    ]
+    service.collection.upsert(
+        ["s", "c"], [service.embeddings.embed_query(t) for t in texts], texts, [{}, {}]
+    )
+    service.lexical_index = BM25Index()
+    service.lexical_index.add(["s", "c"], texts)
+    return service
+
+
+async def test_off_topic_query_returns_nothing(tmp_path, monkeypatch):
+    """Sharing only stopwords or weak terms with a chunk is not a match."""
+    service = make_hybrid_service(tmp_path, monkeypatch)
+
+    assert await service.similarity_search("What is the weather like for the weekend?", k=2) == []
+
+
+async def test_hybrid_scores_are_similarities(tmp_path, monkeypatch):
+    """Fused rank orders the results, but each keeps its cosine similarity."""
+    from src.services import rag_service
+
+    service = make_hybrid_service(tmp_path, monkeypatch)
+    monkeypatch.setattr(rag_service.settings, "rag_lexical_min_score", 0.5)
+
+    dense = await service.similarity_search("settlement totals", k=2)
+    assert [text for text, _, _ in dense] == ["Settlement totals are posted daily for the merchant"]
+    assert 0.9 < dense[0][1] <= 1.0
+
+    # Found by its identifier only: kept, scored by its (low) similarity
+    lexical = await service.similarity_search("E001", k=2, score_threshold=0.7)
+    assert len(lexical) == 1 and lexical[0][0].startswith("Chargeback")
+    assert lexical[0][1] < 0.7
+
+
+async def test_delete_documents_counts_only_stored_chunks(tmp_path, monkeypatch):
+    """Unknown ids are not counted, and deleted chunks leave the lexical index too."""
+    from src.services.indexing_pipeline import IndexingPipeline
+
+    service = make_hybrid_service(tmp_path, monkeypatch)
+    service.indexing_pipeline = IndexingPipeline(service.embeddings, service.collection)
+    service.indexing_pipeline.lexical_index = service.lexical_index
+
+    assert await service.delete_documents(ids=["missing"]) == 0
+    assert await service.delete_documents(ids=["c", "missing"]) == 1
+    assert service.collection.get()["ids"] == ["s"]
+    assert service.lexical_index.search("E001", k=2) == []
@@ -0,0 +1,130 @@
+"""
+Tests for hedged LLM requests, provider failover and latency histograms.
+"""
+import asyncio
+
+import pytest
+
+from langchain_core.messages import AIMessageChunk
+
+from src.services.llm_hedging import HedgingPolicy, parse_providers
+from src.utils.latency_histogram import LatencyHistogram
+
+
+def test_histogram_keeps_a_sliding_window():
+    histogram = LatencyHistogram(window=3, bounds_ms=(100, 1000))
+    for value in (50, 500, 5000, 80):
+        histogram.add(value)
+
+    stats = histogram.stats()
+    assert len(histogram) == 3
+    assert stats["total"] == 4
+    # The first sample (50 ms) left the window
+    assert stats["buckets"] == {"le_100": 1, "le_1000": 1, "le_inf": 1}
+    assert histogram.percentile(99) == 5000
+
+
+def test_hedge_delay_follows_provider_percentile():
+    policy = HedgingPolicy("openai", ["anthropic"], min_samples=3, default_delay_ms=2000, min_delay_ms=100)
+
+    assert policy.hedge_delay("openai", "response") == 2.0
+    for value in (300, 400, 500):
+        policy.histogram("openai", "response").add(value)
+    assert policy.hedge_delay("openai", "response") == 0.5
+    assert parse_providers(" anthropic, google ,") == ["anthropic", "google"]
+
+
+async def test_failover_on_error():
+    policy = HedgingPolicy("openai", ["anthropic"])
+
+    async def start(provider):
+        if provider == "openai":
+            raise RuntimeError("primary down")
+        return provider
+
+    assert await policy.race(start, "response") == "anthropic"
+    stats = policy.stats()
+    assert stats["failovers"] == 1
+    assert stats["fallback_wins"] == 1
+    assert stats["providers"]["openai"]["errors"] == 1
+    assert stats["providers"]["anthropic"]["response"]["samples"] == 1
+
+
+async def test_all_providers_failing_raises_last_error():
+    policy = HedgingPolicy("openai", ["anthropic"])
+
+    async def start(provider):
+        raise RuntimeError(f"{provider} down")
+
+    with pytest.raises(RuntimeError, match="anthropic down"):
+        await policy.race(start, "response")
+
+
+async def test_slow_primary_is_hedged_and_cancelled():
+    policy = HedgingPolicy(
+        "openai", ["anthropic"], hedge_enabled=True, default_delay_ms=20, min_delay_ms=0
+    )
+    cancelled = asyncio.Event()
+
+    async def start(provider):
+        if provider == "openai":
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        return provider
+
+    assert await asyncio.wait_for(policy.race(start, "response"), timeout=1) == "anthropic"
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert policy.hedges == 1
+
+
+async def test_fast_primary_is_not_hedged():
+    policy = HedgingPolicy("openai", ["anthropic"], hedge_enabled=True, default_delay_ms=500)
+    started = []
+
+    async def start(provider):
+        started.append(provider)
+        return provider
+
+    assert await policy.race(start, "response") == "openai"
+    assert started == ["openai"]
+
+
+class StreamingModel:
+    """Chat model stand-in that streams after a delay."""
+
+    def __init__(self, chunks, delay):
+        self.chunks = chunks
+        self.delay = delay
+
+    async def astream(self, messages, **kwargs):
+        await asyncio.sleep(self.delay)
+        for chunk in self.chunks:
+            yield AIMessageChunk(content=chunk)
+
+
+async def test_stream_is_hedged_until_first_delta():
+    from src.services.llm_service import LLMService
+
+    service = LLMService(provider="openai")
+    service.response_cache = None
+    service.scheduler = None
+    service.hedging = HedgingPolicy(
+        "openai", ["anthropic"], hedge_enabled=True, default_delay_ms=20, min_delay_ms=0
+    )
+    models = {
+        "openai": StreamingModel(["slow"], delay=5),
+        "anthropic": StreamingModel(["fast ", "answer"], delay=0),
+    }
+    service._get_model = lambda provider=None, name=None: models[provider]
+
+    deltas = [
+        delta async for delta in service.astream_response(
+            [{"role": "user", "content": "hi"}], agent="ResponseGenerationAgent"
+        )
+    ]
+
+    assert deltas == ["fast ", "answer"]
+    assert service.stats()["hedging"]["fallback_wins"] == 1
@@ -0,0 +1,89 @@
+"""
+Tests for per-agent model routing and pooled LLM clients.
+"""
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from src.services import llm_models
+from src.services.llm_models import ANY_PROVIDER, FAST_TIER, parse_agent_models
+
+
+def test_parse_agent_models():
+    routes = parse_agent_models(
+        "QueryUnderstandingAgent=fast, RecommendationAgent=anthropic:claude-3-haiku-20240307,"
+        "RecommendationAgent=gpt-4o-mini",
+        default_provider="openai"
+    )
+
+    assert routes == {
+        "QueryUnderstandingAgent": {ANY_PROVIDER: FAST_TIER},
+        "RecommendationAgent": {"anthropic": "claude-3-haiku-20240307", "openai": "gpt-4o-mini"},
+    }
+
+
+def test_agents_are_routed_to_their_models(monkeypatch):
+    from src.services.llm_service import LLMService
+
+    monkeypatch.setattr(llm_models.settings, "openai_fast_model", "gpt-4o-mini")
+    service = LLMService(provider="openai")
+    service.routes = parse_agent_models(
+        "QueryUnderstandingAgent=fast,RecommendationAgent=anthropic:claude-3-haiku-20240307",
+        default_provider="openai"
+    )
+
+    assert service._model_name("openai", "QueryUnderstandingAgent") == "gpt-4o-mini"
+    assert service._model_name("openai", "ResponseGenerationAgent") == llm_models.settings.openai_model
+    # Routes for another provider do not apply on this one
+    assert service._model_name("openai", "RecommendationAgent") == llm_models.settings.openai_model
+    assert service._model_name("anthropic", "RecommendationAgent") == "claude-3-haiku-20240307"
+
+
+class RecordingModel:
+    """Chat model stand-in that answers with its model name."""
+
+    def __init__(self, name):
+        self.name = name
+
+    async def agenerate(self, batches, **kwargs):
+        return LLMResult(generations=[[ChatGeneration(message=AIMessage(content=self.name))]])
+
+
+async def test_clients_are_pooled_per_provider_and_model(monkeypatch):
+    from src.services.llm_service import LLMService
+
+    created = []
+
+    def create(provider, model):
+        created.append((provider, model))
+        return RecordingModel(model)
+
+    monkeypatch.setattr(llm_models, "_create_chat_model", create)
+    monkeypatch.setattr(llm_models, "_chat_models", {})
+    monkeypatch.setattr(llm_models.settings, "openai_fast_model", "gpt-4o-mini")
+
+    first = LLMService(provider="openai")
+    second = LLMService(provider="openai")
+    for service in (first, second):
+        service.response_cache = None
+        service.routes = parse_agent_models("QueryUnderstandingAgent=fast", "openai")
+    messages = [{"role": "user", "content": "hi"}]
+
+    assert await first.generate_response(messages, agent="QueryUnderstandingAgent") == "gpt-4o-mini"
+    assert await second.generate_response(messages, agent="QueryUnderstandingAgent") == "gpt-4o-mini"
+    answer = await first.generate_response(messages, agent="ResponseGenerationAgent")
+
+    assert answer == llm_models.settings.openai_model
+    assert created == [("openai", "gpt-4o-mini"), ("openai", llm_models.settings.openai_model)]
+    assert llm_models.pooled_models() == {"openai": 2}
+
+
+def test_get_llm_service_keeps_one_service_per_provider(monkeypatch):
+    from src.services import llm_service
+
+    monkeypatch.setattr(llm_service, "_llm_services", {})
+
+    openai_service = llm_service.get_llm_service("openai")
+    anthropic_service = llm_service.get_llm_service("anthropic")
+
+    assert llm_service.get_llm_service("openai") is openai_service
+    assert anthropic_service.provider == "anthropic"
@@ -0,0 +1,150 @@
+"""
+Tests for per-provider rate limiting and priority scheduling of LLM calls.
+"""
+import asyncio
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from src.services.llm_scheduler import (
+    PRIORITY_RECOMMENDATIONS,
+    PRIORITY_RESPONSE,
+    PRIORITY_UNDERSTANDING,
+    LLMScheduler,
+    TokenBucket,
+    agent_priority,
+    parse_rate_limits,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_at_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(per_minute=60, burst_seconds=5, clock=clock)
+
+    assert bucket.capacity == 5
+    bucket.take(5)
+    assert bucket.wait_time(1) == 1.0
+    clock.now = 2.0
+    assert bucket.wait_time(2) == 0.0
+    # Oversized requests only wait for a full bucket
+    assert bucket.wait_time(50) == 3.0
+
+
+def test_parse_rate_limits_and_agent_priorities():
+    assert parse_rate_limits("openai:500:200000, anthropic:50:0") == {
+        "openai": (500, 200000),
+        "anthropic": (50, 0),
+    }
+    assert agent_priority("ResponseGenerationAgent") == PRIORITY_RESPONSE
+    assert agent_priority("RecommendationAgent") == PRIORITY_RECOMMENDATIONS
+    assert agent_priority(None) == PRIORITY_UNDERSTANDING
+
+
+async def test_queued_calls_run_in_priority_order():
+    scheduler = LLMScheduler("openai", max_concurrency=1)
+    order = []
+    gate = asyncio.Event()
+
+    async def call(priority, name):
+        async with scheduler.slot(priority, 10):
+            order.append(name)
+            await gate.wait()
+
+    blocker = asyncio.create_task(call(PRIORITY_UNDERSTANDING, "first"))
+    await asyncio.sleep(0)
+    waiting = [
+        asyncio.create_task(call(PRIORITY_RECOMMENDATIONS, "recommendations")),
+        asyncio.create_task(call(PRIORITY_UNDERSTANDING, "understanding")),
+        asyncio.create_task(call(PRIORITY_RESPONSE, "response")),
+    ]
+    await asyncio.sleep(0.01)
+    assert scheduler.queued == 3
+
+    gate.set()
+    await asyncio.gather(blocker, *waiting)
+
+    assert order == ["first", "response", "understanding", "recommendations"]
+    stats = scheduler.stats()
+    assert stats["in_flight"] == 0
+    assert stats["classes"]["response"]["admitted"] == 1
+    assert stats["classes"]["recommendations"]["queue_ms_p50"] > 0
+
+
+async def test_request_quota_delays_admission():
+    scheduler = LLMScheduler("openai", requests_per_minute=600, burst_seconds=0.2)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    for _ in range(4):
+        async with scheduler.slot(PRIORITY_RESPONSE, 1):
+            pass
+
+    # Two requests fit the burst, the other two wait 0.1 s each
+    assert loop.time() - started >= 0.15
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    scheduler = LLMScheduler("openai", max_concurrency=1)
+    gate = asyncio.Event()
+
+    async def hold():
+        async with scheduler.slot(PRIORITY_RESPONSE, 1):
+            await gate.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    await asyncio.sleep(0)
+    gate.set()
+    await holder
+
+    assert scheduler.queued == 0
+    assert scheduler.in_flight == 0
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FlakyModel:
+    """Chat model stand-in that is rate limited once."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def agenerate(self, batches, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            raise RateLimitError("slow down")
+        return LLMResult(generations=[[ChatGeneration(message=AIMessage(content="ok"))]])
+
+
+async def test_llm_service_retries_after_rate_limit(monkeypatch):
+    from src.services.llm_service import LLMService
+
+    monkeypatch.setattr("src.services.llm_service.retry_after_seconds", lambda error: 0.01)
+    service = LLMService(provider="openai")
+    service.scheduler = LLMScheduler("openai")
+    model = FlakyModel()
+    service._get_model = lambda provider=None, name=None: model
+    service.response_cache = None
+
+    response = await service.generate_response(
+        [{"role": "user", "content": "hi"}], agent="RecommendationAgent"
+    )
+
+    assert response == "ok"
+    assert model.calls == 2
+    stats = service.stats()["scheduler"]
+    assert stats["rate_limited"] == 1
+    assert stats["classes"]["recommendations"]["admitted"] == 2
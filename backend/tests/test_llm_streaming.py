@@ -0,0 +1,79 @@
+"""
+Tests for token streaming from the LLM service through the response agent.
+"""
+from unittest.mock import MagicMock
+
+from langchain_core.messages import AIMessageChunk
+
+from src.services.response_cache import ResponseCache
+
+
+class StreamingModel:
+    """Chat model stand-in that streams fixed chunks."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.streams = 0
+
+    async def astream(self, messages, **kwargs):
+        self.streams += 1
+        for chunk in self.chunks:
+            yield AIMessageChunk(content=chunk)
+
+
+async def test_astream_response_yields_deltas_and_records_latency():
+    from src.services.llm_service import LLMService
+
+    service = LLMService(provider="openai")
+    model = StreamingModel(["Settlement ", "", "volume ", [{"type": "text", "text": "rose."}]])
+    service._get_model = lambda provider=None, name=None: model
+    service.response_cache = None
+
+    deltas = [delta async for delta in service.astream_response([{"role": "user", "content": "hi"}])]
+
+    assert deltas == ["Settlement ", "volume ", "rose."]
+    streaming = service.stats()["streaming"]
+    assert streaming["streams"] == 1
+    assert streaming["first_token_ms_p50"] <= streaming["total_ms_p50"]
+
+
+async def test_astream_response_replays_cached_response_in_one_delta():
+    from src.services.llm_service import LLMService
+
+    service = LLMService(provider="openai")
+    model = StreamingModel(["a", "b"])
+    service._get_model = lambda provider=None, name=None: model
+    service.response_cache = ResponseCache({"RecommendationAgent": 60})
+    messages = [{"role": "user", "content": "suggest questions"}]
+
+    first = [d async for d in service.astream_response(messages, agent="RecommendationAgent")]
+    second = [d async for d in service.astream_response(messages, agent="RecommendationAgent")]
+
+    assert first == ["a", "b"]
+    assert second == ["ab"]
+    assert model.streams == 1
+
+
+async def test_response_agent_forwards_tokens(monkeypatch):
+    """Each delta reaches the on_token callback before the response completes."""
+    from src.agents import response_generation_agent
+
+    async def astream_response(**kwargs):
+        for delta in ["Revenue ", "grew ", "4%."]:
+            yield delta
+
+    llm_service = MagicMock()
+    llm_service.astream_response = astream_response
+    monkeypatch.setattr(response_generation_agent, "get_llm_service", lambda: llm_service)
+    monkeypatch.setattr(response_generation_agent.settings, "llm_fused_mode", False)
+
+    received = []
+
+    async def on_token(delta):
+        received.append(delta)
+
+    agent = response_generation_agent.ResponseGenerationAgent()
+    state = await agent.execute({"user_query": "How did revenue change?", "on_token": on_token})
+
+    assert received == ["Revenue ", "grew ", "4%."]
+    assert state["response"] == "Revenue grew 4%."
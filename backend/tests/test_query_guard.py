@@ -0,0 +1,168 @@
+"""
+Tests for the gold query analyzer and admission guard.
+"""
+import pytest
+
+
+def test_analyze_query_classes():
+    """Queries are classified by how much of (pkType, pkFilter) they pin down."""
+    from src.utils.query_analyzer import QueryClass, analyze_query
+
+    params = [
+        {"name": "@t", "value": "repay:settlement"},
+        {"name": "@f", "value": 20251122},
+        {"name": "@id", "value": "abc"},
+    ]
+
+    assert analyze_query(
+        "SELECT * FROM c WHERE c.pkType = @t AND c.pkFilter = @f AND c.id = @id", params
+    ).query_class == QueryClass.POINT_READ
+    assert analyze_query(
+        "SELECT * FROM c WHERE c.pkType = @t AND c.pkFilter = @f", params
+    ).query_class == QueryClass.SINGLE_PARTITION
+    assert analyze_query(
+        "SELECT * FROM c WHERE c.pkType = 'repay:settlement' AND STRINGTONUMBER(c.pkFilter) >= 20251101"
+    ).query_class == QueryClass.PREFIX
+    assert analyze_query(
+        "SELECT * FROM c WHERE c.pkType IN ('repay:settlement', 'merchant:information')"
+    ).query_class == QueryClass.FAN_OUT
+    assert analyze_query(
+        "SELECT * FROM c WHERE c.pkType = 'a' OR c.pkType = 'b'"
+    ).query_class == QueryClass.FAN_OUT
+    assert analyze_query("SELECT * FROM c").query_class == QueryClass.FULL_SCAN
+
+
+def test_or_within_one_partition_is_not_fan_out():
+    """An OR over non-key fields keeps the query in its partition."""
+    from src.utils.query_analyzer import QueryClass, analyze_query
+
+    assert analyze_query(
+        "SELECT * FROM c WHERE c.pkType = 'settlement' AND c.pkFilter = '20251121' "
+        "AND (c.status = 'a' OR c.status = 'b')"
+    ).query_class == QueryClass.SINGLE_PARTITION
+    assert analyze_query(
+        "SELECT * FROM c WHERE c.pkType = 'settlement' AND (c.note = 'x OR (y' OR c.status = 'b')"
+    ).query_class == QueryClass.PREFIX
+    assert analyze_query(
+        "SELECT * FROM c WHERE c.pkType = 'settlement' AND (c.pkFilter = '1' OR c.pkFilter = '2')"
+    ).query_class == QueryClass.FAN_OUT
+
+
+def test_apply_top():
+    """TOP is added when missing and tightened when too large."""
+    from src.utils.query_analyzer import apply_top
+
+    assert apply_top("SELECT * FROM c", 100) == "SELECT TOP 100 * FROM c"
+    assert apply_top("SELECT TOP 5000 * FROM c", 100) == "SELECT TOP 100 * FROM c"
+    assert apply_top("SELECT TOP 10 * FROM c", 100) == "SELECT TOP 10 * FROM c"
+    assert apply_top("SELECT * FROM c OFFSET 0 LIMIT 5000", 100) == "SELECT * FROM c OFFSET 0 LIMIT 100"
+    assert apply_top("SELECT * FROM c OFFSET 0 LIMIT 10", 100) == "SELECT * FROM c OFFSET 0 LIMIT 10"
+
+
+def test_guard_lowers_offset_limit_instead_of_adding_top():
+    """Cosmos DB rejects TOP with OFFSET ... LIMIT, so the LIMIT value is lowered."""
+    from src.services.query_guard import AdmissionAction, PartitionCatalog, QueryAdmissionGuard
+    from src.utils import settings
+
+    query = "SELECT * FROM c WHERE c.pkType='settlement' ORDER BY c.date OFFSET 0 LIMIT 50000"
+    small = PartitionCatalog()
+    small.update([{"pkType": "settlement", "pkFilter": 20251121, "cnt": 100}])
+
+    # Within budget (small catalog) and over budget (default estimates)
+    for guard in (QueryAdmissionGuard(catalog=small), QueryAdmissionGuard(catalog=PartitionCatalog())):
+        decision = guard.admit(query, caller="api")
+
+        assert decision.action == AdmissionAction.LIMIT
+        assert "TOP" not in decision.query
+        assert decision.query.endswith(f"OFFSET 0 LIMIT {settings.query_guard_max_rows}")
+
+
+def test_guard_uses_partition_catalog():
+    """Estimates come from catalog counts, narrowed by pkFilter ranges."""
+    from src.services.query_guard import PartitionCatalog, QueryAdmissionGuard
+    from src.utils.query_analyzer import analyze_query
+
+    catalog = PartitionCatalog()
+    catalog.update([
+        {"pkType": "repay:settlement", "pkFilter": 20251120, "cnt": 100},
+        {"pkType": "repay:settlement", "pkFilter": 20251121, "cnt": 200},
+        {"pkType": "merchant:information", "pkFilter": 20251121, "cnt": 50},
+    ])
+    guard = QueryAdmissionGuard(catalog=catalog)
+
+    analysis = analyze_query(
+        "SELECT * FROM c WHERE c.pkType = 'repay:settlement' AND c.pkFilter >= 20251121"
+    )
+    assert guard.estimate_documents(analysis) == 200
+    assert guard.estimate_documents(analyze_query("SELECT * FROM c")) == 350
+
+
+def test_guard_limits_and_rejects():
+    """Unbounded scans get a TOP; unlimitable expensive queries are rejected."""
+    from src.services.query_guard import (
+        AdmissionAction,
+        PartitionCatalog,
+        QueryAdmissionGuard,
+        QueryRejectedError,
+    )
+
+    catalog = PartitionCatalog()
+    catalog.update([{"pkType": "repay:settlement", "pkFilter": 20251121, "cnt": 10000000}])
+    guard = QueryAdmissionGuard(catalog=catalog)
+
+    decision = guard.admit("SELECT * FROM c", caller="api")
+    assert decision.action == AdmissionAction.LIMIT
+    assert decision.query.startswith("SELECT TOP ")
+
+    with pytest.raises(QueryRejectedError) as exc_info:
+        guard.admit("SELECT c.pkType, COUNT(1) AS cnt FROM c GROUP BY c.pkType", caller="api")
+    assert exc_info.value.decision.action == AdmissionAction.REJECT
+
+
+def test_guard_prefers_observed_charges():
+    """Recorded request charges override the catalog estimate for the same shape."""
+    from src.services.query_guard import PartitionCatalog, QueryAdmissionGuard
+    from src.utils.query_analyzer import analyze_query
+
+    guard = QueryAdmissionGuard(catalog=PartitionCatalog())
+    query = "SELECT c.pkFilter, COUNT(1) AS cnt FROM c WHERE c.pkType = 'repay:settlement' GROUP BY c.pkFilter"
+
+    guard.observe(query, None, 42.0)
+    _, estimated_ru = guard.estimate_ru(analyze_query(query))
+    assert estimated_ru == 42.0
+
+
+async def test_api_reports_limited_queries(monkeypatch):
+    """The analytics API tells callers when the guard capped their query."""
+    from src.api import analytics
+    from src.services import cosmos_service as cosmos_module
+    from src.services.cosmos_service import CosmosDBService
+    from src.services.query_guard import PartitionCatalog, QueryAdmissionGuard
+
+    class Pages:
+        def by_page(self):
+            return [[{"id": "a"}, {"id": "b"}]]
+
+    class GoldContainer:
+        id = "gold"
+
+        def __init__(self):
+            self.queries = []
+
+        def query_items(self, query, parameters, **kwargs):
+            self.queries.append(query)
+            return Pages()
+
+    service = CosmosDBService()
+    service.slow_query_log = None
+    service.gold_container = GoldContainer()
+    monkeypatch.setattr(cosmos_module, "get_query_guard", lambda: QueryAdmissionGuard(catalog=PartitionCatalog()))
+    monkeypatch.setattr(analytics, "get_cosmos_service", lambda: service)
+
+    response = await analytics.execute_query(analytics.QueryRequest(query="SELECT * FROM c", user_id="u1"))
+
+    assert response["limited"] is True
+    assert response["applied_query"].startswith("SELECT TOP ")
+    assert response["applied_query"] == service.gold_container.queries[0]
+    assert response["admission_reason"].startswith("limited to")
+    assert response["count"] == 2
@@ -0,0 +1,74 @@
+"""
+Tests for the exact-match LLM response cache.
+"""
+from types import SimpleNamespace
+
+from src.services.response_cache import ResponseCache, parse_agent_ttls
+
+
+class CountingModel:
+    """Chat model stand-in that counts provider calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def agenerate(self, batches, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(generations=[[SimpleNamespace(text=f"answer {self.calls}")]])
+
+
+def test_parse_agent_ttls():
+    assert parse_agent_ttls("QueryUnderstandingAgent, RecommendationAgent:60", 3600) == {
+        "QueryUnderstandingAgent": 3600,
+        "RecommendationAgent": 60,
+    }
+
+
+def test_disk_tier_survives_restart_and_expires(tmp_path, monkeypatch):
+    """Entries persist in SQLite and are not served after their TTL."""
+    import src.services.response_cache as response_cache
+
+    path = str(tmp_path / "llm_cache.sqlite")
+    key = ResponseCache.make_key("openai", "gpt-4", 0.7, "sys", [{"role": "user", "content": "hi"}])
+    ResponseCache({"Agent": 60}, path=path).put(key, "hello", "Agent")
+
+    reopened = ResponseCache({"Agent": 60}, path=path)
+    assert reopened.get(key, "Agent") == "hello"
+    assert reopened.stats()["agents"]["Agent"]["disk_hits"] == 1
+
+    now = response_cache.time.time()
+    monkeypatch.setattr(response_cache.time, "time", lambda: now + 61)
+    assert reopened.get(key, "Agent") is None
+
+
+def test_key_ignores_surrounding_whitespace_only():
+    base = ResponseCache.make_key("openai", "gpt-4", 0.7, "sys", [{"role": "user", "content": "Top merchants"}])
+    padded = ResponseCache.make_key("openai", "gpt-4", 0.7, "sys\n", [{"role": "user", "content": " Top merchants\r\n"}])
+    hotter = ResponseCache.make_key("openai", "gpt-4", 0.9, "sys", [{"role": "user", "content": "Top merchants"}])
+
+    assert base == padded
+    assert base != hotter
+
+
+async def test_llm_service_caches_only_opted_in_agents():
+    """Repeated prompts from an opted-in agent skip the provider call."""
+    from src.services.llm_service import LLMService
+
+    service = LLMService(provider="openai")
+    model = CountingModel()
+    service._get_model = lambda provider=None, name=None: model
+    service.response_cache = ResponseCache({"QueryUnderstandingAgent": 60})
+    messages = [{"role": "user", "content": "Analyze this query: top merchants"}]
+
+    first = await service.generate_response(messages, "system", agent="QueryUnderstandingAgent")
+    second = await service.generate_response(messages, "system", agent="QueryUnderstandingAgent")
+    assert first == second == "answer 1"
+    assert model.calls == 1
+
+    await service.generate_response(messages, "system", agent="ResponseGenerationAgent")
+    await service.generate_response(messages, "system", agent="ResponseGenerationAgent")
+    assert model.calls == 3
+
+    stats = service.stats()["response_cache"]["agents"]
+    assert stats["QueryUnderstandingAgent"] == {"hits": 1, "disk_hits": 0, "misses": 1, "hit_rate": 0.5}
+    assert "ResponseGenerationAgent" not in stats
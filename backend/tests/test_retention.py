@@ -0,0 +1,38 @@
+"""
+Tests for TTL-driven retention.
+"""
+from datetime import datetime
+
+
+def test_deleted_conversation_gets_ttl(sample_conversation):
+    """Deleting a conversation schedules its expiry."""
+    from src.services.retention_service import RetentionService
+
+    service = RetentionService()
+    service.deleted_conversation_days = 7
+
+    service.stamp_deleted_conversation(sample_conversation)
+
+    assert sample_conversation.status == "deleted"
+    assert sample_conversation.ttl == 7 * 24 * 60 * 60
+    assert sample_conversation.to_cosmos_dict()["ttl"] == 7 * 24 * 60 * 60
+
+
+def test_active_conversation_has_no_ttl(sample_conversation):
+    """Active conversations never carry a ttl field."""
+    assert "ttl" not in sample_conversation.to_cosmos_dict()
+
+
+def test_gold_ttl_follows_business_date():
+    """Gold items expire a retention window after their pkFilter date."""
+    from src.services.retention_service import RetentionService
+
+    service = RetentionService()
+    service.gold_days = {"repay:settlement": 10}
+    service.gold_default_days = 0
+    now = datetime(2025, 11, 25)
+
+    assert service.gold_ttl({"pkType": "repay:settlement", "pkFilter": 20251120}, now) == 5 * 24 * 60 * 60
+    assert service.gold_ttl({"pkType": "repay:settlement", "pkFilter": 20251101}, now) == 1
+    assert service.gold_ttl({"pkType": "repay:settlement", "pkFilter": "merchant123"}, now) == 10 * 24 * 60 * 60
+    assert service.gold_ttl({"pkType": "merchant:information", "pkFilter": 20251120}, now) is None
@@ -0,0 +1,108 @@
+"""
+Tests for request coalescing of identical in-flight calls.
+"""
+import asyncio
+
+import pytest
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from src.utils.singleflight import SingleFlight, flight_key
+
+
+async def test_concurrent_identical_calls_run_once():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return ["row"]
+
+    results = await asyncio.gather(*(flight.do("key", fetch, share=list) for _ in range(5)))
+
+    assert calls == 1
+    assert results == [["row"]] * 5
+    # Joiners get copies, so mutating one result does not affect the others
+    results[1].append("extra")
+    assert results[2] == ["row"]
+    assert flight.stats() == {"name": "test", "calls": 5, "coalesced": 4, "in_flight": 0}
+
+
+async def test_key_is_released_after_the_call():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await flight.do("key", fetch) == 1
+    assert await flight.do("key", fetch) == 2
+    assert flight.in_flight == 0
+
+
+async def test_exceptions_propagate_to_every_caller():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.in_flight == 0
+
+
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    flight = SingleFlight("test")
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.create_task(flight.do("key", fetch))
+    second = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+def test_flight_key_ignores_dict_order():
+    assert flight_key("q", {"a": 1, "b": 2}) == flight_key("q", {"b": 2, "a": 1})
+    assert flight_key("q", 5) != flight_key("q", 6)
+
+
+class SlowModel:
+    """Chat model stand-in that counts provider calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def agenerate(self, batches, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return LLMResult(generations=[[ChatGeneration(message=AIMessage(content="answer"))]])
+
+
+async def test_llm_service_coalesces_identical_prompts():
+    from src.services.llm_service import LLMService
+
+    service = LLMService(provider="openai")
+    model = SlowModel()
+    service._get_model = lambda provider=None, name=None: model
+    service.response_cache = None
+    messages = [{"role": "user", "content": "Total volume?"}]
+
+    results = await asyncio.gather(*(service.generate_response(messages) for _ in range(3)))
+
+    assert results == ["answer"] * 3
+    assert model.calls == 1
+    assert service.stats()["coalescing"]["coalesced"] == 2
@@ -0,0 +1,66 @@
+"""
+Tests for the Cosmos DB slow-query log.
+"""
+import json
+
+
+def test_normalize_query_replaces_literals():
+    """Queries differing only in literals share one shape."""
+    from src.utils.slow_query_log import normalize_query
+
+    a = normalize_query("SELECT TOP 10 * FROM c WHERE c.pkType = 'repay:settlement' AND c.pkFilter >= 20251122")
+    b = normalize_query("SELECT  TOP 50 * FROM c\nWHERE c.pkType = 'merchant:information' AND c.pkFilter >= 20250101")
+
+    assert a == b
+    assert a == "SELECT TOP ? * FROM c WHERE c.pkType = ? AND c.pkFilter >= ?"
+
+
+def test_partition_scope():
+    """Partition scope follows the hierarchical (pkType, pkFilter) key."""
+    from src.utils.slow_query_log import partition_scope
+
+    params = [{"name": "@t", "value": "repay:settlement"}, {"name": "@f", "value": 20251122}]
+    assert partition_scope("SELECT * FROM c WHERE c.pkType = @t AND c.pkFilter = @f", params) == "single_partition"
+    assert partition_scope("SELECT * FROM c WHERE c.pkType = 'repay:settlement'") == "prefix"
+    assert partition_scope("SELECT * FROM c") == "full_scan"
+
+
+def test_query_stats_accumulates_pages():
+    """Counts are summed across pages and ratios averaged."""
+    from src.utils.slow_query_log import QueryStats
+
+    stats = QueryStats()
+    stats.add_page({
+        "x-ms-request-charge": "10.5",
+        "x-ms-documentdb-query-metrics": "retrievedDocumentCount=100;outputDocumentCount=10;indexUtilizationRatio=0.5",
+    })
+    stats.add_page({
+        "x-ms-request-charge": "4.5",
+        "x-ms-documentdb-query-metrics": "retrievedDocumentCount=50;outputDocumentCount=5;indexUtilizationRatio=1.0",
+    })
+
+    assert stats.page_count == 2
+    assert stats.request_charge == 15.0
+    assert stats.metrics["retrievedDocumentCount"] == 150
+    assert stats.metrics["indexUtilizationRatio"] == 0.75
+
+
+def test_slow_query_log_thresholds(tmp_path):
+    """Only queries above a threshold are written."""
+    from src.utils.slow_query_log import QueryStats, SlowQueryLog
+
+    path = tmp_path / "slow.jsonl"
+    log = SlowQueryLog(str(path), latency_threshold_ms=100, ru_threshold=20)
+
+    stats = QueryStats()
+    stats.add_page({
+        "x-ms-request-charge": "25",
+        "x-ms-documentdb-query-metrics": "retrievedDocumentCount=200;outputDocumentCount=4",
+    })
+
+    assert not log.record("gold", "SELECT * FROM c", [], 10, 4, QueryStats())
+    assert log.record("gold", "SELECT * FROM c", [], 10, 4, stats)
+
+    entry = json.loads(path.read_text().strip())
+    assert entry["partition_scope"] == "full_scan"
+    assert entry["retrieved_output_ratio"] == 50.0
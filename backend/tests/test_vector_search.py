@@ -0,0 +1,58 @@
+"""
+Tests for metadata filter pushdown in vector search.
+"""
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.utils.metadata_filter import matches_where, normalize_where
+
+
+def test_normalize_where_splits_into_single_operator_clauses():
+    """Multi-field and multi-operator filters become an $and Chroma accepts."""
+    where = normalize_where({"source": "faq", "year": {"$gte": 2023, "$lt": 2025}})
+
+    assert where == {"$and": [
+        {"source": "faq"},
+        {"year": {"$gte": 2023}},
+        {"year": {"$lt": 2025}},
+    ]}
+    assert matches_where({"source": "faq", "year": 2024}, where)
+    assert not matches_where({"source": "faq", "year": 2025}, where)
+    assert normalize_where({}) is None
+    assert normalize_where({"source": {"$eq": "faq"}}) == {"source": {"$eq": "faq"}}
+
+
+def test_normalize_where_rejects_unknown_operators():
+    with pytest.raises(ValueError):
+        normalize_where({"year": {"$regex": "20.*"}})
+    with pytest.raises(ValueError):
+        normalize_where({"source": {"$in": "faq"}})
+
+
+async def test_vector_search_tool_pushes_filters_down(monkeypatch):
+    """The tool awaits the search and passes the filter to the index."""
+    from src.tools import vector_search_tool
+
+    rag_service = MagicMock()
+    rag_service.similarity_search = AsyncMock(return_value=[
+        ("Q3 settlement report", 0.82, {"source": "faq", "year": 2024}),
+    ])
+    monkeypatch.setattr(vector_search_tool, "get_rag_service", lambda: rag_service)
+
+    result = await vector_search_tool.VectorSearchTool().execute(
+        "settlements", k=3, score_threshold=0.5, filters={"source": "faq", "year": 2024}
+    )
+
+    assert result["success"] and result["count"] == 1
+    assert result["results"][0] == {
+        "content": "Q3 settlement report",
+        "metadata": {"source": "faq", "year": 2024},
+        "score": 0.82,
+    }
+    rag_service.similarity_search.assert_awaited_once_with(
+        "settlements",
+        k=3,
+        filter={"$and": [{"source": "faq"}, {"year": 2024}]},
+        score_threshold=0.5
+    )
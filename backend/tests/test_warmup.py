@@ -0,0 +1,75 @@
+"""
+Tests for startup warm-up and readiness.
+"""
+from unittest.mock import AsyncMock, MagicMock
+
+
+async def test_warmup_reports_ready_when_all_components_warm(monkeypatch, mock_llm_service):
+    """Readiness flips only after RAG, LLM and orchestrator are loaded."""
+    import src.agents
+    from src.services import warmup_service
+
+    rag_service = MagicMock()
+    rag_service.warm_up = AsyncMock()
+    monkeypatch.setattr(warmup_service, "get_rag_service", lambda: rag_service)
+    monkeypatch.setattr(warmup_service, "get_llm_service", lambda: mock_llm_service)
+    monkeypatch.setattr(src.agents, "get_orchestrator", MagicMock())
+
+    service = warmup_service.WarmupService()
+    assert service.status()["status"] == "not_started"
+
+    assert await service.warm_up() is True
+    assert service.status()["status"] == "ready"
+    assert set(service.components) == {"rag", "llm", "orchestrator"}
+    rag_service.warm_up.assert_awaited_once()
+    mock_llm_service.preload.assert_called_once()
+    src.agents.get_orchestrator.assert_called_once()
+
+
+async def test_warmup_failure_keeps_service_not_ready(monkeypatch, mock_llm_service):
+    """A component that fails to load keeps readiness false."""
+    import src.agents
+    from src.services import warmup_service
+
+    rag_service = MagicMock()
+    rag_service.warm_up = AsyncMock(side_effect=RuntimeError("model missing"))
+    monkeypatch.setattr(warmup_service, "get_rag_service", lambda: rag_service)
+    monkeypatch.setattr(warmup_service, "get_llm_service", lambda: mock_llm_service)
+    monkeypatch.setattr(src.agents, "get_orchestrator", MagicMock())
+
+    service = warmup_service.WarmupService()
+
+    assert await service.warm_up() is False
+    assert service.status()["status"] == "failed"
+    assert service.components["rag"]["error"] == "model missing"
+
+
+def test_concurrent_getters_build_one_instance(monkeypatch):
+    """A request racing warm-up waits for the instance being built instead of building another."""
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    from src.services import rag_service
+
+    built = []
+
+    class SlowRAGService:
+        def __init__(self):
+            built.append(self)
+            time.sleep(0.05)
+
+    monkeypatch.setattr(rag_service, "_rag_service", None)
+    monkeypatch.setattr(rag_service, "RAGService", SlowRAGService)
+
+    barrier = threading.Barrier(4)
+
+    def get():
+        barrier.wait()
+        return rag_service.get_rag_service()
+
+    with ThreadPoolExecutor(4) as pool:
+        instances = list(pool.map(lambda _: get(), range(4)))
+
+    assert len(built) == 1
+    assert all(instance is built[0] for instance in instances)